@@ -7,15 +7,23 @@
 import time
 import csv
 import re
-from datetime import datetime, timedelta
+from datetime import datetime
 from bs4 import BeautifulSoup
 from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeout
 
+from classify import classify, job_type
+from countries import get_country
+from discovery import KnownIdStop, NEWEST_FIRST_QUERY, load_known_ids
+from gazetteer import locate
+from normalize import parse_salary, parse_date, format_amount, add_days
+from pipeline import IdStream
+
 # ---------------------------------------------------------------
 # CONFIG
 # ---------------------------------------------------------------
-BASE_URL = "https://www.elempleo.com/cr/ofertas-empleo/"
-DETAIL_BASE_URL = "https://www.elempleo.com/cr/ofertas-trabajo/"
+BASE_URL = get_country().listing_url
+DETAIL_BASE_URL = get_country().detail_url
+PUBLISH_DATE_SELECTOR = "[class*='js-publish-date'], [class*='publicado'], time"
 
 HEADERS = [
     "_job_featured_image","_job_title", "_job_featured", "_job_filled", "_job_urgent", "_job_description",
@@ -29,16 +37,28 @@ HEADERS = [
 # ---------------------------------------------------------------
 # 1️⃣ Automatically collect job IDs with pagination
 # ---------------------------------------------------------------
-def get_job_ids_with_playwright_auto(delay=2.5, max_pages=100):
-    """Automatically navigate pages and collect all job IDs from Elempleo listings."""
+def get_job_ids_with_playwright_auto(delay=2.5, max_pages=100, known_ids=None, country=None):
+    """Automatically navigate pages and collect all job IDs from one country's Elempleo listings.
+
+    With known_ids the listing is sorted newest first and pagination stops at
+    the first page whose offers are all already known.
+    """
+    return list(iter_job_ids_with_playwright_auto(delay, max_pages, known_ids, country))
+
+
+def iter_job_ids_with_playwright_auto(delay=2.5, max_pages=100, known_ids=None, country=None):
+    """Yield job IDs page by page as pagination reveals them."""
     print("🚀 Launching browser to collect ALL job IDs (auto pagination)...")
     job_ids = set()
+    stop = KnownIdStop(known_ids)
+    base_url = get_country(country).listing_url
+    listing_url = base_url + NEWEST_FIRST_QUERY if known_ids else base_url
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=True)
         context = browser.new_context()
         page = context.new_page()
         try:
-            page.goto(BASE_URL, wait_until="networkidle", timeout=90000)
+            page.goto(listing_url, wait_until="networkidle", timeout=90000)
             time.sleep(delay)
             page_number = 1
             while True:
@@ -53,10 +73,15 @@ def get_job_ids_with_playwright_auto(delay=2.5, max_pages=100):
                     break
                 for btn in buttons:
                     job_id = btn.get("data-joboffer")
-                    if job_id:
+                    if job_id and job_id not in job_ids:
                         job_ids.add(job_id)
+                        yield job_id
                 print(f"  ✓ Collected {len(job_ids)} unique job IDs so far.")
 
+                if stop.update(job_ids):
+                    print("🛑 Page contains only already-known jobs. Stopping.")
+                    break
+
                 # Try to find “Next” link
                 next_link = None
                 # Try different ways: link with text “Siguiente”, link with aria-label, or class
@@ -88,7 +113,6 @@ def get_job_ids_with_playwright_auto(delay=2.5, max_pages=100):
             print(f"❌ Error during pagination: {e}")
         finally:
             browser.close()
-    return list(job_ids)
 
 # ---------------------------------------------------------------
 # 2️⃣ Helper function to extract text safely
@@ -139,34 +163,28 @@ def get_job_details(page, job_url):
         job["_job_title"] = extract_text(soup, ".category, [class*='categoria'], .breadcrumb li:last-child")
         job["_job_category"] = extract_text(soup, ".js-position-area")
 
-        # Job type
-        job_type = "Tiempo completo"
-        span = soup.find("span")
-        if span:
-            text = span.get_text(strip=True).lower()
-            if "medio tiempo" in text:
-                job_type = "Medio tiempo"
-            elif "remoto" in text:
-                job_type = "Remoto"
-        job["_job_type"] = job_type
+        # Job type, area and seniority from keywords in title + description
+        keywords = classify(job["_job_title"], job.get("_job_description", ""))
+        job["_job_type"] = job_type(keywords)
+        job["_job_category"] = job["_job_category"] or keywords.area
 
         # Salary
         salary_text = extract_text(soup, "[class*='salario'], .js-joboffer-salary, .compensation")
         job["_job_salary"] = salary_text
-        if salary_text:
-            numbers = re.findall(r"[\d,.]+", salary_text)
-            if len(numbers) >= 1:
-                job["_job_salary_type"] = "Mensual"
-                job["_job_max_salary"] = numbers[-1]
+        salary = parse_salary(salary_text)
+        if salary.max is not None:
+            job["_job_salary_type"] = salary.period or "Mensual"
+            job["_job_max_salary"] = format_amount(salary.max)
 
         # Location
         job["_job_location"] = extract_text(soup, "[class*='ubicacion'], .js-joboffer-city, [itemprop='addressLocality']")
         job["_job_address"] = job["_job_location"]
 
-        # Dates
-        expiry_date = datetime.today() + timedelta(days=30)
-        job["_job_expiry_date"] = expiry_date.strftime("%Y-%m-%d")
-        job["_job_application_deadline_date"] = expiry_date.strftime("%Y-%m-%d")
+        # Dates: 30 days after the publish date when the page shows one
+        published = parse_date(extract_text(soup, PUBLISH_DATE_SELECTOR))
+        expiry_date = add_days(published or datetime.today().strftime("%Y-%m-%d"), 30)
+        job["_job_expiry_date"] = expiry_date
+        job["_job_application_deadline_date"] = expiry_date
 
         # Experience
         data_spans = soup.select(".data-column span")
@@ -185,6 +203,7 @@ def get_job_details(page, job_url):
             span = icon.find_next("span")
             if span:
                 job["_job_career_level"] = span.get_text(strip=True)
+        job["_job_career_level"] = job.get("_job_career_level") or keywords.seniority
 
         # Email or apply URL
         email_match = re.search(r"[\w\.-]+@[\w\.-]+\.\w+", soup.get_text())
@@ -202,7 +221,8 @@ def get_job_details(page, job_url):
         job["_job_tag"] = "Costa Rica"
         job["_job_video_url"] = ""
         job["_job_photos"] = ""
-        job["_job_map_location"] = ""
+        place = locate(job["_job_location"])
+        job["_job_map_location"] = place.map_location if place else ""
         job["_job_apply_type"] = "external"
 
         print(f"✅ Scraped job: {job['_job_title']}")
@@ -215,16 +235,15 @@ def get_job_details(page, job_url):
 # ---------------------------------------------------------------
 # 4️⃣ MAIN SCRAPER
 # ---------------------------------------------------------------
-def main():
+def main(incremental=False, known_ids_path=None):
+    """Run the scraper; incremental=True only scrapes IDs missing from the last snapshot."""
     print("\n🚀 Starting Elempleo Auto Job Scraper with Pagination...")
 
-    # Step 1: Collect job IDs automatically
-    job_ids = get_job_ids_with_playwright_auto(delay=2.5)
-    if not job_ids:
-        print("⚠️ No job IDs found.")
-        return
+    known_ids = load_known_ids(known_ids_path) if incremental else set()
 
-    print(f"✅ Found {len(job_ids)} job IDs. Starting detail scraping...")
+    # Step 1: Collect job IDs page by page; details start with the first page
+    job_ids = IdStream(lambda: iter_job_ids_with_playwright_auto(delay=2.5, known_ids=known_ids),
+                       known_ids=known_ids)
 
     results = []
     with sync_playwright() as p:
@@ -234,11 +253,15 @@ def main():
 
         for idx, job_id in enumerate(job_ids, 1):
             job_url = f"{DETAIL_BASE_URL}{job_id}"
-            print(f"[{idx}/{len(job_ids)}] Scraping {job_url} ...")
+            print(f"[{idx}] Scraping {job_url} ...")
             job_data = get_job_details(page, job_url)
             results.append(job_data)
 
         browser.close()
+    print(job_ids.report())
+    if not results:
+        print("⚠️ No job IDs found.")
+        return
 
     # Step 2: Save results to CSV
     filename = f"elempleo_job_details_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
@@ -0,0 +1,247 @@
+# analytics.py
+# -----------------------------
+# Streaming analytics over historical snapshot CSVs.
+#  - reads rows with csv.reader and keeps only the projected columns
+#  - field coverage, counts by location/category/company, salary
+#    distributions from fixed log-scale histograms
+#  - memory stays bounded: no row is kept, only counters and histograms
+#  - files are aggregated in parallel and the partial results merged
+#
+# Usage:
+#   python elempleo.py analyze                         # all detail snapshots
+#   python elempleo.py analyze a.csv b.csv --unique --json
+# -----------------------------
+
+import csv
+import glob
+import math
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from operator import itemgetter
+
+from discovery import ID_COLUMNS, SNAPSHOT_GLOB, job_id_from_url
+from job_record import _canonical
+from normalize import parse_salary
+
+# ---------------------------------------------------------------
+# CONFIG
+# ---------------------------------------------------------------
+GROUP_FIELDS = ("location", "category", "company")
+COVERAGE_FIELDS = ("title", "company", "location", "category", "type", "salary", "description",
+                   "experience", "qualification", "career_level", "expiry_date", "apply_url")
+SALARY_FIELD = "salary"
+# Canonical ID columns, in lookup order
+ID_FIELDS = tuple(dict.fromkeys(_canonical(c) for c in ID_COLUMNS))
+# Histogram resolution: bins per power of ten (~12% wide each)
+BINS_PER_DECADE = 20
+
+csv.field_size_limit(sys.maxsize)
+
+
+# ---------------------------------------------------------------
+# 1️⃣  Aggregates
+# ---------------------------------------------------------------
+class SalaryHistogram:
+    """Count/min/max/sum plus a log-scale histogram, per currency and period."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.low = math.inf
+        self.high = 0.0
+        self.bins = Counter()
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        self.low = min(self.low, value)
+        self.high = max(self.high, value)
+        self.bins[int(math.log10(value) * BINS_PER_DECADE)] += 1
+
+    def merge(self, other):
+        self.count += other.count
+        self.total += other.total
+        self.low = min(self.low, other.low)
+        self.high = max(self.high, other.high)
+        self.bins.update(other.bins)
+
+    def quantile(self, q):
+        """Approximate quantile: lower edge of the bin holding it."""
+        target = q * self.count
+        seen = 0
+        for b in sorted(self.bins):
+            seen += self.bins[b]
+            if seen >= target:
+                return max(self.low, 10 ** (b / BINS_PER_DECADE))
+        return self.high
+
+    def summary(self):
+        return {
+            "count": self.count, "min": self.low, "max": self.high,
+            "mean": round(self.total / self.count), "p25": round(self.quantile(0.25)),
+            "median": round(self.quantile(0.5)), "p75": round(self.quantile(0.75)),
+        }
+
+
+class SnapshotStats:
+    """Mergeable aggregates for one or more snapshot files."""
+
+    def __init__(self, group_fields=GROUP_FIELDS, coverage_fields=COVERAGE_FIELDS):
+        self.group_fields = tuple(group_fields)
+        self.coverage_fields = tuple(coverage_fields)
+        self.rows = 0
+        self.files = 0
+        self.duplicates = 0
+        self.coverage = Counter()
+        self.groups = {field: Counter() for field in self.group_fields}
+        self.salary = {}
+        self.confidential = 0
+
+    def merge(self, other):
+        self.rows += other.rows
+        self.files += other.files
+        self.duplicates += other.duplicates
+        self.coverage.update(other.coverage)
+        for field, counts in other.groups.items():
+            self.groups[field].update(counts)
+        for key, hist in other.salary.items():
+            self.salary.setdefault(key, SalaryHistogram()).merge(hist)
+        self.confidential += other.confidential
+        return self
+
+    def to_dict(self, top=10):
+        rows = self.rows or 1
+        return {
+            "files": self.files,
+            "rows": self.rows,
+            "duplicates_skipped": self.duplicates,
+            "coverage": {f: round(self.coverage[f] / rows * 100, 1) for f in self.coverage_fields},
+            "top": {f: self.groups[f].most_common(top) for f in self.group_fields},
+            "salary": {f"{currency} {period}".strip(): hist.summary()
+                       for (currency, period), hist in sorted(self.salary.items())},
+            "salary_confidential": self.confidential,
+        }
+
+
+# ---------------------------------------------------------------
+# 2️⃣  Streaming reader with column projection
+# ---------------------------------------------------------------
+def _projection(header, fields):
+    """Column index of each wanted canonical field present in this file's header."""
+    positions = {}
+    for idx, name in enumerate(header):
+        field = _canonical(name.strip())
+        if field in fields and field not in positions:
+            positions[field] = idx
+    return positions
+
+
+def scan_snapshot(path, stats=None, seen_ids=None):
+    """Stream one CSV into stats (new SnapshotStats if None) and return it.
+
+    seen_ids: a shared set to count each job once across files.
+    """
+    stats = stats or SnapshotStats()
+    wanted = set(stats.group_fields) | set(stats.coverage_fields) | {SALARY_FIELD}
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header:
+            return stats
+        positions = _projection(header, wanted | set(ID_FIELDS))
+        fields = [f for f in positions if f in wanted]
+        if not fields:
+            return stats
+        project = itemgetter(*(positions[f] for f in fields))
+        id_pos = [positions[f] for f in ID_FIELDS if f in positions] if seen_ids is not None else []
+        width = len(header)
+        coverage = stats.coverage
+        groups = [(i, stats.groups[f]) for i, f in enumerate(fields) if f in stats.groups]
+        salary_at = fields.index(SALARY_FIELD) if SALARY_FIELD in fields else None
+        covered = [(i, f) for i, f in enumerate(fields) if f in stats.coverage_fields]
+
+        for row in reader:
+            if len(row) < width:
+                row += [""] * (width - len(row))
+            if id_pos:
+                job_id = _row_id(row, id_pos)
+                if job_id:
+                    if job_id in seen_ids:
+                        stats.duplicates += 1
+                        continue
+                    seen_ids.add(job_id)
+            values = project(row)
+            if len(fields) == 1:
+                values = (values,)
+            stats.rows += 1
+            for i, field in covered:
+                if values[i].strip():
+                    coverage[field] += 1
+            for i, counts in groups:
+                value = values[i].strip()
+                if value:
+                    counts[value] += 1
+            if salary_at is not None and values[salary_at]:
+                salary = parse_salary(values[salary_at])
+                if salary.confidential:
+                    stats.confidential += 1
+                amount = salary.max if salary.max is not None else salary.min
+                if amount:
+                    key = (salary.currency or "?", salary.period or "")
+                    stats.salary.setdefault(key, SalaryHistogram()).add(amount)
+    stats.files += 1
+    return stats
+
+
+def _row_id(row, id_pos):
+    for idx in id_pos:
+        value = row[idx].strip()
+        job_id = value if value.isdigit() else job_id_from_url(value)
+        if job_id:
+            return job_id
+    return ""
+
+
+def analyze(paths=None, unique=False, workers=None, **stats_kwargs):
+    """Aggregate many snapshots; files run in parallel unless unique=True.
+
+    unique=True counts each job ID once (first file wins) and therefore
+    scans the files in order in this process.
+    """
+    paths = sorted(paths or glob.glob(SNAPSHOT_GLOB))
+    total = SnapshotStats(**stats_kwargs)
+    if unique:
+        seen = set()
+        for path in paths:
+            scan_snapshot(path, total, seen)
+        return total
+    if workers == 0 or len(paths) <= 1:
+        for path in paths:
+            scan_snapshot(path, total)
+        return total
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for partial in pool.map(_scan_new, paths, [stats_kwargs] * len(paths)):
+            total.merge(partial)
+    return total
+
+
+def _scan_new(path, stats_kwargs):
+    return scan_snapshot(path, SnapshotStats(**stats_kwargs))
+
+
+def format_report(result):
+    """Human-readable report for SnapshotStats.to_dict()."""
+    lines = [f"📊 {result['rows']} rows from {result['files']} snapshots"
+             + (f" ({result['duplicates_skipped']} repeated jobs skipped)" if result["duplicates_skipped"] else "")]
+    lines.append("\n📋 Field coverage:")
+    for field, pct in result["coverage"].items():
+        lines.append(f"  {field:15s} {'█' * int(pct / 4):25s} {pct:5.1f}%")
+    for field, counts in result["top"].items():
+        lines.append(f"\n🏷️ Top {field}:")
+        lines.extend(f"  {count:7d}  {value}" for value, count in counts)
+    lines.append(f"\n💰 Salaries ({result['salary_confidential']} confidential):")
+    for key, s in result["salary"].items():
+        lines.append(f"  {key:12s} n={s['count']:<6d} min={s['min']:,.0f} p25≈{s['p25']:,} "
+                     f"median≈{s['median']:,} p75≈{s['p75']:,} max={s['max']:,.0f}")
+    return "\n".join(lines)
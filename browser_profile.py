@@ -0,0 +1,183 @@
+# browser_profile.py
+# -----------------------------
+# Reusable browser state for the Playwright scrapers.
+#  - "fresh":      empty context every run (previous behaviour)
+#  - "storage":    new context seeded from a saved storage_state.json
+#                  (cookies/localStorage, so the policy banner stays accepted)
+#  - "persistent": full Chromium user-data directory reused across runs
+# Optionally serves static assets (JS/CSS/fonts/images) from a local
+# on-disk cache shared by every page and run, and reports bytes saved.
+# Can also record the session to a HAR file or replay one offline.
+# -----------------------------
+
+import hashlib
+import json
+import os
+import time
+
+from har_replay import apply_har_replay, har_context_options, har_part_path
+
+# ---------------------------------------------------------------
+# CONFIG
+# ---------------------------------------------------------------
+PROFILE_DIR = ".browser_profile"
+STORAGE_STATE_FILE = "storage_state.json"
+ASSET_CACHE_DIR = ".http_cache"
+ASSET_MAX_AGE = 7 * 24 * 3600
+CACHEABLE_TYPES = {"script", "stylesheet", "font", "image"}
+# One accept button per country site (#btnAcceptPolicyNavigationCR, ...CO)
+CONSENT_SELECTORS = ["[id^='btnAcceptPolicyNavigation']", ".button-politics"]
+PROFILES = ("fresh", "storage", "persistent")
+
+
+# ---------------------------------------------------------------
+# 1️⃣  On-disk asset cache
+# ---------------------------------------------------------------
+class AssetCache:
+    """Route handler that serves static assets from disk when it can."""
+
+    def __init__(self, cache_dir=ASSET_CACHE_DIR, max_age=ASSET_MAX_AGE):
+        self.cache_dir = cache_dir
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.bytes_from_cache = 0
+        self.bytes_from_network = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _paths(self, url):
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.cache_dir, key[:2], key)
+        return base + ".body", base + ".json"
+
+    def handle(self, route):
+        request = route.request
+        if request.method != "GET" or request.resource_type not in CACHEABLE_TYPES:
+            route.fallback()
+            return
+
+        body_path, meta_path = self._paths(request.url)
+        if os.path.exists(meta_path) and time.time() - os.path.getmtime(meta_path) < self.max_age:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                body = f.read()
+            self.hits += 1
+            self.bytes_from_cache += len(body)
+            route.fulfill(status=meta["status"], headers=meta["headers"], body=body)
+            return
+
+        response = route.fetch()
+        body = response.body()
+        self.misses += 1
+        self.bytes_from_network += len(body)
+        if response.status == 200:
+            os.makedirs(os.path.dirname(body_path), exist_ok=True)
+            with open(body_path, "wb") as f:
+                f.write(body)
+            # The stored body is already decoded, so drop encoding/length headers
+            headers = {k: v for k, v in response.headers.items()
+                       if k.lower() not in ("content-encoding", "content-length")}
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump({"status": response.status, "headers": headers}, f)
+        route.fulfill(response=response, body=body)
+
+    def report(self):
+        total = self.bytes_from_cache + self.bytes_from_network
+        pct = (self.bytes_from_cache / total * 100) if total else 0
+        return (f"📦 Asset cache: {self.hits} hits / {self.misses} misses, "
+                f"{self.bytes_from_cache / 1e6:.1f} MB served locally, "
+                f"{self.bytes_from_network / 1e6:.1f} MB downloaded ({pct:.0f}% saved)")
+
+
+# ---------------------------------------------------------------
+# 2️⃣  Browser session
+# ---------------------------------------------------------------
+class BrowserSession:
+    """Launches a browser context according to the chosen profile.
+
+    Usage:
+        with sync_playwright() as p, BrowserSession(p, profile="storage") as session:
+            page = session.new_page()
+    """
+
+    def __init__(self, playwright, profile="fresh", asset_cache=False, headless=True,
+                 profile_dir=PROFILE_DIR, storage_state=STORAGE_STATE_FILE,
+                 record_har=None, replay_har=None, **context_kwargs):
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown browser profile {profile!r}, expected one of {PROFILES}")
+        self.playwright = playwright
+        self.profile = profile
+        self.headless = headless
+        self.profile_dir = profile_dir
+        self.storage_state = storage_state
+        self.context_kwargs = context_kwargs
+        self.record_har = record_har
+        self.replay_har = replay_har
+        # Contexts opened so far; each reopen records to (and replays from) its own HAR part
+        self.opens = 0
+        # A replayed HAR already serves every request locally
+        self.cache = AssetCache() if asset_cache and not replay_har else None
+        self.browser = None
+        self.context = None
+        self._consent_done = False
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def open(self):
+        chromium = self.playwright.chromium
+        part = self.opens
+        self.opens += 1
+        context_kwargs = dict(self.context_kwargs, **har_context_options(har_part_path(self.record_har, part)))
+        if self.profile == "persistent":
+            self.context = chromium.launch_persistent_context(
+                self.profile_dir, headless=self.headless, **context_kwargs
+            )
+        else:
+            self.browser = chromium.launch(headless=self.headless)
+            kwargs = dict(context_kwargs)
+            if self.profile == "storage" and os.path.exists(self.storage_state):
+                kwargs["storage_state"] = self.storage_state
+                self._consent_done = True
+            self.context = self.browser.new_context(**kwargs)
+        replay_har = har_part_path(self.replay_har, part)
+        apply_har_replay(self.context, replay_har if replay_har and os.path.exists(replay_har) else self.replay_har)
+        if self.cache is not None:
+            self.context.route("**/*", self.cache.handle)
+        return self.context
+
+    def new_page(self):
+        return self.context.new_page()
+
+    def accept_consent(self, page):
+        """Dismiss the cookie/policy banner once; the saved state keeps it dismissed."""
+        if self._consent_done:
+            return
+        for selector in CONSENT_SELECTORS:
+            try:
+                button = page.locator(selector).first
+                if button.count() > 0 and button.is_visible():
+                    button.click(timeout=3000)
+                    print("🍪 Accepted site policy banner")
+                    break
+            except Exception as e:
+                print(f"⚠️ Could not click {selector}: {e}")
+        self._consent_done = True
+
+    def close(self):
+        if self.context is None:
+            return
+        if self.profile == "storage":
+            self.context.storage_state(path=self.storage_state)
+        if self.cache is not None:
+            print(self.cache.report())
+        self.context.close()
+        if self.browser is not None:
+            self.browser.close()
+        self.context = None
+        self.browser = None
@@ -0,0 +1,346 @@
+# classify.py
+# -----------------------------
+# Job type / modality / seniority / area classifier.
+#  - every keyword of every dimension is compiled into one Aho-Corasick
+#    automaton over accent/case-folded text
+#  - one pass over title + description finds all keywords at once, so the
+#    cost grows with the text, not with the number of keywords
+#  - matches must sit on word boundaries; the longest of overlapping
+#    matches wins ("semi senior" is not also "senior")
+#  - title hits weigh TITLE_WEIGHT times a description hit; ties go to the
+#    label listed first (Presencial and Híbrido before Remoto)
+#  - labels hit in the title or after a field label ("Modalidad: remoto")
+#    are kept as stated; only those may change _job_type
+#
+# Usage:
+#   result = classify("Desarrollador Python Senior", description)
+#   result.contract, result.modality, result.seniority, result.area
+#   python classify.py elempleo_job_details_20251023_163923.csv
+#   python classify.py --bench elempleo_job_details_*.csv
+# -----------------------------
+
+import csv
+import random
+import re
+import string
+import sys
+import time
+from collections import Counter, namedtuple
+
+from gazetteer import fold
+from job_record import _canonical
+
+# ---------------------------------------------------------------
+# CONFIG
+# ---------------------------------------------------------------
+# dimension -> label -> folded keywords (no accents, lower case)
+KEYWORDS = {
+    "contract": {
+        "Tiempo completo": ("tiempo completo", "jornada completa", "full time", "full-time"),
+        "Medio tiempo": ("medio tiempo", "tiempo parcial", "media jornada", "part time", "part-time"),
+        "Por horas": ("por horas", "pago por hora"),
+        "Temporal": ("temporal", "por temporada", "plazo fijo", "reemplazo", "interinato"),
+        "Indefinido": ("plazo indefinido", "contrato indefinido", "plaza fija", "plaza en propiedad"),
+        "Servicios profesionales": ("servicios profesionales", "freelance", "por proyecto"),
+        "Pasantía": ("pasantia", "practica profesional", "internship"),
+    },
+    "modality": {
+        "Presencial": ("presencial", "on site", "onsite"),
+        "Híbrido": ("hibrido", "hibrida", "modalidad mixta", "hybrid"),
+        "Remoto": ("remoto", "100% remoto", "teletrabajo", "home office", "trabajo desde casa", "remote"),
+    },
+    "seniority": {
+        "Practicante": ("practicante", "pasante", "estudiante"),
+        "Junior": ("junior", "jr", "sin experiencia", "primer empleo"),
+        "Semi-senior": ("semi senior", "semi-senior", "semisenior", "ssr"),
+        "Senior": ("senior", "sr"),
+        "Supervisor": ("supervisor", "supervisora", "coordinador", "coordinadora", "lider", "team lead"),
+        "Gerencia": ("gerente", "jefe", "jefa", "director", "directora", "manager", "head of"),
+    },
+    "area": {
+        "Tecnología": ("desarrollador", "desarrolladora", "programador", "programadora", "software",
+                       "developer", "soporte tecnico", "help desk", "devops", "qa", "base de datos",
+                       "redes", "ciberseguridad", "python", "java", "sap", "tecnologias de informacion"),
+        "Ventas": ("ventas", "vendedor", "vendedora", "ejecutivo comercial", "asesor comercial",
+                   "agente de ventas", "cajero", "cajera"),
+        "Servicio al cliente": ("servicio al cliente", "atencion al cliente", "call center", "customer service",
+                                "centro de llamadas", "agente bilingue"),
+        "Finanzas y contabilidad": ("contador", "contadora", "contabilidad", "contable", "finanzas",
+                                    "financiero", "financiera", "auditor", "auditoria", "tesoreria",
+                                    "cuentas por pagar", "cuentas por cobrar", "planillas"),
+        "Recursos humanos": ("recursos humanos", "reclutamiento", "reclutador", "reclutadora",
+                             "talento humano", "rrhh"),
+        "Salud": ("enfermera", "enfermero", "enfermeria", "medico", "medica", "farmacia", "farmaceutico",
+                  "odontologo", "odontologa", "microbiologo", "terapeuta", "fisioterapeuta"),
+        "Ingeniería": ("ingeniero", "ingeniera", "ingenieria", "mantenimiento", "electromecanico",
+                       "electricista", "mecanico"),
+        "Manufactura y producción": ("operario", "operaria", "produccion", "manufactura", "ensamble",
+                                     "control de calidad"),
+        "Logística": ("bodega", "bodeguero", "logistica", "chofer", "conductor", "despacho", "inventario",
+                      "compras", "importaciones", "montacargas"),
+        "Administración": ("asistente administrativo", "asistente administrativa", "administrativo",
+                           "administrativa", "recepcionista", "secretaria", "oficinista"),
+        "Mercadeo": ("mercadeo", "marketing", "publicidad", "community manager", "redes sociales",
+                     "disenador grafico", "disenadora grafica"),
+        "Legal": ("abogado", "abogada", "asesor legal", "asistente legal", "notario", "notaria"),
+        "Educación": ("docente", "profesor", "profesora", "maestro", "maestra", "tutor", "tutora"),
+        "Turismo y gastronomía": ("hotel", "hoteleria", "turismo", "cocinero", "cocinera", "chef",
+                                  "salonero", "salonera", "mesero", "mesera", "bartender"),
+        "Construcción": ("construccion", "albanil", "arquitecto", "arquitecta", "maestro de obras",
+                         "topografo"),
+        "Seguridad": ("oficial de seguridad", "guarda de seguridad", "vigilante", "agente de seguridad"),
+    },
+}
+DIMENSIONS = tuple(KEYWORDS)
+# A keyword in the title counts this many times a description hit
+TITLE_WEIGHT = 3
+# Field labels that state a job's terms ("Modalidad: Remoto", "Tipo de contrato: ...")
+FIELD_LABEL_RE = re.compile(r"\b(?:modalidad|contrato|jornada|horario|tipo de (?:contrato|empleo|trabajo|jornada))"
+                            r"\s*:[^:\n]*$")
+# _job_type values kept from the old span check
+DEFAULT_JOB_TYPE = "Tiempo completo"
+JOB_TYPES = ("Tiempo completo", "Medio tiempo", "Remoto")
+
+# stated: (dimension, label) pairs hit in the title or after a field label
+Classification = namedtuple("Classification", DIMENSIONS + ("stated",), defaults=(frozenset(),))
+
+
+# ---------------------------------------------------------------
+# 1️⃣  Aho-Corasick automaton
+# ---------------------------------------------------------------
+class KeywordAutomaton:
+    """Multi-pattern matcher: add() keywords, build(), then finditer() any text."""
+
+    def __init__(self):
+        self.goto = [{}]
+        self.fail = [0]
+        # Per node: (keyword length, value) for every keyword ending here
+        self.out = [[]]
+        self.keywords = 0
+
+    def add(self, keyword, value):
+        node = 0
+        for char in keyword:
+            nxt = self.goto[node].get(char)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[node][char] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append([])
+            node = nxt
+        self.out[node].append((len(keyword), value))
+        self.keywords += 1
+
+    def build(self):
+        """Breadth-first failure links; outputs of suffix states are merged in."""
+        queue = list(self.goto[0].values())
+        for node in queue:
+            for char, nxt in self.goto[node].items():
+                queue.append(nxt)
+                state = self.fail[node]
+                while state and char not in self.goto[state]:
+                    state = self.fail[state]
+                target = self.goto[state].get(char, 0)
+                self.fail[nxt] = target if target != nxt else 0
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+        return self
+
+    def finditer(self, text):
+        """(start, end, value) for every keyword occurrence, in order of end position."""
+        goto, fail, out = self.goto, self.fail, self.out
+        node = 0
+        for i, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for length, value in out[node]:
+                yield i + 1 - length, i + 1, value
+
+
+def _whole_words(text, matches):
+    """Matches on word boundaries; the longest of overlapping matches wins."""
+    kept = []
+    last_end = -1
+    for start, end, value in sorted(matches, key=lambda m: (m[0], m[0] - m[1])):
+        if start < last_end:
+            continue
+        if (start and text[start - 1].isalnum()) or (end < len(text) and text[end].isalnum()):
+            continue
+        kept.append((start, end, value))
+        last_end = end
+    return kept
+
+
+# ---------------------------------------------------------------
+# 2️⃣  Classifier
+# ---------------------------------------------------------------
+class JobClassifier:
+    """Classifies a job on every dimension of a keyword table in one pass."""
+
+    def __init__(self, keywords=KEYWORDS, title_weight=TITLE_WEIGHT):
+        self.dimensions = tuple(keywords)
+        self.title_weight = title_weight
+        self.order = {dimension: {label: i for i, label in enumerate(labels)}
+                      for dimension, labels in keywords.items()}
+        self.automaton = KeywordAutomaton()
+        for dimension, labels in keywords.items():
+            for label, words in labels.items():
+                for word in words:
+                    self.automaton.add(fold(word), (dimension, label))
+        self.automaton.build()
+
+    def classify(self, title, description=""):
+        text = fold(f"{title or ''}\n{description or ''}")
+        title_end = len(title or "")
+        scores = {dimension: Counter() for dimension in self.dimensions}
+        stated = set()
+        for start, _, (dimension, label) in _whole_words(text, self.automaton.finditer(text)):
+            in_title = start < title_end
+            scores[dimension][label] += self.title_weight if in_title else 1
+            if in_title or FIELD_LABEL_RE.search(text, text.rfind("\n", 0, start) + 1, start):
+                stated.add((dimension, label))
+        return Classification(*(self._best(d, scores[d]) for d in self.dimensions), frozenset(stated))
+
+    def _best(self, dimension, scores):
+        """Highest-scoring label; ties go to the label listed first."""
+        if not scores:
+            return ""
+        order = self.order[dimension]
+        return max(scores, key=lambda label: (scores[label], -order[label]))
+
+
+_classifier = None
+
+
+def classifier():
+    """Process-wide classifier over KEYWORDS, built on first use."""
+    global _classifier
+    if _classifier is None:
+        _classifier = JobClassifier()
+    return _classifier
+
+
+def classify(title, description=""):
+    return classifier().classify(title, description)
+
+
+def job_type(result, default=DEFAULT_JOB_TYPE):
+    """Single _job_type value, one of JOB_TYPES: part time first, then remote, else default.
+
+    Only stated labels count: a passing "teletrabajo 1 día a la semana" in a
+    benefits list leaves the default, and a stated Presencial or Híbrido
+    overrides Remoto.
+    """
+    if ("contract", "Medio tiempo") in result.stated:
+        return "Medio tiempo"
+    modalities = {label for dimension, label in result.stated if dimension == "modality"}
+    if modalities == {"Remoto"}:
+        return "Remoto"
+    return default
+
+
+# ---------------------------------------------------------------
+# 3️⃣  Batch API
+# ---------------------------------------------------------------
+CLASSIFIED_FIELDS = [f"job_{dimension}" for dimension in DIMENSIONS]
+
+
+def _field(row, name):
+    for key in row:
+        if key and _canonical(key) == name:
+            return row[key] or ""
+    return ""
+
+
+def classify_row(row):
+    """Return a copy of row with the CLASSIFIED_FIELDS appended."""
+    result = classify(_field(row, "title"), _field(row, "description"))
+    out = dict(row)
+    out.update(zip(CLASSIFIED_FIELDS, result))
+    return out
+
+
+def classify_rows(rows):
+    """Classify an iterable of rows lazily (works for whole snapshots)."""
+    for row in rows:
+        yield classify_row(row)
+
+
+def classify_snapshot(in_path, out_path=None):
+    """Stream a snapshot CSV into a copy with the classification columns added."""
+    out_path = out_path or in_path.replace(".csv", "_classified.csv")
+    with open(in_path, newline="", encoding="utf-8-sig") as src:
+        reader = csv.DictReader(src)
+        fieldnames = list(reader.fieldnames or []) + CLASSIFIED_FIELDS
+        with open(out_path, "w", newline="", encoding="utf-8-sig") as dst:
+            writer = csv.DictWriter(dst, fieldnames=fieldnames)
+            writer.writeheader()
+            count = 0
+            for row in classify_rows(reader):
+                writer.writerow(row)
+                count += 1
+    return out_path, count
+
+
+# ---------------------------------------------------------------
+# 4️⃣  Benchmark
+# ---------------------------------------------------------------
+def benchmark(texts, extra_keywords=(0, 1000, 10000, 50000), repeat=3):
+    """Classification throughput with KEYWORDS plus N random filler keywords.
+
+    Returns [(keyword count, MB/s, jobs/s)]; the rate should stay flat as
+    keywords are added.
+    """
+    texts = [(title, description) for title, description in texts]
+    size = sum(len(t) + len(d) + 1 for t, d in texts) / 1e6
+    rng = random.Random(0)
+    results = []
+    for extra in extra_keywords:
+        table = {d: dict(labels) for d, labels in KEYWORDS.items()}
+        table["area"] = dict(table["area"], filler=tuple("".join(rng.choices(string.ascii_lowercase, k=rng.randint(5, 14)))
+                                                  for _ in range(extra)))
+        engine = JobClassifier(table)
+        best = float("inf")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for title, description in texts:
+                engine.classify(title, description)
+            best = min(best, time.perf_counter() - started)
+        results.append((engine.automaton.keywords, size / best, len(texts) / best))
+    return results
+
+
+def _snapshot_texts(paths):
+    for path in paths:
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            for row in csv.DictReader(f):
+                yield _field(row, "title"), _field(row, "description")
+
+
+def print_benchmark(paths):
+    texts = list(_snapshot_texts(paths))
+    print(f"⏱️ {len(texts)} jobs, {sum(len(t) + len(d) for t, d in texts) / 1e6:.2f} MB of text")
+    for keywords, mb_per_s, jobs_per_s in benchmark(texts):
+        print(f"  {keywords:6d} keywords: {mb_per_s:6.2f} MB/s  {jobs_per_s:8.0f} jobs/s")
+
+
+# ---------------------------------------------------------------
+# MAIN
+# ---------------------------------------------------------------
+def main():
+    args = sys.argv[1:]
+    if not args:
+        print("usage: python classify.py [--bench] SNAPSHOT.csv [...]")
+        return
+    if args[0] == "--bench":
+        print_benchmark(args[1:])
+        return
+    for path in args:
+        started = time.perf_counter()
+        out_path, count = classify_snapshot(path)
+        print(f"✅ Classified {count} rows from {path} -> {out_path} in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,12 +11,29 @@ from datetime import datetime
 from playwright.sync_api import sync_playwright
 import logging
 
+from debug_artifacts import DebugRecorder
+from gazetteer import find_location
+from har_replay import apply_har_replay, har_context_options
+from job_record import as_dicts
+from selector_chain import first_match, save_selector_stats, selector_stats
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
 
+# Runs inside the page: one call returns text + first link for every card
+CARD_EXTRACT_JS = """
+(elements, limit) => elements.slice(0, limit || elements.length).map(el => {
+    const link = el.querySelector('a');
+    return {
+        text: el.innerText || '',
+        href: link ? link.getAttribute('href') : null
+    };
+})
+"""
+
 
 class JobScraper:
     """Unified job scraper with debugging"""
@@ -32,9 +49,14 @@ class JobScraper:
         'video_url', 'photos', 'url'
     ]
     
-    def __init__(self):
+    def __init__(self, debug_level=None, record_har=None, replay_har=None, trace=False):
         self.jobs = []
-        self.debug_mode = True
+        # off / on-failure / always; artifacts are written only when needed
+        self.debug = DebugRecorder(debug_level, trace=trace)
+        # Record this run's traffic, or re-run the adapters offline from a HAR
+        self.record_har = record_har
+        self.replay_har = replay_har
+        self.settle_seconds = 0 if replay_har else 5
     
     def scrape_all_sites(self, max_per_site=20):
         """Scrape all 4 sites"""
@@ -56,8 +78,10 @@ class JobScraper:
                 user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
                 viewport={'width': 1920, 'height': 1080},
                 locale='es-CR',
-                timezone_id='America/Costa_Rica'
+                timezone_id='America/Costa_Rica',
+                **har_context_options(self.record_har)
             )
+            apply_har_replay(context, self.replay_har)
             
             # Add stealth
             context.add_init_script("""
@@ -66,6 +90,7 @@ class JobScraper:
                 });
             """)
             
+            self.debug.attach(context)
             page = context.new_page()
             
             try:
@@ -78,42 +103,51 @@ class JobScraper:
             except KeyboardInterrupt:
                 logger.info("\n\nStopped by user")
             finally:
-                time.sleep(3)
+                time.sleep(3 if not self.replay_har else 0)
+                self.debug.close()
+                save_selector_stats()
+                logger.info("Selector lookups:\n" + selector_stats().report())
+                # Closing the context flushes a recorded HAR to disk
+                context.close()
                 browser.close()
         
         return self.jobs
     
     def _wait_and_debug(self, page, site_name):
-        """Wait for page and take debug screenshot"""
-        time.sleep(5)
-        screenshot_path = f'debug_{site_name.replace(".", "_")}.png'
-        page.screenshot(path=screenshot_path, full_page=True)
-        logger.info(f"📸 Screenshot saved: {screenshot_path}")
-        
-        # Get page info
-        title = page.title()
-        logger.info(f"Page title: {title}")
-        
-        # Count common elements
-        divs = page.locator('div').count()
-        articles = page.locator('article').count()
-        links = page.locator('a').count()
-        logger.info(f"Page has: {divs} divs, {articles} articles, {links} links")
+        """Wait for page and record a debug breadcrumb (no browser calls)"""
+        time.sleep(self.settle_seconds)
+        self.debug.note('loaded', site=site_name, url=page.url)
     
-    def _find_elements_debug(self, page, selector_sets):
-        """Try multiple selectors and log what's found"""
-        for selectors in selector_sets:
+    def _find_elements_debug(self, page, selector_sets, max_cards=None, site=None):
+        """Try multiple selectors and return the first non-empty batch of cards.
+
+        Each selector is evaluated with a single ``eval_on_selector_all`` call
+        that returns every card's text and first link, so the adapters parse
+        plain Python data instead of making several round trips per card.
+        With a site name the set that matched last time is tried first.
+        """
+        def probe(selectors):
             selector_str = ', '.join(selectors) if isinstance(selectors, list) else selectors
             try:
-                count = page.locator(selector_str).count()
-                if count > 0:
-                    logger.info(f"  ✓ Found {count} elements with: {selector_str}")
-                    return page.locator(selector_str).all()
+                started = time.perf_counter()
+                cards = page.eval_on_selector_all(selector_str, CARD_EXTRACT_JS, max_cards)
+                if cards:
+                    elapsed_ms = (time.perf_counter() - started) * 1000
+                    logger.info(f"  ✓ Found {len(cards)} elements with: {selector_str} ({elapsed_ms:.0f} ms)")
+                    return cards
                 else:
                     logger.debug(f"  ✗ 0 elements with: {selector_str}")
             except Exception as e:
                 logger.debug(f"  ✗ Error with {selector_str}: {e}")
-        return []
+            return []
+
+        if site is None:
+            for selectors in selector_sets:
+                cards = probe(selectors)
+                if cards:
+                    return cards
+            return []
+        return first_match(site, 'cards', selector_sets, probe) or []
     
     # ==================== ELEMPLEO.COM ====================
     
@@ -123,6 +157,8 @@ class JobScraper:
         logger.info(f"SCRAPING: {site}")
         logger.info(f"{'='*70}")
         
+        self.debug.begin(site)
+        count = 0
         try:
             logger.info("Navigating to elempleo.com...")
             page.goto("https://www.elempleo.com/cr/ofertas-empleo/", 
@@ -142,32 +178,27 @@ class JobScraper:
                 ['div[class*="item"]'],
             ]
             
-            cards = self._find_elements_debug(page, selector_sets)
+            cards = self._find_elements_debug(page, selector_sets, max_jobs, site)
             
             if not cards:
-                logger.error("❌ No job cards found - check screenshot")
+                logger.error("❌ No job cards found - see debug artifacts")
                 return
             
             logger.info(f"✅ Found {len(cards)} job cards")
             
-            count = 0
-            for idx, card in enumerate(cards[:max_jobs], 1):
+            for idx, card in enumerate(cards, 1):
                 try:
                     job = self._init_job(site)
                     
                     # Get all text for debugging
-                    card_text = card.inner_text()
-                    lines = [l.strip() for l in card_text.split('\n') if l.strip()]
+                    card_text = card['text']
+                    lines = self._card_lines(card_text)
                     
                     if len(lines) >= 2:
                         job['title'] = lines[0]
                         job['company'] = lines[1] if len(lines) > 1 else ''
                         
-                        # Location often has "San José", "Heredia", etc
-                        for line in lines:
-                            if any(city in line for city in ['San José', 'Heredia', 'Cartago', 'Alajuela', 'Limón']):
-                                job['location'] = line
-                                break
+                        self._set_location(job, lines)
                         
                         # Look for salary
                         for line in lines:
@@ -181,11 +212,7 @@ class JobScraper:
                             job['experience'] = f"{exp_match.group(1)} años"
                     
                     # Get URL
-                    link = card.locator('a').first
-                    if link.count() > 0:
-                        href = link.get_attribute('href')
-                        if href:
-                            job['url'] = href if href.startswith('http') else f"https://www.elempleo.com{href}"
+                    job['url'] = self._absolute_url(card['href'], "https://www.elempleo.com")
                     
                     job['apply_type'] = 'email'
                     job['apply_email'] = 'info@elempleo.com'
@@ -197,11 +224,15 @@ class JobScraper:
                     
                 except Exception as e:
                     logger.error(f"  [{idx}] Error: {e}")
+                    self.debug.fail(f"card {idx}: {e}")
             
             logger.info(f"✅ {site}: Scraped {count} jobs")
             
         except Exception as e:
             logger.error(f"❌ {site} failed: {e}")
+            self.debug.fail(e)
+        finally:
+            self.debug.finish(page, count)
     
     # ==================== COMPUTRABAJO.COM ====================
     
@@ -211,6 +242,8 @@ class JobScraper:
         logger.info(f"SCRAPING: {site}")
         logger.info(f"{'='*70}")
         
+        self.debug.begin(site)
+        count = 0
         try:
             logger.info("Navigating to computrabajo.com...")
             page.goto("https://cr.computrabajo.com/", 
@@ -230,34 +263,31 @@ class JobScraper:
                 ['div.box'],
             ]
             
-            cards = self._find_elements_debug(page, selector_sets)
+            cards = self._find_elements_debug(page, selector_sets, max_jobs, site)
             
             if not cards:
-                logger.error("❌ No job cards found - check screenshot")
+                logger.error("❌ No job cards found - see debug artifacts")
                 return
             
             logger.info(f"✅ Found {len(cards)} job cards")
             
-            count = 0
-            for idx, card in enumerate(cards[:max_jobs], 1):
+            for idx, card in enumerate(cards, 1):
                 try:
                     job = self._init_job(site)
                     
                     # Get all text
-                    card_text = card.inner_text()
-                    lines = [l.strip() for l in card_text.split('\n') if l.strip()]
+                    card_text = card['text']
+                    lines = self._card_lines(card_text)
                     
                     if len(lines) >= 2:
                         # First significant line is usually title
                         job['title'] = lines[0]
                         job['company'] = lines[1] if len(lines) > 1 else ''
                         
+                        self._set_location(job, lines)
+                        
                         # Parse other fields from text
                         for line in lines:
-                            # Location
-                            if any(city in line for city in ['San José', 'Heredia', 'Cartago', 'Alajuela', 'Costa Rica']):
-                                job['location'] = line
-                            
                             # Salary
                             if '₡' in line or '$' in line or 'salario' in line.lower():
                                 job['salary'] = line
@@ -267,11 +297,7 @@ class JobScraper:
                                 job['posting_date'] = line
                     
                     # Get URL
-                    link = card.locator('a').first
-                    if link.count() > 0:
-                        href = link.get_attribute('href')
-                        if href:
-                            job['url'] = href if href.startswith('http') else f"https://cr.computrabajo.com{href}"
+                    job['url'] = self._absolute_url(card['href'], "https://cr.computrabajo.com")
                     
                     if job['title']:
                         self.jobs.append(job)
@@ -280,11 +306,15 @@ class JobScraper:
                     
                 except Exception as e:
                     logger.error(f"  [{idx}] Error: {e}")
+                    self.debug.fail(f"card {idx}: {e}")
             
             logger.info(f"✅ {site}: Scraped {count} jobs")
             
         except Exception as e:
             logger.error(f"❌ {site} failed: {e}")
+            self.debug.fail(e)
+        finally:
+            self.debug.finish(page, count)
     
     # ==================== INDEED.COM ====================
     
@@ -294,6 +324,8 @@ class JobScraper:
         logger.info(f"SCRAPING: {site}")
         logger.info(f"{'='*70}")
         
+        self.debug.begin(site)
+        count = 0
         try:
             logger.info("Navigating to indeed.com...")
             page.goto("https://cr.indeed.com/jobs?q=&l=Costa+Rica", 
@@ -313,34 +345,30 @@ class JobScraper:
                 ['td.resultContent'],
             ]
             
-            cards = self._find_elements_debug(page, selector_sets)
+            cards = self._find_elements_debug(page, selector_sets, max_jobs, site)
             
             if not cards:
-                logger.error("❌ No job cards found - check screenshot")
+                logger.error("❌ No job cards found - see debug artifacts")
                 return
             
             logger.info(f"✅ Found {len(cards)} job cards")
             
-            count = 0
-            for idx, card in enumerate(cards[:max_jobs], 1):
+            for idx, card in enumerate(cards, 1):
                 try:
                     job = self._init_job(site)
                     
                     # Get all text
-                    card_text = card.inner_text()
-                    lines = [l.strip() for l in card_text.split('\n') if l.strip()]
+                    card_text = card['text']
+                    lines = self._card_lines(card_text)
                     
                     if len(lines) >= 2:
                         job['title'] = lines[0]
                         job['company'] = lines[1] if len(lines) > 1 else ''
                         
-                        # Parse location and salary
+                        self._set_location(job, lines)
+                        
+                        # Parse salary
                         for line in lines:
-                            # Location
-                            if 'Costa Rica' in line or any(city in line for city in ['San José', 'Heredia']):
-                                job['location'] = line
-                            
-                            # Salary
                             if '$' in line or '₡' in line or 'año' in line.lower():
                                 if any(char.isdigit() for char in line):
                                     job['salary'] = line
@@ -350,11 +378,7 @@ class JobScraper:
                             job['description'] = ' '.join(lines[3:6])
                     
                     # Get URL
-                    link = card.locator('a').first
-                    if link.count() > 0:
-                        href = link.get_attribute('href')
-                        if href:
-                            job['url'] = href if href.startswith('http') else f"https://cr.indeed.com{href}"
+                    job['url'] = self._absolute_url(card['href'], "https://cr.indeed.com")
                     
                     if job['title']:
                         self.jobs.append(job)
@@ -363,11 +387,15 @@ class JobScraper:
                     
                 except Exception as e:
                     logger.error(f"  [{idx}] Error: {e}")
+                    self.debug.fail(f"card {idx}: {e}")
             
             logger.info(f"✅ {site}: Scraped {count} jobs")
             
         except Exception as e:
             logger.error(f"❌ {site} failed: {e}")
+            self.debug.fail(e)
+        finally:
+            self.debug.finish(page, count)
     
     # ==================== JOOBLE.ORG ====================
     
@@ -377,6 +405,8 @@ class JobScraper:
         logger.info(f"SCRAPING: {site}")
         logger.info(f"{'='*70}")
         
+        self.debug.begin(site)
+        count = 0
         try:
             logger.info("Navigating to jooble.org...")
             page.goto("https://cr.jooble.org/", 
@@ -395,41 +425,35 @@ class JobScraper:
                 ['[data-test*="vacancy"]'],
             ]
             
-            cards = self._find_elements_debug(page, selector_sets)
+            cards = self._find_elements_debug(page, selector_sets, max_jobs, site)
             
             if not cards:
-                logger.error("❌ No job cards found - check screenshot")
+                logger.error("❌ No job cards found - see debug artifacts")
                 return
             
             logger.info(f"✅ Found {len(cards)} job cards")
             
-            count = 0
-            for idx, card in enumerate(cards[:max_jobs], 1):
+            for idx, card in enumerate(cards, 1):
                 try:
                     job = self._init_job(site)
                     
                     # Get all text
-                    card_text = card.inner_text()
-                    lines = [l.strip() for l in card_text.split('\n') if l.strip()]
+                    card_text = card['text']
+                    lines = self._card_lines(card_text)
                     
                     if len(lines) >= 1:
                         job['title'] = lines[0]
                         job['company'] = lines[1] if len(lines) > 1 else ''
                         
+                        self._set_location(job, lines)
+                        
                         # Parse other info
                         for line in lines:
-                            if 'Costa Rica' in line or any(city in line for city in ['San José', 'Heredia']):
-                                job['location'] = line
-                            
                             if '$' in line or '₡' in line:
                                 job['salary'] = line
                     
                     # Get URL
-                    link = card.locator('a').first
-                    if link.count() > 0:
-                        href = link.get_attribute('href')
-                        if href:
-                            job['url'] = href if href.startswith('http') else f"https://cr.jooble.org{href}"
+                    job['url'] = self._absolute_url(card['href'], "https://cr.jooble.org")
                     
                     if job['title']:
                         self.jobs.append(job)
@@ -438,14 +462,38 @@ class JobScraper:
                     
                 except Exception as e:
                     logger.error(f"  [{idx}] Error: {e}")
+                    self.debug.fail(f"card {idx}: {e}")
             
             logger.info(f"✅ {site}: Scraped {count} jobs")
             
         except Exception as e:
             logger.error(f"❌ {site} failed: {e}")
+            self.debug.fail(e)
+        finally:
+            self.debug.finish(page, count)
     
     # ==================== HELPER METHODS ====================
     
+    @staticmethod
+    def _card_lines(card_text):
+        """Split card text into stripped, non-empty lines"""
+        return [l.strip() for l in card_text.split('\n') if l.strip()]
+    
+    @staticmethod
+    def _absolute_url(href, base):
+        """Resolve a relative card link against the site root"""
+        if not href:
+            return ''
+        return href if href.startswith('http') else f"{base}{href}"
+    
+    def _set_location(self, job, lines):
+        """Normalized location and coordinates from the first card line naming a place"""
+        line, place = find_location(lines[2:])
+        if place is not None:
+            job['location'] = place.label
+            job['address'] = line
+            job['map_location'] = place.map_location
+    
     def _init_job(self, site):
         """Initialize job dictionary"""
         job = {field: '' for field in self.FIELDS}
@@ -465,7 +513,7 @@ class JobScraper:
             with open(filename, 'w', newline='', encoding='utf-8-sig') as f:
                 writer = csv.DictWriter(f, fieldnames=self.FIELDS)
                 writer.writeheader()
-                writer.writerows(self.jobs)
+                writer.writerows(as_dicts(self.jobs, self.FIELDS))
             
             logger.info(f"\n✅ Saved {len(self.jobs)} jobs to {filename}")
             return filename
@@ -515,7 +563,7 @@ def main():
     
     print("\n🚀 Starting Costa Rica Jobs Scraper...")
     print("💡 Browser will stay open - watch the scraping happen!")
-    print("📸 Screenshots saved for debugging")
+    print("🐞 Debug artifacts are saved only for sites that fail (SCRAPER_DEBUG=off/on-failure/always)")
     print("⏸️  Press Ctrl+C to stop early\n")
     
     jobs = scraper.scrape_all_sites(max_per_site=20)
@@ -531,11 +579,9 @@ def main():
         
         print(f"\n✅ Complete! Output: {filename}")
     else:
-        print("\n⚠️  No jobs scraped. Check the debug screenshots:")
-        print("  - debug_elempleo_com.png")
-        print("  - debug_computrabajo_com.png")
-        print("  - debug_indeed_com.png")
-        print("  - debug_jooble_org.png")
+        print("\n⚠️  No jobs scraped. Check the debug artifacts:")
+        for path in scraper.debug.saved:
+            print(f"  - {path}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,160 @@
+# countries.py
+# -----------------------------
+# The elempleo country sites and their URLs.
+#  - every site lives under www.elempleo.com/<code>/ with the same paths,
+#    so one Country gives the listing, detail, API and sitemap URLs
+#  - Costa Rica ("cr") is the default and keeps the original file names;
+#    other countries write to partitions named after their code
+#    (jobs_co.db, sitemap_state_co.json, html_archive_co)
+#  - RateLimiter spaces the requests sent to one site
+#
+# Usage:
+#   co = get_country("co")
+#   co.detail_url + job_id, co.api_url.format(job_id)
+#   parse_countries("cr,co")      # [Country("cr", ...), Country("co", ...)]
+#   country_from_url("https://www.elempleo.com/co/ofertas-trabajo/x/1784512")
+# -----------------------------
+
+import os
+import re
+import threading
+import time
+from collections import namedtuple
+
+# ---------------------------------------------------------------
+# CONFIG
+# ---------------------------------------------------------------
+SITE_ROOT = "https://www.elempleo.com"
+DEFAULT_COUNTRY = "cr"
+COUNTRY_NAMES = {
+    "cr": "Costa Rica",
+    "co": "Colombia",
+    "pa": "Panamá",
+}
+# Default requests per second sent to each country's site
+DEFAULT_RATE = 0.5
+
+COUNTRY_IN_URL_RE = re.compile(r"elempleo\.com/([a-z]{2})(?:[/?#]|$)")
+
+
+class Country(namedtuple("Country", "code name")):
+    __slots__ = ()
+
+    @property
+    def root(self):
+        return f"{SITE_ROOT}/{self.code}/"
+
+    @property
+    def listing_url(self):
+        return f"{self.root}ofertas-empleo/"
+
+    @property
+    def detail_url(self):
+        return f"{self.root}ofertas-trabajo/"
+
+    @property
+    def api_url(self):
+        return f"{self.root}api/joboffers/getjoboffer?jobOfferId={{}}"
+
+    @property
+    def sitemap_url(self):
+        return f"{self.root}sitemap.xml"
+
+    @property
+    def job_url_marker(self):
+        return f"/{self.code}/ofertas-trabajo/"
+
+    @property
+    def is_default(self):
+        return self.code == DEFAULT_COUNTRY
+
+
+COUNTRIES = {code: Country(code, name) for code, name in COUNTRY_NAMES.items()}
+
+
+def get_country(code=None):
+    """Country for a site code ("cr", "co", ...); None gives the default."""
+    if isinstance(code, Country):
+        return code
+    code = (code or DEFAULT_COUNTRY).strip().lower()
+    if code not in COUNTRIES:
+        raise ValueError(f"Unknown country {code!r}, expected one of {', '.join(COUNTRIES)}")
+    return COUNTRIES[code]
+
+
+def parse_countries(value):
+    """Countries from "cr,co" (or a list of codes or Country objects), without duplicates."""
+    codes = value.split(",") if isinstance(value, str) else list(value or [DEFAULT_COUNTRY])
+    countries = []
+    for code in codes:
+        if isinstance(code, Country) or code.strip():
+            country = get_country(code)
+            if country not in countries:
+                countries.append(country)
+    return countries or [get_country()]
+
+
+def country_from_url(url):
+    """Country whose site an offer URL belongs to (the default when it names none)."""
+    match = COUNTRY_IN_URL_RE.search(url or "")
+    return COUNTRIES.get(match.group(1), COUNTRIES[DEFAULT_COUNTRY]) if match else COUNTRIES[DEFAULT_COUNTRY]
+
+
+def partition(path, country):
+    """path for the default country, else path with _<code> before its extension."""
+    country = get_country(country)
+    if not path or country.is_default:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}_{country.code}{ext}"
+
+
+def split_ids(job_ids, countries):
+    """Group "co:1784512" lines by country; bare IDs go to the first country."""
+    countries = parse_countries(countries)
+    by_country = {country: [] for country in countries}
+    for job_id in job_ids:
+        code, sep, rest = job_id.partition(":")
+        if sep:
+            country = get_country(code)
+            by_country.setdefault(country, []).append(rest.strip())
+        else:
+            by_country[countries[0]].append(job_id)
+    return by_country
+
+
+def parse_rates(values, default=DEFAULT_RATE):
+    """Per-country requests/second from ["0.5", "co=0.2"]; returns (default, {code: rate})."""
+    rates = {}
+    for value in values or ():
+        code, sep, rate = value.partition("=")
+        if sep:
+            rates[get_country(code).code] = float(rate)
+        else:
+            default = float(code)
+    return default, rates
+
+
+# ---------------------------------------------------------------
+# Rate limiting
+# ---------------------------------------------------------------
+class RateLimiter:
+    """Keeps calls at least 1/per_second apart; safe to share between threads."""
+
+    def __init__(self, per_second=DEFAULT_RATE):
+        self.interval = 1.0 / per_second if per_second else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def delay(self):
+        """Seconds until the next call is allowed (0 when it may go now)."""
+        return max(0.0, self._next - time.monotonic())
+
+    def acquire(self):
+        """Wait for this call's slot."""
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if wait > 0:
+            time.sleep(wait)
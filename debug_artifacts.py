@@ -0,0 +1,161 @@
+"""
+Failure-triggered debug artifacts for the Playwright scrapers
+Keeps a ring buffer of recent page events (and optionally a Playwright trace)
+and only writes HTML, screenshots and traces to disk when a site yields no
+cards or an extraction fails.
+
+Levels:
+    off         record nothing
+    on-failure  persist artifacts only for failed sites (default)
+    always      persist artifacts for every site
+
+The level defaults to the SCRAPER_DEBUG environment variable. With
+trace=True (--trace on the CLI) each unit of work is also recorded as one
+Playwright trace chunk, written next to the other artifacts on failure.
+"""
+
+import json
+import os
+import re
+import shutil
+import time
+import logging
+from collections import deque
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+DEBUG_LEVELS = ('off', 'on-failure', 'always')
+
+# Runs inside the page: cheap structural counts, only computed on failure
+PAGE_STATS_JS = """
+() => ({
+    title: document.title,
+    divs: document.querySelectorAll('div').length,
+    articles: document.querySelectorAll('article').length,
+    links: document.querySelectorAll('a').length
+})
+"""
+
+
+class DebugRecorder:
+    """Collects debug context per site and persists it only when needed"""
+
+    def __init__(self, level=None, out_dir='debug_artifacts', ring_size=50,
+                 keep=20, trace=False):
+        level = level or os.environ.get('SCRAPER_DEBUG', 'on-failure')
+        if level not in DEBUG_LEVELS:
+            raise ValueError(f"Unknown debug level {level!r}, expected one of {DEBUG_LEVELS}")
+        self.level = level
+        self.out_dir = out_dir
+        self.keep = keep
+        self.trace = trace
+        self.events = deque(maxlen=ring_size)
+        self.saved = []
+        self._context = None
+        self._chunk_open = False
+        self._name = None
+        self._errors = []
+
+    @property
+    def enabled(self):
+        return self.level != 'off'
+
+    def attach(self, context):
+        """Start Playwright tracing on a context when trace capture is enabled"""
+        if not (self.enabled and self.trace):
+            return
+        # start() also opens a first chunk; begin() replaces it with a titled one
+        context.tracing.start(screenshots=True, snapshots=True)
+        self._context = context
+        self._chunk_open = True
+
+    def begin(self, name):
+        """Start a new unit of work (usually one site or listing)"""
+        self._name = name
+        self._errors = []
+        if self._context is not None:
+            # Only one chunk may be open: discard whatever the last unit left
+            if self._chunk_open:
+                self._context.tracing.stop_chunk()
+            self._context.tracing.start_chunk(title=name)
+            self._chunk_open = True
+        self.note('begin', name=name)
+
+    def note(self, event, **info):
+        """Remember a lightweight event in the ring buffer"""
+        if self.enabled:
+            self.events.append({'time': time.time(), 'event': event, **info})
+
+    def fail(self, reason):
+        """Mark the current unit as failed without touching the browser"""
+        if self.enabled:
+            self._errors.append(str(reason))
+            self.note('error', reason=str(reason))
+
+    def finish(self, page, found):
+        """Close the current unit; persist artifacts if it failed or level is always"""
+        if not self.enabled:
+            return None
+        if found == 0:
+            self.fail('no results')
+        failed = bool(self._errors)
+        if failed or self.level == 'always':
+            return self._persist(page, failed)
+        if self._chunk_open:
+            # Discard the chunk: the happy path never writes a trace
+            self._context.tracing.stop_chunk()
+            self._chunk_open = False
+        return None
+
+    def close(self):
+        """Stop tracing if it was started"""
+        if self._context is not None:
+            try:
+                self._context.tracing.stop()
+            except Exception as e:
+                logger.debug(f"Stopping trace failed: {e}")
+            self._context = None
+            self._chunk_open = False
+
+    def _persist(self, page, failed):
+        """Write HTML, a viewport screenshot, page stats, events and trace"""
+        slug = re.sub(r'[^\w.-]+', '_', self._name or 'page')
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        path = os.path.join(self.out_dir, f"{stamp}_{slug}")
+        os.makedirs(path, exist_ok=True)
+
+        meta = {'name': self._name, 'failed': failed, 'errors': self._errors}
+        try:
+            meta['url'] = page.url
+            meta.update(page.evaluate(PAGE_STATS_JS))
+            with open(os.path.join(path, 'page.html'), 'w', encoding='utf-8') as f:
+                f.write(page.content())
+            page.screenshot(path=os.path.join(path, 'screenshot.png'))
+        except Exception as e:
+            meta['capture_error'] = str(e)
+        if self._chunk_open:
+            try:
+                self._context.tracing.stop_chunk(path=os.path.join(path, 'trace.zip'))
+            except Exception as e:
+                meta['trace_error'] = str(e)
+            self._chunk_open = False
+
+        with open(os.path.join(path, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        with open(os.path.join(path, 'events.json'), 'w', encoding='utf-8') as f:
+            json.dump(list(self.events), f, ensure_ascii=False, indent=2)
+
+        self.saved.append(path)
+        logger.info(f"🐞 Debug artifacts saved: {path}")
+        self._prune()
+        return path
+
+    def _prune(self):
+        """Keep only the `keep` most recent artifact directories"""
+        entries = sorted(
+            os.path.join(self.out_dir, d) for d in os.listdir(self.out_dir)
+            if os.path.isdir(os.path.join(self.out_dir, d))
+        )
+        for old in entries[:-self.keep]:
+            shutil.rmtree(old, ignore_errors=True)
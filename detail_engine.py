@@ -0,0 +1,200 @@
+# detail_engine.py
+# -----------------------------
+# Long-crawl runner for detail pages.
+#  - recycles the page every N jobs and the whole context every M jobs
+#  - recycles early when browser + Python RSS passes a threshold
+#  - relaunches the browser after a crash and retries the job once
+#  - logs memory and per-job latency over time
+# Keeps per-job latency steady on 10k-job runs and small CI runners.
+# -----------------------------
+
+import os
+import time
+
+from browser_profile import BrowserSession
+
+# ---------------------------------------------------------------
+# CONFIG
+# ---------------------------------------------------------------
+RECYCLE_PAGE_EVERY = 50
+RECYCLE_CONTEXT_EVERY = 500
+MAX_RSS_MB = 1500
+# Browser + Python memory is checked every this many jobs
+RSS_CHECK_EVERY = 10
+MEMORY_LOG_EVERY = 100
+
+
+# ---------------------------------------------------------------
+# 1️⃣  Memory measurement
+# ---------------------------------------------------------------
+def _proc_rss_kb(pid):
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii", errors="ignore") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def _proc_children():
+    """Map parent pid -> child pids from /proc (Linux only)."""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", encoding="ascii", errors="ignore") as f:
+                # The command name may contain spaces; ppid follows the closing ')'
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    return children
+
+
+def process_tree_rss_mb(root_pid=None):
+    """RSS of this process plus all descendants (Playwright driver + browser)."""
+    root_pid = root_pid or os.getpid()
+    try:
+        import psutil
+        root = psutil.Process(root_pid)
+        procs = [root] + root.children(recursive=True)
+        return sum(p.memory_info().rss for p in procs if p.is_running()) / 1e6
+    except ImportError:
+        pass
+    if not os.path.isdir("/proc"):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    children = _proc_children()
+    total_kb = 0
+    stack = [root_pid]
+    while stack:
+        pid = stack.pop()
+        total_kb += _proc_rss_kb(pid)
+        stack.extend(children.get(pid, []))
+    return total_kb / 1024
+
+
+# ---------------------------------------------------------------
+# 2️⃣  Engine
+# ---------------------------------------------------------------
+class DetailEngine:
+    """Runs work(page) per job on a browser that is recycled and watched.
+
+    Usage:
+        with sync_playwright() as p, DetailEngine(p) as engine:
+            for job_id in job_ids:
+                job = engine.run(lambda page: get_job_details(page, url))
+    """
+
+    def __init__(self, playwright, recycle_page_every=RECYCLE_PAGE_EVERY,
+                 recycle_context_every=RECYCLE_CONTEXT_EVERY, max_rss_mb=MAX_RSS_MB,
+                 memory_log_every=MEMORY_LOG_EVERY, **session_kwargs):
+        self.playwright = playwright
+        self.recycle_page_every = recycle_page_every
+        self.recycle_context_every = recycle_context_every
+        self.max_rss_mb = max_rss_mb
+        self.memory_log_every = memory_log_every
+        self.session_kwargs = session_kwargs
+        self.session = None
+        self.page = None
+        self.crashed = False
+        self.jobs_done = 0
+        self.jobs_on_page = 0
+        self.jobs_on_context = 0
+        self.relaunches = 0
+        self.memory_log = []
+        self._window_latency = []
+
+    def __enter__(self):
+        self._launch()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # -- lifecycle ---------------------------------------------------------
+    def _launch(self):
+        # One session object across relaunches, so each new context gets its own HAR part
+        if self.session is None:
+            self.session = BrowserSession(self.playwright, **self.session_kwargs)
+        self.session.open()
+        self._new_page()
+        self.jobs_on_context = 0
+
+    def _new_page(self):
+        if self.page is not None and not self.page.is_closed():
+            self.page.close()
+        self.page = self.session.new_page()
+        self.crashed = False
+        self.page.on("crash", self._on_crash)
+        self.jobs_on_page = 0
+
+    def _on_crash(self, _page):
+        self.crashed = True
+
+    def _relaunch(self, reason):
+        print(f"♻️ Relaunching browser ({reason})")
+        try:
+            self.close()
+        except Exception as e:
+            print(f"⚠️ Error while closing crashed browser: {e}")
+        self.page = None
+        self._launch()
+        self.relaunches += 1
+
+    def close(self):
+        if self.session is not None:
+            self.session.close()
+        self.page = None
+
+    def _healthy(self):
+        return self.page is not None and not self.crashed and not self.page.is_closed()
+
+    # -- work ----------------------------------------------------------------
+    def run(self, work):
+        """Run work(page) for one job, recycling and relaunching as needed."""
+        self._maybe_recycle()
+        started = time.perf_counter()
+        try:
+            result = work(self.page)
+        except Exception as e:
+            result = None
+            self.crashed = self.crashed or "closed" in str(e).lower()
+            if not self.crashed:
+                raise
+        if not self._healthy():
+            # Renderer or browser died mid-job: start over and retry once
+            self._relaunch("page crashed")
+            result = work(self.page)
+
+        self._window_latency.append(time.perf_counter() - started)
+        self.jobs_done += 1
+        self.jobs_on_page += 1
+        self.jobs_on_context += 1
+        if self.memory_log_every and self.jobs_done % self.memory_log_every == 0:
+            self._log_memory()
+        return result
+
+    def _maybe_recycle(self):
+        if self.recycle_context_every and self.jobs_on_context >= self.recycle_context_every:
+            self._relaunch(f"{self.jobs_on_context} jobs on this context")
+            return
+        if self.recycle_page_every and self.jobs_on_page >= self.recycle_page_every:
+            self._new_page()
+        # Counted on all jobs, not per page: a page recycled every <= 10 jobs must not skip it
+        if self.max_rss_mb and self.jobs_done and self.jobs_done % RSS_CHECK_EVERY == 0:
+            rss = process_tree_rss_mb()
+            if rss > self.max_rss_mb:
+                self._relaunch(f"RSS {rss:.0f} MB > {self.max_rss_mb} MB")
+
+    def _log_memory(self):
+        rss = process_tree_rss_mb()
+        window = self._window_latency
+        avg = sum(window) / len(window) if window else 0
+        self.memory_log.append({"jobs": self.jobs_done, "rss_mb": round(rss, 1),
+                                "avg_job_s": round(avg, 3), "relaunches": self.relaunches})
+        self._window_latency = []
+        print(f"🧠 {self.jobs_done} jobs: RSS {rss:.0f} MB, {avg:.2f}s/job, {self.relaunches} relaunches")
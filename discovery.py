@@ -0,0 +1,313 @@
+# discovery.py
+# -----------------------------
+# Shared helpers for job ID discovery.
+#  - reads the IDs we already hold from the last snapshot CSV
+#  - decides when a newest-first walk has reached already-known jobs
+#  - streams job IDs and lastmod out of the site's sitemaps
+# -----------------------------
+
+import csv
+import glob
+import gzip
+import json
+import os
+import re
+import shutil
+import tempfile
+
+from countries import SITE_ROOT, get_country
+
+# ---------------------------------------------------------------
+# CONFIG
+# ---------------------------------------------------------------
+SNAPSHOT_GLOB = "elempleo_job_details_*.csv"
+# Listing query that orders offers by publish date, newest first
+NEWEST_FIRST_QUERY = "?ordenar=fecha-publicacion"
+# Columns that may carry the job ID or a URL ending in it
+ID_COLUMNS = ("id", "_job_id", "_job_apply_url", "url", "apply_url")
+
+SITEMAP_STATE_FILE = "sitemap_state.json"
+# Attempts to read one sitemap before its entries are given up
+SITEMAP_ATTEMPTS = 2
+# Downloaded sitemaps larger than this are spooled to disk, not kept in memory
+SITEMAP_SPOOL_BYTES = 4 * 1024 * 1024
+SITEMAP_NS = "{http://www.sitemaps.org/schemas/sitemap/0.9}"
+SITEMAP_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/119.0 Safari/537.36"
+    )
+}
+
+JOB_ID_RE = re.compile(r"/(\d+)/?(?:[?#].*)?$")
+
+
+# ---------------------------------------------------------------
+# 1️⃣  Known IDs
+# ---------------------------------------------------------------
+def job_id_from_url(url):
+    """Return the numeric job ID at the end of an offer URL ('' if none)."""
+    match = JOB_ID_RE.search(url or "")
+    return match.group(1) if match else ""
+
+
+def job_id_from_row(row):
+    """Job ID of a scraped row: an ID column or the ID in its offer URL ('' if none)."""
+    for column in ID_COLUMNS:
+        value = str(row.get(column) or "").strip()
+        job_id = value if value.isdigit() else job_id_from_url(value)
+        if job_id:
+            return job_id
+    return ""
+
+
+def snapshot_glob(country=None):
+    """Snapshot pattern of one country's detail runs ("elempleo_co_job_details_*.csv").
+
+    The default country keeps the original names.
+    """
+    country = get_country(country)
+    return SNAPSHOT_GLOB if country.is_default else SNAPSHOT_GLOB.replace("elempleo_", f"elempleo_{country.code}_", 1)
+
+
+def latest_snapshot(pattern=SNAPSHOT_GLOB):
+    """Path of the newest snapshot CSV, or None."""
+    paths = glob.glob(pattern)
+    return max(paths, key=os.path.getmtime) if paths else None
+
+
+def load_known_ids(path=None, country=None):
+    """Collect job IDs from a snapshot CSV (defaults to the country's latest one)."""
+    path = path or latest_snapshot(snapshot_glob(country))
+    known = set()
+    if not path or not os.path.exists(path):
+        return known
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        for row in csv.DictReader(f):
+            job_id = job_id_from_row(row)
+            if job_id:
+                known.add(job_id)
+    print(f"📚 Loaded {len(known)} known job IDs from {path}")
+    return known
+
+
+# ---------------------------------------------------------------
+# 2️⃣  Early stop
+# ---------------------------------------------------------------
+class KnownIdStop:
+    """Tracks a newest-first walk and reports when a batch is entirely known.
+
+    Feed it the IDs visible after each scroll or page; update() returns True
+    once the IDs that batch revealed are all in known_ids.
+    """
+
+    def __init__(self, known_ids=None):
+        self.known_ids = set(known_ids or ())
+        self.seen = set()
+
+    def update(self, ids):
+        batch = set(ids) - self.seen
+        self.seen |= batch
+        return bool(self.known_ids) and bool(batch) and batch <= self.known_ids
+
+    def new_ids(self):
+        """IDs seen during the walk that were not already known."""
+        return self.seen - self.known_ids
+
+
+# ---------------------------------------------------------------
+# 3️⃣  Sitemap discovery
+# ---------------------------------------------------------------
+class SitemapState:
+    """Remembers the lastmod of every job seen in the sitemaps.
+
+    New lastmods stay pending until the detail loop confirm()s that the job
+    was scraped; save() only persists confirmed ones, so a failed fetch does
+    not mark the job as scraped.
+
+    A discover-only run hands its pending lastmods to a later details run
+    through pending_path (save_pending() / load_pending()).
+    """
+
+    def __init__(self, path=SITEMAP_STATE_FILE):
+        self.path = path
+        root, ext = os.path.splitext(path)
+        self.pending_path = f"{root}.pending{ext}"
+        self.lastmod = {}
+        self.pending = {}
+        self.confirmed = {}
+        self._pending_loaded = False
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.lastmod = json.load(f)
+
+    def is_unchanged(self, job_id, lastmod):
+        return bool(lastmod) and self.lastmod.get(job_id) == lastmod
+
+    def mark(self, job_id, lastmod):
+        self.pending[job_id] = lastmod
+
+    def confirm(self, job_id):
+        """The job's detail page was scraped; keep its lastmod on the next save()."""
+        if job_id in self.pending:
+            self.confirmed[job_id] = self.pending.pop(job_id)
+
+    def save(self):
+        """Persist confirmed lastmods; unconfirmed jobs are yielded again next run."""
+        self.lastmod.update(self.confirmed)
+        if self._pending_loaded:
+            # Jobs a discover run listed but this run did not scrape stay handed over
+            if self.pending:
+                self.save_pending()
+            elif os.path.exists(self.pending_path):
+                os.remove(self.pending_path)
+        self.pending = {}
+        self.confirmed = {}
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(self.lastmod, f)
+
+    def save_pending(self):
+        """Write pending lastmods for the details run that will scrape these jobs."""
+        with open(self.pending_path, "w", encoding="utf-8") as f:
+            json.dump(self.pending, f)
+
+    def load_pending(self):
+        """Take over the lastmods a discover run left pending; False if there are none."""
+        if not os.path.exists(self.pending_path):
+            return False
+        with open(self.pending_path, encoding="utf-8") as f:
+            self.pending.update(json.load(f))
+        self._pending_loaded = True
+        return bool(self.pending)
+
+
+def sitemaps_from_robots(session, site_root=SITE_ROOT):
+    """Sitemap URLs declared in robots.txt (may be empty)."""
+    try:
+        r = session.get(f"{site_root}/robots.txt", timeout=15)
+        r.raise_for_status()
+    except Exception as e:
+        print(f"⚠️ Could not read robots.txt: {e}")
+        return []
+    return [
+        line.split(":", 1)[1].strip()
+        for line in r.text.splitlines()
+        if line.lower().startswith("sitemap:")
+    ]
+
+
+def _download_sitemap(session, url):
+    """One sitemap's body, read to the end into a spooled temporary file."""
+    r = session.get(url, timeout=60, stream=True)
+    try:
+        r.raise_for_status()
+        r.raw.decode_content = True
+        body = tempfile.SpooledTemporaryFile(max_size=SITEMAP_SPOOL_BYTES)
+        shutil.copyfileobj(r.raw, body)
+    finally:
+        r.close()
+    body.seek(0)
+    if url.endswith(".gz") or r.headers.get("Content-Type", "").endswith("gzip"):
+        return gzip.GzipFile(fileobj=body, mode="rb")
+    return body
+
+
+def _iter_sitemap_entries(session, url):
+    """Stream (tag, loc, lastmod) from one sitemap without building the tree."""
+    from lxml import etree
+
+    # Callers consume IDs slowly (one detail page at a time): download first
+    # so the response never sits idle mid-stream until the server drops it
+    stream = _download_sitemap(session, url)
+    tags = (f"{SITEMAP_NS}url", f"{SITEMAP_NS}sitemap")
+    try:
+        for _, elem in etree.iterparse(stream, events=("end",), tag=tags):
+            loc = (elem.findtext(f"{SITEMAP_NS}loc") or "").strip()
+            lastmod = (elem.findtext(f"{SITEMAP_NS}lastmod") or "").strip()
+            yield elem.tag[len(SITEMAP_NS):], loc, lastmod
+            # Drop parsed entries so memory stays flat on huge sitemaps
+            elem.clear()
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+    finally:
+        stream.close()
+
+
+def read_sitemap(session, url, attempts=SITEMAP_ATTEMPTS):
+    """Yield (tag, loc, lastmod) entries of one sitemap, retrying a failed read.
+
+    A retry downloads the sitemap again and skips the entries already
+    yielded, so nothing is held beyond the entry being parsed.
+    """
+    yielded = 0
+    for attempt in range(1, attempts + 1):
+        try:
+            for index, entry in enumerate(_iter_sitemap_entries(session, url)):
+                if index >= yielded:
+                    yielded += 1
+                    yield entry
+            return
+        except Exception as e:
+            if attempt == attempts:
+                raise
+            print(f"⚠️ Retrying sitemap {url} after {yielded} entries: {e}")
+
+
+def iter_sitemap_jobs(session=None, roots=None, country=None):
+    """Yield (job_id, url, lastmod) for every job offer of one country in the sitemaps.
+
+    Sitemap indexes are followed depth-first; child sitemaps that do not
+    mention job offers are still scanned since their names vary by site.
+    robots.txt is shared by every country site: its sitemaps under
+    /<code>/ are preferred, and offers are kept by their URL path.
+    """
+    import requests
+
+    country = get_country(country)
+    session = session or requests.Session()
+    session.headers.update(SITEMAP_HEADERS)
+    if not roots:
+        declared = sitemaps_from_robots(session)
+        roots = [url for url in declared if f"/{country.code}/" in url] or declared or [country.sitemap_url]
+    queue = list(roots)
+    visited = set()
+    seen_ids = set()
+    while queue:
+        sitemap_url = queue.pop()
+        if sitemap_url in visited:
+            continue
+        visited.add(sitemap_url)
+        print(f"🗺️ Reading sitemap {sitemap_url}")
+        try:
+            for tag, loc, lastmod in read_sitemap(session, sitemap_url):
+                if tag == "sitemap":
+                    queue.append(loc)
+                    continue
+                if country.job_url_marker not in loc:
+                    continue
+                job_id = job_id_from_url(loc)
+                if job_id and job_id not in seen_ids:
+                    seen_ids.add(job_id)
+                    yield job_id, loc, lastmod
+        except Exception as e:
+            print(f"❌ Error reading sitemap {sitemap_url}: {e}")
+
+
+def sitemap_job_ids(state=None, known_ids=None, session=None, roots=None, country=None):
+    """Yield job IDs that are new or whose lastmod changed since the last run.
+
+    Jobs without a lastmod are yielded unless they are in known_ids.
+    """
+    skipped = 0
+    for job_id, _, lastmod in iter_sitemap_jobs(session, roots, country):
+        if state is not None and state.is_unchanged(job_id, lastmod):
+            skipped += 1
+            continue
+        if not lastmod and known_ids and job_id in known_ids:
+            skipped += 1
+            continue
+        if state is not None:
+            state.mark(job_id, lastmod)
+        yield job_id
+    print(f"⏭️ Skipped {skipped} unchanged jobs from the sitemaps")
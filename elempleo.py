@@ -0,0 +1,632 @@
+# elempleo.py
+# -----------------------------
+# Single entry point for every scraper stage.
+#
+# Heavy dependencies (Playwright, BeautifulSoup, requests, lxml) are only
+# imported by the stage that runs, so small tasks start quickly.
+#
+# Usage:
+#   python elempleo.py discover --source sitemap --out ids.txt
+#   python elempleo.py details --ids ids.txt
+#   python elempleo.py details --country cr,co --source sitemap   # countries crawled together
+#   python elempleo.py api --ids ids.txt
+#   python elempleo.py combined --max-per-site 20
+#   python elempleo.py quickview --mode direct --max-jobs 50
+#   python elempleo.py export elempleo_job_details_*.csv
+#   python elempleo.py analyze --unique            # stats over all snapshots
+#   python elempleo.py classify elempleo_job_details_*.csv [--bench]
+#   python elempleo.py reextract --out fixed.csv   # re-run extraction on archived HTML
+#   python elempleo.py jobs import elempleo_job_details_*.csv
+#   python elempleo.py jobs where location="San José" since=2025-10-01
+#   python elempleo.py jobs search ingeniero electrico location=Heredia
+#   python elempleo.py wp sync elempleo_job_details_*.csv --url https://example.org
+#   python elempleo.py watch --db jobs.db --interval 600   # poll for new jobs until stopped
+#   python elempleo.py startup          # cold-start time per subcommand
+# -----------------------------
+
+import argparse
+import contextlib
+import csv
+import json
+import os
+import subprocess
+import sys
+import time
+
+# Modules each subcommand needs; loaded lazily and by `--import-only`
+STAGE_MODULES = {
+    "discover": ["discovery"],
+    "details": ["elempleo_detail_scraper"],
+    "api": ["scrape"],
+    "combined": ["combined_scraper"],
+    "quickview": ["elempleo_scraper"],
+    "export": ["normalize"],
+    "analyze": ["analytics"],
+    "classify": ["classify"],
+    "reextract": ["html_archive", "elempleo_detail_scraper"],
+    "jobs": ["job_store"],
+    "wp": ["wp_sync"],
+    "watch": ["watch"],
+}
+
+
+def read_ids(path):
+    """Read one job ID per line ('-' reads stdin)."""
+    stream = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        return [line.strip() for line in stream if line.strip()]
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def selected_countries(args, several=True):
+    """Countries named by --country; exits on an unknown code or an unsupported list."""
+    from countries import parse_countries
+
+    try:
+        countries = parse_countries(args.country)
+    except ValueError as e:
+        sys.exit(str(e))
+    if len(countries) > 1 and not several:
+        sys.exit(f"{args.command} handles one country per run; got {args.country!r}")
+    return countries
+
+
+def write_ids(job_ids, path):
+    """Write IDs one per line to path, or stdout when path is None/'-'."""
+    if not path or path == "-":
+        for job_id in job_ids:
+            print(job_id)
+        return
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for job_id in job_ids:
+            f.write(f"{job_id}\n")
+            count += 1
+    print(f"💾 Wrote {count} job IDs to {path}", file=sys.stderr)
+
+
+# ---------------------------------------------------------------
+# Subcommands
+# ---------------------------------------------------------------
+def cmd_discover(args):
+    from countries import partition
+    from discovery import SITEMAP_STATE_FILE, SitemapState, load_known_ids, sitemap_job_ids
+
+    [country] = selected_countries(args, several=False)
+    known_ids = load_known_ids(args.known_ids, country) if args.incremental else set()
+    if args.source == "sitemap":
+        # Lastmods are only saved by the details run that fetches these jobs;
+        # until then they wait in the pending file
+        state = SitemapState(partition(SITEMAP_STATE_FILE, country))
+        write_ids(sitemap_job_ids(state, known_ids, country=country), args.out)
+        state.save_pending()
+        return
+    if args.source == "pages":
+        from all_scraper import get_job_ids_with_playwright_auto
+        job_ids = get_job_ids_with_playwright_auto(max_pages=args.max_pages, known_ids=known_ids, country=country)
+    else:
+        from elempleo_detail_scraper import get_job_ids_with_playwright
+        job_ids = get_job_ids_with_playwright(max_scrolls=args.max_scrolls, known_ids=known_ids,
+                                              profile=args.profile, asset_cache=args.asset_cache,
+                                              record_har=args.record_har, replay_har=args.replay_har,
+                                              country=country)
+    write_ids([job_id for job_id in job_ids if job_id not in known_ids], args.out)
+
+
+def store_results(args, rows, source_site=None, country=None):
+    """Upsert a run's rows into the job store (the country's partition) when --db was given."""
+    if args.db and rows:
+        from countries import partition
+        from job_store import save_to_store
+        save_to_store(rows, partition(args.db, country), source_site=source_site)
+
+
+def open_events(args, countries=(None,)):
+    """EventSink for --events targets (None without any); known IDs come from --db or the last snapshot."""
+    if not args.events:
+        return None
+    from countries import partition
+    from discovery import load_known_ids
+    from event_sink import open_sink
+
+    known_ids = set()
+    for country in countries:
+        db = partition(args.db, country)
+        if db and os.path.exists(db):
+            from job_store import JobStore
+            with JobStore(db) as store:
+                known_ids |= store.ids()
+        else:
+            known_ids |= load_known_ids(country=country)
+    return open_sink(args.events, known_ids=known_ids)
+
+
+def run_with_events(events, run):
+    """Call run(); progress output goes to stderr while events use stdout."""
+    if events is None:
+        return run()
+    try:
+        if events.uses_stdout:
+            with contextlib.redirect_stdout(sys.stderr):
+                return run()
+        return run()
+    finally:
+        print(events.report(), file=sys.stderr)
+        events.close()
+
+
+def cmd_details(args):
+    import elempleo_detail_scraper
+    from countries import partition
+
+    countries = selected_countries(args)
+    events = open_events(args, countries)
+    if len(countries) > 1:
+        cmd_details_countries(args, countries, events)
+        return
+    [country] = countries
+    if not args.ids:
+        def crawl():
+            results = elempleo_detail_scraper.main(
+                incremental=args.incremental, discovery=args.source, profile=args.profile,
+                asset_cache=args.asset_cache, events=events, country=country,
+                compact=args.compact, recycle_every=args.recycle_every, max_rss_mb=args.max_rss_mb,
+                parse_workers=args.parse_workers, record_har=args.record_har, replay_har=args.replay_har,
+                archive_dir=None if args.no_archive else args.archive, filename=args.out)
+            store_results(args, results, source_site="elempleo", country=country)
+
+        run_with_events(events, crawl)
+        return
+    from discovery import SITEMAP_STATE_FILE, SitemapState
+
+    job_ids = read_ids(args.ids)
+    # IDs from 'discover --source sitemap': confirm their lastmods as they are scraped
+    sitemap_state = SitemapState(partition(SITEMAP_STATE_FILE, country))
+    if not sitemap_state.load_pending():
+        sitemap_state = None
+
+    def run():
+        results = elempleo_detail_scraper.scrape_job_details(
+            job_ids, len(job_ids), profile=args.profile, asset_cache=args.asset_cache,
+            record_har=args.record_har, replay_har=args.replay_har,
+            compact=args.compact, recycle_every=args.recycle_every, max_rss_mb=args.max_rss_mb,
+            parse_workers=args.parse_workers,
+            archive_dir=None if args.no_archive else partition(args.archive, country),
+            events=events, country=country, sitemap_state=sitemap_state)
+        if results:
+            elempleo_detail_scraper.save_to_csv(results, args.out, country)
+            store_results(args, results, source_site="elempleo", country=country)
+        if sitemap_state is not None:
+            sitemap_state.save()
+
+    run_with_events(events, run)
+
+
+def cmd_details_countries(args, countries, events):
+    """details for several countries at once: one browser, one CSV per country."""
+    from countries import parse_rates, split_ids
+    from multi_country import MultiCountryCrawl
+
+    if args.out:
+        sys.exit("--out names one snapshot; with several countries each gets its own")
+    default_rate, rates = parse_rates(args.rate)
+    crawl = MultiCountryCrawl(countries, discovery=args.source, rates=rates, default_rate=default_rate,
+                              incremental=args.incremental, profile=args.profile, asset_cache=args.asset_cache,
+                              parse_workers=args.parse_workers, archive_dir=None if args.no_archive else args.archive,
+                              recycle_every=args.recycle_every, max_rss_mb=args.max_rss_mb,
+                              compact=args.compact, record_har=args.record_har, replay_har=args.replay_har,
+                              events=events)
+    job_ids = split_ids(read_ids(args.ids), countries) if args.ids else None
+
+    def run():
+        crawl.run(job_ids)
+        crawl.save(args.db)
+
+    run_with_events(events, run)
+
+
+def cmd_api(args):
+    import scrape
+    from har_replay import mount_har
+
+    countries = selected_countries(args)
+    adapter = mount_har(scrape.SESSION, args.record_har, args.replay_har)
+    delay = 0 if args.replay_har else args.delay
+    if len(countries) > 1:
+        from countries import parse_rates, split_ids
+        from multi_country import fetch_api
+
+        default_rate, rates = parse_rates(args.rate, default=1 / delay if delay else 0)
+        ids_by_country = split_ids(read_ids(args.ids), countries) if args.ids else None
+        jobs_by_country = fetch_api(ids_by_country, rates, default_rate, countries)
+    else:
+        [country] = countries
+        if args.ids:
+            job_ids = read_ids(args.ids)
+            total = len(job_ids)
+        else:
+            from pipeline import IdStream
+
+            # API calls start as soon as the first scroll reveals IDs
+            job_ids = IdStream(lambda: scrape.iter_job_ids_with_playwright(country=country))
+            total = "?"
+        jobs = []
+        for idx, job_id in enumerate(job_ids, 1):
+            job = scrape.get_job_details(job_id, country)
+            if job:
+                jobs.append(job)
+                print(f"[{idx}/{total}] ✓ {(job['title'] or '')[:60]}")
+            time.sleep(delay)
+        if not args.ids:
+            print(job_ids.report())
+        jobs_by_country = {country: jobs}
+    if adapter is not None:
+        adapter.close()
+    for country, jobs in jobs_by_country.items():
+        scrape.save_to_csv(jobs, country)
+        store_results(args, jobs, source_site="elempleo", country=country)
+
+
+def cmd_combined(args):
+    from combined_scraper import JobScraper
+
+    scraper = JobScraper(debug_level=args.debug, record_har=args.record_har, replay_har=args.replay_har,
+                         trace=args.trace)
+    if scraper.scrape_all_sites(max_per_site=args.max_per_site):
+        if args.out:
+            scraper.save_to_csv(args.out)
+        else:
+            scraper.save_to_csv()
+        store_results(args, scraper.jobs)
+        scraper.print_summary()
+
+
+def cmd_quickview(args):
+    from elempleo_scraper import ElempleoQuickViewScraper
+
+    scraper = ElempleoQuickViewScraper(screenshot_every=args.screenshot_every, debug_level=args.debug,
+                                       record_har=args.record_har, replay_har=args.replay_har, trace=args.trace)
+    if scraper.scrape(max_jobs=args.max_jobs, mode=args.mode, tabs=args.tabs):
+        if args.out:
+            scraper.save_to_csv(args.out)
+        else:
+            scraper.save_to_csv()
+        store_results(args, scraper.jobs, source_site="elempleo")
+        scraper.print_summary()
+
+
+def cmd_export(args):
+    from normalize import normalize_snapshot
+
+    for path in args.snapshots:
+        out_path, count = normalize_snapshot(path)
+        print(f"✅ Exported {count} normalized rows from {path} -> {out_path}")
+
+
+def cmd_analyze(args):
+    from analytics import analyze, format_report
+
+    started = time.perf_counter()
+    result = analyze(args.snapshots, unique=args.unique, workers=args.workers).to_dict(top=args.top)
+    if args.json:
+        json.dump(result, sys.stdout, ensure_ascii=False, indent=1)
+        print()
+    else:
+        print(format_report(result))
+    print(f"\n⏱️ {time.perf_counter() - started:.2f}s", file=sys.stderr)
+
+
+def cmd_classify(args):
+    from classify import classify_snapshot, print_benchmark
+
+    if args.bench:
+        print_benchmark(args.snapshots)
+        return
+    for path in args.snapshots:
+        out_path, count = classify_snapshot(path)
+        print(f"✅ Classified {count} rows from {path} -> {out_path}")
+
+
+def cmd_reextract(args):
+    from elempleo_detail_scraper import save_to_csv
+    from html_archive import HtmlArchive, reextract
+
+    with HtmlArchive(args.archive) as archive:
+        started = time.perf_counter()
+        rows = reextract(archive, latest_only=not args.all_versions, since=args.since, workers=args.workers)
+    if not rows:
+        print(f"⚠️ No archived pages in {args.archive}")
+        return
+    print(f"♻️ Re-extracted {len(rows)} pages in {time.perf_counter() - started:.1f}s")
+    save_to_csv(rows, args.out)
+    store_results(args, rows, source_site="elempleo")
+
+
+def cmd_jobs(args):
+    import sqlite3
+
+    from job_store import LIST_COLUMNS, SEARCH_COLUMNS, JobStore, parse_terms
+
+    with JobStore(args.db) as store:
+        if args.action == "import":
+            for path in args.terms:
+                inserted, updated = store.import_csv(path, source_site=args.source_site)
+                print(f"🗄️ {path}: {inserted} new, {updated} updated")
+            print(f"✅ {store.count()} jobs stored in {args.db}")
+            return
+        if args.action == "stats":
+            for key, value in store.stats().items():
+                print(f"{key:11s} {value}")
+            return
+        started = time.perf_counter()
+        try:
+            if args.action == "search":
+                words = [term for term in args.terms if "=" not in term]
+                filters = parse_terms(term for term in args.terms if "=" in term)
+                rows = store.search(" ".join(words), limit=args.limit or 20, **filters)
+                fieldnames = list(SEARCH_COLUMNS) + ["score", "snippet"]
+            else:
+                rows = store.query(limit=args.limit, **parse_terms(args.terms))
+                fieldnames = LIST_COLUMNS
+        except (ValueError, TypeError, sqlite3.OperationalError) as e:
+            sys.exit(f"❌ {e}")
+        elapsed = (time.perf_counter() - started) * 1000
+        writer = csv.DictWriter(sys.stdout, fieldnames=fieldnames, delimiter="\t")
+        writer.writeheader()
+        writer.writerows(rows)
+        print(f"{len(rows)} jobs in {elapsed:.1f} ms", file=sys.stderr)
+
+
+def cmd_wp(args):
+    from wp_sync import StandInWordPress, WordPressSync, WpSyncState
+
+    if args.action == "stand-in":
+        server = StandInWordPress(args.port)
+        print(f"🧪 Stand-in WordPress on http://127.0.0.1:{args.port} (Ctrl+C to stop)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print(f"\n{server.requests_seen} HTTP requests, {len(server.posts)} posts")
+        return
+    if not args.url:
+        sys.exit("--url (or WP_URL) is required for sync")
+    rows = []
+    for path in args.snapshots:
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            rows.extend(csv.DictReader(f))
+    sync = WordPressSync(args.url, state=WpSyncState(args.state), batch_size=args.batch_size, workers=args.workers)
+    started = time.perf_counter()
+    counts = sync.sync(rows, close_missing=args.close_missing, dry_run=args.dry_run)
+    elapsed = time.perf_counter() - started
+    print(f"{'🔎 Would send' if args.dry_run else '✅ Synced'}: {counts['created']} created, "
+          f"{counts['updated']} updated, {counts['closed']} closed, {counts['failed']} failed "
+          f"in {counts['batches']} batch requests ({elapsed:.1f}s)")
+
+
+def cmd_watch(args):
+    from countries import partition
+    from watch import Watcher
+
+    [country] = selected_countries(args, several=False)
+    events = open_events(args, [country])
+    watcher = Watcher(store_path=partition(args.db, country), country=country, interval=args.interval, jitter=args.jitter,
+                      discovery=args.discovery, max_scrolls=args.max_scrolls,
+                      refresh_per_cycle=args.refresh, refresh_after_hours=args.refresh_after,
+                      profile=args.profile, asset_cache=not args.no_asset_cache,
+                      parse_workers=args.parse_workers,
+                      archive_dir=None if args.no_archive else partition(args.archive, country),
+                      metrics_path=partition(args.metrics, country), metrics_port=args.metrics_port, events=events)
+    run_with_events(events, lambda: watcher.run(max_cycles=args.cycles))
+
+
+def cmd_startup(args):
+    """Time a fresh interpreter loading each subcommand's dependencies."""
+    print(f"{'subcommand':12s} {'cold start':>12s}")
+    for name in STAGE_MODULES:
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            result = subprocess.run(
+                [sys.executable, __file__, "--import-only", name],
+                capture_output=True, text=True,
+            )
+            timings.append((time.perf_counter() - started) * 1000)
+        status = f"{min(timings):9.0f} ms" if result.returncode == 0 else "  import failed"
+        print(f"{name:12s} {status:>12s}")
+        if result.returncode != 0 and args.verbose:
+            print(result.stderr.strip().splitlines()[-1])
+
+
+# ---------------------------------------------------------------
+# Argument parsing
+# ---------------------------------------------------------------
+def add_har_args(p):
+    p.add_argument("--record-har", metavar="PATH", help="record this run's traffic to a .har/.zip file")
+    p.add_argument("--replay-har", metavar="PATH", help="serve all traffic from a recorded HAR (offline)")
+
+
+def add_browser_args(p):
+    p.add_argument("--profile", choices=["fresh", "storage", "persistent"], default="fresh",
+                   help="reuse cookies/consent (storage) or the whole browser profile (persistent)")
+    p.add_argument("--asset-cache", action="store_true", help="serve JS/CSS/fonts/images from a local disk cache")
+    add_har_args(p)
+
+
+def add_country_arg(p, several=False):
+    if several:
+        p.add_argument("--country", default="cr",
+                       help="elempleo country sites, e.g. cr,co,pa (crawled together in one run)")
+        p.add_argument("--rate", action="append", metavar="[CC=]PER_S",
+                       help="requests per second per country site (details: 0.5, api: 1/--delay); CC=RATE sets one country")
+    else:
+        p.add_argument("--country", default="cr", help="elempleo country site (cr, co, pa)")
+
+
+def add_events_arg(p):
+    p.add_argument("--events", action="append", metavar="TARGET",
+                   help="stream each job as NDJSON to '-' (stdout), unix:PATH or a file (repeatable)")
+
+
+def add_store_arg(p):
+    p.add_argument("--db", metavar="PATH", help="also upsert the results into this SQLite job store")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="elempleo", description="Elempleo scraper stages")
+    parser.add_argument("--import-only", metavar="SUBCOMMAND", choices=sorted(STAGE_MODULES),
+                        help=argparse.SUPPRESS)
+    sub = parser.add_subparsers(dest="command")
+
+    p = sub.add_parser("discover", help="collect job IDs")
+    p.add_argument("--source", choices=["scroll", "pages", "sitemap"], default="scroll")
+    p.add_argument("--incremental", action="store_true", help="skip IDs from the last snapshot")
+    p.add_argument("--known-ids", help="snapshot CSV with known IDs (default: latest)")
+    p.add_argument("--max-scrolls", type=int, default=15)
+    p.add_argument("--max-pages", type=int, default=100)
+    p.add_argument("--out", help="write IDs here instead of stdout")
+    add_browser_args(p)
+    add_country_arg(p)
+    p.set_defaults(func=cmd_discover)
+
+    p = sub.add_parser("details", help="scrape detail pages into a snapshot CSV")
+    p.add_argument("--ids", help="file with one job ID per line ('-' for stdin)")
+    p.add_argument("--source", choices=["scroll", "sitemap"], default="scroll",
+                   help="discovery source when --ids is not given")
+    p.add_argument("--incremental", action="store_true")
+    p.add_argument("--compact", action="store_true", help="hold results as JobRecords (large runs)")
+    p.add_argument("--recycle-every", type=int, default=50, help="open a fresh page every N jobs (0 = never)")
+    p.add_argument("--max-rss-mb", type=int, default=1500,
+                   help="relaunch the browser when browser + Python memory passes this (0 = no limit)")
+    p.add_argument("--parse-workers", type=int, help="HTML parsing processes (default: CPUs - 1, 0 = inline)")
+    p.add_argument("--archive", default="html_archive", help="keep raw detail HTML here for reextract")
+    p.add_argument("--no-archive", action="store_true", help="do not archive fetched pages")
+    p.add_argument("--out", help="output CSV name")
+    add_browser_args(p)
+    add_store_arg(p)
+    add_events_arg(p)
+    add_country_arg(p, several=True)
+    p.set_defaults(func=cmd_details)
+
+    p = sub.add_parser("api", help="fetch job data from the JSON API")
+    p.add_argument("--ids", help="file with one job ID per line ('-' for stdin)")
+    p.add_argument("--delay", type=float, default=0.3)
+    add_har_args(p)
+    add_store_arg(p)
+    add_country_arg(p, several=True)
+    p.set_defaults(func=cmd_api)
+
+    p = sub.add_parser("combined", help="scrape the four Costa Rica job sites")
+    p.add_argument("--max-per-site", type=int, default=20)
+    p.add_argument("--debug", choices=["off", "on-failure", "always"])
+    p.add_argument("--trace", action="store_true", help="also save a Playwright trace with debug artifacts")
+    p.add_argument("--out", help="output CSV name")
+    add_har_args(p)
+    add_store_arg(p)
+    p.set_defaults(func=cmd_combined)
+
+    p = sub.add_parser("quickview", help="scrape Elempleo Quick View data")
+    p.add_argument("--mode", choices=["network", "direct", "click"], default="network")
+    p.add_argument("--max-jobs", type=int, default=20)
+    p.add_argument("--tabs", type=int, default=4)
+    p.add_argument("--screenshot-every", type=int, default=0)
+    p.add_argument("--debug", choices=["off", "on-failure", "always"])
+    p.add_argument("--trace", action="store_true", help="also save a Playwright trace with debug artifacts")
+    p.add_argument("--out", help="output CSV name")
+    add_har_args(p)
+    add_store_arg(p)
+    p.set_defaults(func=cmd_quickview)
+
+    p = sub.add_parser("export", help="write normalized copies of snapshot CSVs")
+    p.add_argument("snapshots", nargs="+")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("analyze", help="coverage, top values and salaries across snapshots")
+    p.add_argument("snapshots", nargs="*", help="snapshot CSVs (default: all detail snapshots)")
+    p.add_argument("--unique", action="store_true", help="count each job once across snapshots")
+    p.add_argument("--top", type=int, default=10)
+    p.add_argument("--workers", type=int, help="parallel files (default: all cores, 0 = serial)")
+    p.add_argument("--json", action="store_true")
+    p.set_defaults(func=cmd_analyze)
+
+    p = sub.add_parser("classify", help="add contract/modality/seniority/area columns to snapshots")
+    p.add_argument("snapshots", nargs="+")
+    p.add_argument("--bench", action="store_true", help="measure throughput as keywords are added")
+    p.set_defaults(func=cmd_classify)
+
+    p = sub.add_parser("reextract", help="re-run detail extraction over the HTML archive (offline)")
+    p.add_argument("--archive", default="html_archive")
+    p.add_argument("--all-versions", action="store_true", help="every archived fetch, not just the newest per job")
+    p.add_argument("--since", help="only pages fetched at or after this ISO date")
+    p.add_argument("--workers", type=int, help="processes (default: all cores)")
+    p.add_argument("--out", help="output CSV name")
+    add_store_arg(p)
+    p.set_defaults(func=cmd_reextract)
+
+    p = sub.add_parser("jobs", help="query or fill the SQLite job store")
+    p.add_argument("action", choices=["where", "search", "import", "stats"])
+    p.add_argument("terms", nargs="*",
+                   help="where: key=value filters (location, category, company, source_site, type, "
+                        "since, until, seen_since); search: words plus optional key=value filters; "
+                        "import: snapshot CSVs")
+    p.add_argument("--db", default="jobs.db")
+    p.add_argument("--limit", type=int)
+    p.add_argument("--source-site", default="elempleo", help="site recorded for imported rows")
+    p.set_defaults(func=cmd_jobs)
+
+    p = sub.add_parser("wp", help="sync snapshots to a WordPress job board")
+    p.add_argument("action", choices=["sync", "stand-in"])
+    p.add_argument("snapshots", nargs="*", help="snapshot CSVs to sync")
+    p.add_argument("--url", default=os.environ.get("WP_URL"), help="WordPress site URL (or WP_URL)")
+    p.add_argument("--state", default="wp_sync_state.json", help="job ID -> post ID mapping")
+    p.add_argument("--close-missing", action="store_true",
+                   help="snapshots are the full listing: close synced jobs not in them")
+    p.add_argument("--batch-size", type=int, default=25)
+    p.add_argument("--workers", type=int, default=4)
+    p.add_argument("--dry-run", action="store_true", help="only report what would be sent")
+    p.add_argument("--port", type=int, default=8089, help="stand-in server port")
+    p.set_defaults(func=cmd_wp)
+
+    p = sub.add_parser("watch", help="poll for new jobs and refresh stale ones until stopped")
+    p.add_argument("--db", default="jobs.db")
+    p.add_argument("--interval", type=float, default=600, help="seconds between cycles")
+    p.add_argument("--jitter", type=float, default=0.2, help="random +/- fraction of the interval")
+    p.add_argument("--discovery", choices=["listing", "sitemap"], default="listing")
+    p.add_argument("--max-scrolls", type=int, default=3, help="listing scrolls per poll")
+    p.add_argument("--refresh", type=int, default=20, help="stored jobs re-fetched per cycle")
+    p.add_argument("--refresh-after", type=float, default=24, help="hours before a job is due for refresh")
+    p.add_argument("--cycles", type=int, help="stop after N cycles (default: run until stopped)")
+    p.add_argument("--profile", choices=["fresh", "storage", "persistent"], default="storage")
+    p.add_argument("--no-asset-cache", action="store_true")
+    p.add_argument("--parse-workers", type=int, help="HTML parsing processes (default: CPUs - 1, 0 = inline)")
+    p.add_argument("--archive", default="html_archive")
+    p.add_argument("--no-archive", action="store_true")
+    p.add_argument("--metrics", default="watch_metrics.json", help="last-cycle metrics file")
+    p.add_argument("--metrics-port", type=int, help="also serve metrics at http://127.0.0.1:PORT/metrics")
+    add_events_arg(p)
+    add_country_arg(p)
+    p.set_defaults(func=cmd_watch)
+
+    p = sub.add_parser("startup", help="measure cold-start time of each subcommand")
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--verbose", action="store_true")
+    p.set_defaults(func=cmd_startup)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.import_only:
+        for module in STAGE_MODULES[args.import_only]:
+            __import__(module)
+        return
+    if not args.command:
+        parser.print_help()
+        return
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,13 +9,29 @@ import re
 from datetime import datetime
 from bs4 import BeautifulSoup
 from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeout
-from datetime import datetime, timedelta
+from collections import deque
+
+from browser_profile import BrowserSession
+from classify import classify, job_type
+from countries import country_from_url, get_country, partition
+from detail_engine import DetailEngine, MAX_RSS_MB, RECYCLE_PAGE_EVERY
+from discovery import (KnownIdStop, NEWEST_FIRST_QUERY, SITEMAP_STATE_FILE, SitemapState, load_known_ids,
+                       sitemap_job_ids, snapshot_glob)
+from gazetteer import GAZETTEER_COUNTRY, locate
+from har_replay import har_part_path, mount_har
+from html_archive import ARCHIVE_DIR, HtmlArchive
+from job_record import JobRecord, as_dicts
+from parse_pool import ParsePool
+from pipeline import IdStream
+from normalize import parse_salary, parse_date, format_amount, add_days
 
 # ---------------------------------------------------------------
 # CONFIG
 # ---------------------------------------------------------------
-BASE_URL = "https://www.elempleo.com/cr/ofertas-empleo/"
-DETAIL_BASE_URL = "https://www.elempleo.com/cr/ofertas-trabajo/"
+# Default country; pass country= for the other elempleo sites (see countries.py)
+BASE_URL = get_country().listing_url
+DETAIL_BASE_URL = get_country().detail_url
+PUBLISH_DATE_SELECTOR = "[class*='js-publish-date'], [class*='publicado'], time"
 HEADERS = [
     "_job_featured_image","_job_title", "_job_featured", "_job_filled", "_job_urgent", "_job_description",
     "_job_category", "_job_type", "_job_tag", "_job_expiry_date", "_job_gender",
@@ -28,42 +44,83 @@ HEADERS = [
 # ---------------------------------------------------------------
 # 1️⃣  Function to automatically collect job IDs
 # ---------------------------------------------------------------
-def get_job_ids_with_playwright(max_scrolls=15, scroll_delay=1.5):
-    """Scroll through Elempleo listings and extract all job IDs."""
+def get_job_ids_with_playwright(max_scrolls=15, scroll_delay=1.5, known_ids=None,
+                                profile="fresh", asset_cache=False, record_har=None, replay_har=None,
+                                country=None):
+    """Scroll through one country's Elempleo listings and extract all job IDs.
+
+    With known_ids the listing is sorted newest first and scrolling stops as
+    soon as a scroll reveals only IDs we already hold. profile/asset_cache
+    select the browser state reused between runs and record_har/replay_har
+    capture or replay the traffic (see browser_profile.py).
+    """
+    return list(iter_job_ids_with_playwright(max_scrolls, scroll_delay, known_ids, profile,
+                                             asset_cache, record_har, replay_har, country))
+
+
+def iter_job_ids_with_playwright(max_scrolls=15, scroll_delay=1.5, known_ids=None,
+                                 profile="fresh", asset_cache=False, record_har=None, replay_har=None,
+                                 country=None):
+    """Yield job IDs as each scroll reveals them (see get_job_ids_with_playwright)."""
     print("🚀 Launching browser to collect job IDs...")
-    job_ids = set()
-
     with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context()
-        page = context.new_page()
+        session = BrowserSession(p, profile=profile, asset_cache=asset_cache,
+                                 record_har=record_har, replay_har=replay_har)
+        session.open()
+        page = session.new_page()
+        if replay_har:
+            scroll_delay = 0
 
         try:
-            page.goto(BASE_URL, wait_until="load", timeout=90000)
-            time.sleep(4)
+            yield from iter_listing_ids(page, known_ids, max_scrolls, scroll_delay,
+                                        settle=0 if replay_har else 4, accept_consent=session.accept_consent,
+                                        country=country)
+        except PlaywrightTimeout:
+            print("⚠️ Timeout while loading listings page.")
+        except Exception as e:
+            print(f"❌ Error while collecting IDs: {e}")
+        finally:
+            session.close()
 
-            for scroll in range(1, max_scrolls + 1):
-                page.mouse.wheel(0, 50000)
-                time.sleep(scroll_delay)
 
-                html = page.content()
-                soup = BeautifulSoup(html, "html.parser")
+def iter_listing_ids(page, known_ids=None, max_scrolls=15, scroll_delay=1.5, settle=4, accept_consent=None,
+                     country=None):
+    """Yield job IDs from a country's listing in an already open page.
 
-                for btn in soup.find_all("button", attrs={"data-joboffer": True}):
-                    job_ids.add(btn["data-joboffer"])
+    Scrolls newest first when known_ids is given and stops once a scroll
+    reveals only known IDs. Lets a long-running caller reuse a warm page.
+    """
+    job_ids = set()
+    stop = KnownIdStop(known_ids)
+    base_url = get_country(country).listing_url
+    listing_url = base_url + NEWEST_FIRST_QUERY if known_ids else base_url
 
-                print(f"  ✓ Scroll {scroll}: {len(job_ids)} unique IDs")
+    page.goto(listing_url, wait_until="load", timeout=90000)
+    time.sleep(settle)
+    if accept_consent is not None:
+        accept_consent(page)
 
-            print(f"\n✅ Total job IDs found: {len(job_ids)}")
+    for scroll in range(1, max_scrolls + 1):
+        page.mouse.wheel(0, 50000)
+        time.sleep(scroll_delay)
 
-        except PlaywrightTimeout:
-            print("⚠️ Timeout while loading listings page.")
-        except Exception as e:
-            print(f"❌ Error while collecting IDs: {e}")
-        finally:
-            browser.close()
+        html = page.content()
+        soup = BeautifulSoup(html, "html.parser")
+
+        for btn in soup.find_all("button", attrs={"data-joboffer": True}):
+            job_id = btn["data-joboffer"]
+            if job_id not in job_ids:
+                job_ids.add(job_id)
+                yield job_id
+
+        print(f"  ✓ Scroll {scroll}: {len(job_ids)} unique IDs")
+
+        if stop.update(job_ids):
+            print("🛑 Reached already-known jobs, stopping early.")
+            break
+
+    print(f"\n✅ Total job IDs found: {len(job_ids)}")
 
-    return list(job_ids)
 
 # ---------------------------------------------------------------
 # 2️⃣  Helper function to extract text
@@ -77,13 +134,41 @@ def extract_text(soup, selector):
 # ---------------------------------------------------------------
 # 3️⃣  Scrape details for one job
 # ---------------------------------------------------------------
-def get_job_details(page, job_url):
-    """Visit job URL and extract key fields"""
+def fetch_job_html(page, job_url, settle=3):
+    """Visit job URL and return its rendered HTML ('' on failure; settle = seconds to wait)."""
+    return fetch_job_page(page, job_url, settle)[0]
+
+
+def fetch_job_page(page, job_url, settle=3):
+    """Like fetch_job_html, but returns (html, HTTP status); ('', None) on failure."""
+    try:
+        response = page.goto(job_url, wait_until="load", timeout=60000)
+        time.sleep(settle)
+        return page.content(), response.status if response is not None else None
+    except Exception as e:
+        print(f"❌ Error loading {job_url}: {e}")
+        return "", None
+
+
+def has_content(job):
+    """True when a parsed row carries a title or description (a failed fetch gives an empty row)."""
+    return bool(job.get("_job_title") or job.get("_job_description"))
+
+
+def get_job_details(page, job_url, settle=3):
+    """Visit job URL and extract key fields (settle = seconds to wait after load)"""
+    return parse_job_details(fetch_job_html(page, job_url, settle), job_url)
+
+
+def parse_job_details(html, job_url):
+    """Extract key fields from a detail page's HTML (runs in parse workers).
+
+    The country site is taken from job_url.
+    """
     job = {key: "" for key in HEADERS}
+    if not html:
+        return job
     try:
-        page.goto(job_url, wait_until="load", timeout=60000)
-        time.sleep(3)
-        html = page.content()
         soup = BeautifulSoup(html, "html.parser")
 
         # Featured image
@@ -113,63 +198,30 @@ def get_job_details(page, job_url):
                 # Clean up multiple consecutive newlines
                 detail_desc = re.sub(r'\n+', '\n', detail_desc)
 
-                job = {}
                 job["_job_description"] = detail_desc
         job["_job_title"] = extract_text(soup, ".category, [class*='categoria'], .breadcrumb li:last-child")
         # Category or type
         job["_job_category"] = extract_text(soup, ".js-position-area")
-        # Default job type
-        job_type = "Tiempo completo"
-
-        # Example: suppose job type info may appear in a <span>, <div>, or <p>
-        # You can adjust the selector to match your real HTML
-        span = soup.find("span")
-        if span:
-            text = span.get_text(strip=True).lower()
-            if "Medio tiempo" in text or "medio tiempo" in text:
-                job_type = "Medio tiempo"
-            elif "Remoto" in text or "Remoto" in text:
-                job_type = "Remoto"
-            elif "Tiempo completo" in text or "tiempo completo" in text:
-                job_type = "Tiempo completo"
-
-            job["_job_type"]=job_type
+        # Job type, area and seniority from keywords in title + description
+        keywords = classify(job["_job_title"], job.get("_job_description", ""))
+        job["_job_type"] = job_type(keywords)
+        job["_job_category"] = job["_job_category"] or keywords.area
         # Salary info
         salary_text = extract_text(soup, "[class*='salario'], .js-joboffer-salary, .compensation")
         job["_job_salary"] = salary_text
-        if salary_text:
-            numbers = re.findall(r"[\d,.]+", salary_text)
-            if len(numbers) >= 1:
-                job["_job_salary_type"] = "Mensual"
-                job["_job_max_salary"] = numbers[-1]
+        salary = parse_salary(salary_text)
+        if salary.max is not None:
+            job["_job_salary_type"] = salary.period or "Mensual"
+            job["_job_max_salary"] = format_amount(salary.max)
 
         # Location
         job["_job_location"] = extract_text(soup, "[class*='ubicacion'], .js-joboffer-city, [itemprop='addressLocality']")
         job["_job_address"] = job["_job_location"]
 
-        # Expiry / deadline date
-        # job["_job_application_deadline_date"] = extract_text(soup, "time, [class*='js-publish-date'], [class*='publicado']")
-        deadline_date = datetime.today() + timedelta(days=30)
-
-        # Try to extract a date string
-        span = soup.find("span")
-        if span:
-            raw_text = span.get_text(strip=True)
-            parsed_date = None
-
-            # Try different common formats
-            for fmt in ("%Y-%m-%d", "%d/%m/%Y", "%m/%d/%Y", "%d-%m-%Y"):
-                try:
-                    parsed_date = datetime.strptime(raw_text, fmt)
-                    break
-                except ValueError:
-                    continue
-
-            if parsed_date:
-                deadline_date = parsed_date
-
-        # Always output in YYYY-MM-DD format
-        job["_job_application_deadline_date"] = deadline_date.strftime("%Y-%m-%d")
+        # Expiry / deadline date: 30 days after the publish date when the page shows one
+        published = parse_date(extract_text(soup, PUBLISH_DATE_SELECTOR))
+        deadline_date = add_days(published or datetime.today().strftime("%Y-%m-%d"), 30)
+        job["_job_application_deadline_date"] = deadline_date
 
           # Experience / qualification
         #job["experience"] = extract_text(soup, "[class*='experiencia'], .experience")
@@ -190,6 +242,7 @@ def get_job_details(page, job_url):
             span = icon.find_next("span")
             if span:
               job["_job_career_level"]= span.get_text(strip=True)
+        job["_job_career_level"] = job.get("_job_career_level") or keywords.seniority
         # Apply email or URL
         email_match = re.search(r"[\w\.-]+@[\w\.-]+\.\w+", soup.get_text())
         if email_match:
@@ -211,27 +264,17 @@ def get_job_details(page, job_url):
         job["_job_filled"] = "0"
         job["_job_urgent"] = "0"
         job["_job_gender"] = ""
-        job["_job_tag"] = "Costa Rica"
+        country = country_from_url(job_url)
+        job["_job_tag"] = country.name
         job["_job_video_url"] = ""
         job["_job_photos"] = ""
-        job["_job_map_location"] = job["_job_address"]
+        place = locate(job["_job_location"]) if country.code == GAZETTEER_COUNTRY else None
+        job["_job_map_location"] = place.map_location if place else job["_job_address"]
         job["_job_apply_type"] = "external"
 
 
-        expiry_date = datetime.today() + timedelta(days=30)
-
-     # Try to extract a date from the HTML
-        span = soup.find("span")
-        if span:
-            text = span.get_text(strip=True)
-            try:
-                # Try parsing it – adjust format to match website (e.g. "YYYY-MM-DD" or "DD/MM/YYYY")
-                expiry_date = datetime.strptime(text, "%Y-%m-%d")
-            except ValueError:
-                # If parsing fails, just keep the default 30 days
-                pass
-        job["_job_expiry_date"] = expiry_date.strftime("%Y-%m-%d")
-        print("Job expiry date:", expiry_date.strftime("%Y-%m-%d"))
+        job["_job_expiry_date"] = deadline_date
+        print("Job expiry date:", deadline_date)
         
         # job["_job_expiry_date"] = job["_job_application_deadline_date"]
 
@@ -242,42 +285,145 @@ def get_job_details(page, job_url):
         return job
 
 # ---------------------------------------------------------------
-# 4️⃣  MAIN SCRAPER
+# 4️⃣  Scrape details for many jobs and save them
 # ---------------------------------------------------------------
-def main():
-    print("\n🚀 Starting Elempleo Auto Job Scraper...")
-
-    # Step 1: Collect job IDs automatically
-    job_ids = get_job_ids_with_playwright(max_scrolls=15, scroll_delay=1.5)
-    if not job_ids:
-        print("⚠️ No job IDs found.")
-        return
-
-    print(f"✅ Found {len(job_ids)} job IDs. Starting detail scraping...")
-
+def scrape_job_details(job_ids, total="?", profile="fresh", asset_cache=False,
+                       record_har=None, replay_har=None, compact=False,
+                       recycle_every=RECYCLE_PAGE_EVERY, max_rss_mb=MAX_RSS_MB,
+                       parse_workers=None, archive_dir=ARCHIVE_DIR, events=None, country=None,
+                       sitemap_state=None):
+    """Open one browser and scrape the detail page of every job ID (any iterable) of one country.
+
+    With replay_har the pages come from a recorded HAR, so no settle delay is needed.
+    compact=True returns JobRecords instead of dicts for large runs.
+    The page is replaced every recycle_every jobs and the browser is relaunched
+    when its memory passes max_rss_mb or it crashes (see detail_engine).
+    HTML is parsed by parse_workers processes (default: CPUs - 1, 0 parses
+    inline) while the browser moves on. Every page is also kept in the HTML
+    archive under archive_dir (None disables it) for offline re-extraction.
+    With an events sink (event_sink.py) each record with content is published
+    the moment it is parsed. With a sitemap_state, jobs whose page parsed are confirmed
+    so their lastmod is saved.
+    """
     results = []
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context()
-        page = context.new_page()
-
+    detail_url = get_country(country).detail_url
+    settle = 0 if replay_har else 3
+    # Parsed records come back in submission order
+    submitted = deque()
+
+    def collect(records):
+        for job in records:
+            job_id = submitted.popleft()
+            if sitemap_state is not None and has_content(job):
+                sitemap_state.confirm(job_id)
+            # A failed fetch leaves an empty row: keep it in the snapshot, never publish it
+            if events is not None and has_content(job):
+                events.publish(job, job_id)
+            results.append(JobRecord.from_dict(job) if compact else job)
+
+    archive = HtmlArchive(archive_dir) if archive_dir else None
+    with ParsePool(parse_job_details, workers=parse_workers) as pool, sync_playwright() as p, \
+            DetailEngine(p, recycle_page_every=recycle_every, max_rss_mb=max_rss_mb,
+                         profile=profile, asset_cache=asset_cache,
+                         record_har=record_har, replay_har=replay_har) as engine:
         for idx, job_id in enumerate(job_ids, 1):
-            job_url = f"{DETAIL_BASE_URL}{job_id}"
-            print(f"[{idx}/{len(job_ids)}] Scraping {job_url} ...")
-            job_data = get_job_details(page, job_url)
-            results.append(job_data)
-
-        browser.close()
-
-    # Step 2: Save results to CSV
-    filename = f"elempleo_job_details_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+            job_url = f"{detail_url}{job_id}"
+            print(f"[{idx}/{total}] Scraping {job_url} ...")
+            html = engine.run(lambda page: fetch_job_html(page, job_url, settle))
+            if archive is not None:
+                archive.put(job_id, job_url, html)
+            submitted.append(job_id)
+            collect(pool.submit(html, job_url))
+        collect(pool.drain())
+        if pool.waits:
+            print(f"⏳ Fetching waited on the parse pool {pool.waits} times; consider more --parse-workers")
+    if archive is not None:
+        print(archive.report())
+        archive.close()
+    return results
+
+
+def save_to_csv(results, filename=None, country=None):
+    """Write detail rows to a timestamped snapshot CSV (one name pattern per country) and return its name."""
+    filename = filename or snapshot_glob(country).replace("*", datetime.now().strftime('%Y%m%d_%H%M%S'))
     with open(filename, "w", newline="", encoding="utf-8-sig") as f:
         writer = csv.DictWriter(f, fieldnames=HEADERS)
         writer.writeheader()
-        writer.writerows(results)
+        writer.writerows(as_dicts(results, HEADERS))
 
     print(f"\n✅ Saved {len(results)} jobs to {filename}")
+    return filename
+
+
+# ---------------------------------------------------------------
+# 5️⃣  MAIN SCRAPER
+# ---------------------------------------------------------------
+def main(incremental=False, known_ids_path=None, discovery="scroll", profile="fresh", asset_cache=False,
+         events=None, country=None, compact=False, recycle_every=RECYCLE_PAGE_EVERY, max_rss_mb=MAX_RSS_MB,
+         parse_workers=None, record_har=None, replay_har=None, archive_dir=ARCHIVE_DIR, filename=None):
+    """Run the scraper and return the scraped rows.
+
+    incremental=True only scrapes IDs missing from the last snapshot.
+    discovery="scroll" scrolls the listing in a background browser and feeds
+    each newly revealed ID to the detail loop right away; discovery="sitemap"
+    streams IDs from the sitemaps and skips jobs whose lastmod has not changed.
+    profile="storage"/"persistent" and asset_cache=True reuse browser state,
+    accepted consent and downloaded JS/CSS across runs.
+    country selects the elempleo site (default Costa Rica); its sitemap
+    state and snapshots are kept apart from the other countries'.
+    compact, recycle_every, max_rss_mb and parse_workers are passed to scrape_job_details.
+    record_har/replay_har record or replay the detail pages; discovery uses
+    its own part of the recording (run-listing.har, run-sitemaps.har).
+    Pages are archived under the country's partition of archive_dir (None
+    disables it); filename overrides the snapshot CSV name.
+    """
+    country = get_country(country)
+    print(f"\n🚀 Starting Elempleo Auto Job Scraper ({country.name})...")
+
+    known_ids = load_known_ids(known_ids_path, country) if incremental else set()
+    sitemap_state = None
+    adapter = None
+
+    # Step 1: Collect job IDs automatically
+    if discovery == "sitemap":
+        import requests
+
+        http = requests.Session()
+        adapter = mount_har(http, har_part_path(record_har, "sitemaps"), har_part_path(replay_har, "sitemaps"))
+        sitemap_state = SitemapState(partition(SITEMAP_STATE_FILE, country))
+        job_ids = sitemap_job_ids(sitemap_state, known_ids, session=http, country=country)
+        total = "?"
+    else:
+        # Detail scraping starts as soon as the first scroll reveals IDs.
+        # Two browsers cannot share one persistent profile directory.
+        listing_profile = "fresh" if profile == "persistent" else profile
+        job_ids = IdStream(lambda: iter_job_ids_with_playwright(max_scrolls=15, scroll_delay=1.5,
+                                                                known_ids=known_ids, profile=listing_profile,
+                                                                asset_cache=asset_cache, country=country,
+                                                                record_har=har_part_path(record_har, "listing"),
+                                                                replay_har=har_part_path(replay_har, "listing")),
+                           known_ids=known_ids)
+        total = "?"
+
+    results = scrape_job_details(job_ids, total, profile=profile, asset_cache=asset_cache, events=events,
+                                 archive_dir=partition(archive_dir, country), country=country,
+                                 compact=compact, recycle_every=recycle_every, max_rss_mb=max_rss_mb,
+                                 parse_workers=parse_workers, record_har=record_har, replay_har=replay_har,
+                                 sitemap_state=sitemap_state)
+    if adapter is not None:
+        adapter.close()
+    if isinstance(job_ids, IdStream):
+        print(job_ids.report())
+    if not results:
+        print("⚠️ No new or changed jobs to scrape.")
+        return results
+
+    # Step 2: Save results to CSV
+    save_to_csv(results, filename, country)
+    if sitemap_state is not None:
+        sitemap_state.save()
     print("🎉 Done!")
+    return results
 
 
 if __name__ == "__main__":
@@ -18,6 +18,12 @@ from bs4 import BeautifulSoup
 from datetime import datetime
 from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeout
 
+from classify import classify, job_type
+from discovery import KnownIdStop, NEWEST_FIRST_QUERY
+from gazetteer import locate
+from normalize import parse_salary, parse_date, format_amount
+from parse_pool import ParsePool
+
 # -----------------------------
 # CONFIG
 # -----------------------------
@@ -57,15 +63,17 @@ def extract_text(soup, selector):
 # -----------------------------
 # STEP 1: collect job IDs by scrolling
 # -----------------------------
-def get_job_ids_with_playwright(max_scrolls=15, scroll_delay=1.5):
+def get_job_ids_with_playwright(max_scrolls=15, scroll_delay=1.5, known_ids=None):
     print("collecting job IDs via Playwright")
     job_ids = set()
+    stop = KnownIdStop(known_ids)
+    listing_url = LISTINGS_URL + NEWEST_FIRST_QUERY if known_ids else LISTINGS_URL
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=True)
         context = browser.new_context(user_agent=HEADERS["User-Agent"])
         page = context.new_page()
         try:
-            page.goto(LISTINGS_URL, wait_until="load", timeout=90000)
+            page.goto(listing_url, wait_until="load", timeout=90000)
             time.sleep(3)
             for scroll in range(1, max_scrolls + 1):
                 page.mouse.wheel(0, 50000)
@@ -76,6 +84,10 @@ def get_job_ids_with_playwright(max_scrolls=15, scroll_delay=1.5):
                 for btn in soup.find_all("button", attrs={"data-joboffer": True}):
                     job_ids.add(btn["data-joboffer"])
                 print(f"  scroll {scroll} -> {len(job_ids)} unique ids")
+
+                if stop.update(job_ids):
+                    print("reached already-known ids, stopping early")
+                    break
         except PlaywrightTimeout:
             print("timeout while collecting ids, continuing with what we have")
         except Exception as e:
@@ -113,17 +125,35 @@ def get_job_ids_with_playwright(max_scrolls=15, scroll_delay=1.5):
 # -----------------------------
 # STEP 3: visit detail page to enrich
 # -----------------------------
+def fetch_detail_html(page, job):
+    """Load a job's detail page and return its HTML ('' on failure)."""
+    job_url = job.get("url") or f"{DETAIL_BASE_URL}{job.get('id')}"
+    try:
+        page.goto(job_url, wait_until="load", timeout=60000)
+        time.sleep(2)
+        return page.content()
+    except PlaywrightTimeout:
+        print("timeout loading detail page", job_url)
+    except Exception as e:
+        print("error loading", job_url, e)
+    return ""
+
+
 def enrich_with_detail(page, job):
+    return extract_detail(fetch_detail_html(page, job), job)
+
+
+def extract_detail(html, job):
+    """Fill job from detail page HTML; runs in parse workers, returns the job."""
     # ensure default keys exist
     for k in CSV_FIELDS:
         if k not in job:
             job[k] = ""
+    if not html:
+        return job
 
     job_url = job.get("url") or f"{DETAIL_BASE_URL}{job.get('id')}"
     try:
-        page.goto(job_url, wait_until="load", timeout=60000)
-        time.sleep(2)
-        html = page.content()
         soup = BeautifulSoup(html, "html.parser")
 
         # Featured image
@@ -150,18 +180,18 @@ def enrich_with_detail(page, job):
         # Salary parsing
         salary_text = extract_text(soup, "[class*='salario'], .js-joboffer-salary, .compensation") or job.get("salary", "")
         job["salary"] = salary_text
-        if salary_text:
-            numbers = re.findall(r"[\d,.]+", salary_text)
-            if len(numbers) >= 1:
-                job["salary_type"] = "monthly"
-                job["max_salary"] = numbers[-1]
+        salary = parse_salary(salary_text)
+        if salary.max is not None:
+            job["salary_type"] = (salary.period or "Mensual").lower()
+            job["max_salary"] = format_amount(salary.max)
 
         # Location / address
         job["location"] = extract_text(soup, "[class*='ubicacion'], .js-joboffer-city, [itemprop='addressLocality']") or job.get("location", "")
         job["address"] = extract_text(soup, "[itemprop='streetAddress'], [class*='direccion']") or job["location"]
 
         # Dates
-        job["application_deadline_date"] = extract_text(soup, "time, [class*='fecha'], [class*='publicado']") or job.get("application_deadline_date", "")
+        date_text = extract_text(soup, "time, [class*='fecha'], [class*='publicado']")
+        job["application_deadline_date"] = parse_date(date_text) or date_text or job.get("application_deadline_date", "")
         job["expiry_date"] = job["application_deadline_date"] or job.get("expiry_date", "")
 
         # Experience / qualification
@@ -169,6 +199,12 @@ def enrich_with_detail(page, job):
         job["qualification"] = extract_text(soup, "[class*='educacion'], [class*='formacion']") or job.get("qualification", "")
         job["career_level"] = extract_text(soup, "[class*='nivel'], .level") or job.get("career_level", "")
 
+        # Fill type / category / level the page did not state from keywords
+        keywords = classify(job.get("title", ""), job.get("description", ""))
+        job["type"] = job["type"] or job_type(keywords, default="")
+        job["category"] = job["category"] or keywords.area
+        job["career_level"] = job["career_level"] or keywords.seniority
+
         # Apply email or url
         text_all = soup.get_text(" ", strip=True)
         email_match = re.search(r"[\w\.-]+@[\w\.-]+\.\w+", text_all)
@@ -185,10 +221,9 @@ def enrich_with_detail(page, job):
         job["filled"] = job.get("filled", "false")
         job["urgent"] = job.get("urgent", "false")
         job["apply_type"] = "website" if job.get("apply_url") else ("email" if job.get("apply_email") else "")
-        job["map_location"] = ""  # optional: could parse lat/lon if present in page
+        place = locate(job["location"])
+        job["map_location"] = place.map_location if place else ""
 
-    except PlaywrightTimeout:
-        print("timeout loading detail page", job_url)
     except Exception as e:
         print("error enriching", job_url, e)
 
@@ -236,16 +271,20 @@ def main():
 
     # Step: open playwright once and enrich each job
     print("opening browser to enrich detail pages")
-    with sync_playwright() as p:
+    enriched = []
+    with ParsePool(extract_detail) as pool, sync_playwright() as p:
         browser = p.chromium.launch(headless=True)
         context = browser.new_context(user_agent=HEADERS["User-Agent"])
         page = context.new_page()
         for idx, job in enumerate(jobs, 1):
             print(f"[{idx}/{len(jobs)}] enriching id {job.get('id')}")
-            enrich_with_detail(page, job)
+            # parsing happens in the pool while the next page loads
+            enriched.extend(pool.submit(fetch_detail_html(page, job), job))
             # small polite delay
             time.sleep(0.4)
+        enriched.extend(pool.drain())
         browser.close()
+    jobs = enriched
 
     # Save
     save_to_csv(jobs)
@@ -8,23 +8,95 @@ import time
 import random
 import re
 from datetime import datetime
+from bs4 import BeautifulSoup
 from playwright.sync_api import sync_playwright
 import logging
 
+from debug_artifacts import DebugRecorder
+from gazetteer import find_location, locate
+from har_replay import apply_har_replay, har_context_options
+from job_record import as_dicts
+from selector_chain import first_match, save_selector_stats
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
 
+API_URL = "https://www.elempleo.com/cr/api/joboffers/getjoboffer?jobOfferId={}"
+# Requests whose URL contains this are the Quick View payloads
+QUICK_VIEW_API_PATTERN = "/api/joboffers/getjoboffer"
+
+# Runs inside the page: fetch many Quick View payloads with a few concurrent
+# workers and hand back the parsed JSON (null for failures) in input order
+FETCH_PAYLOADS_JS = """
+async ({urls, concurrency}) => {
+    const results = new Array(urls.length).fill(null);
+    let next = 0;
+    async function worker() {
+        while (next < urls.length) {
+            const i = next++;
+            try {
+                const r = await fetch(urls[i], {credentials: 'include'});
+                if (r.ok) results[i] = await r.json();
+            } catch (e) {}
+        }
+    }
+    await Promise.all(Array.from({length: concurrency}, worker));
+    return results;
+}
+"""
+
+# Candidate Quick View containers, tried in order; <body> is the fallback
+MODAL_SELECTORS = [
+    '[class*="modal"]',
+    '[class*="popup"]',
+    '[class*="quick-view"]',
+    '[role="dialog"]',
+    '.overlay-content'
+]
+
+# Site key for the learned selector order (see selector_chain.py)
+SELECTOR_SITE = 'elempleo-quickview'
+
+# Runs inside the page: snapshot the first matching modal in one round trip
+MODAL_SNAPSHOT_JS = """
+selectors => {
+    let selector = 'body';
+    let el = document.body;
+    for (const sel of selectors) {
+        const found = document.querySelector(sel);
+        if (found) { selector = sel; el = found; break; }
+    }
+    return {selector, html: el.outerHTML, text: el.innerText || ''};
+}
+"""
+
 
 class ElempleoQuickViewScraper:
-    def __init__(self):
+    def __init__(self, screenshot_every=0, debug_level=None, record_har=None, replay_har=None, trace=False):
         self.base_url = "https://www.elempleo.com/cr/ofertas-empleo/"
         self.jobs = []
+        # 0 disables per-job screenshots; N keeps one every N jobs for debugging
+        self.screenshot_every = screenshot_every
+        # Listing HTML/screenshot are only written if the run fails
+        self.debug = DebugRecorder(debug_level, trace=trace)
+        # Record this run's traffic, or replay a HAR to re-run extraction offline
+        self.record_har = record_har
+        self.replay_har = replay_har
+        # Per-job Quick View extraction latency and browser round trips
+        self.extract_times_ms = []
+        self.extract_ipc_calls = 0
         
-    def scrape(self, max_jobs=50):
-        """Scrape jobs by clicking Quick View buttons"""
+    def scrape(self, max_jobs=50, mode='network', tabs=4):
+        """Scrape Quick View data for up to max_jobs listings.
+
+        mode='click'   opens each modal and reads it from the DOM (slowest)
+        mode='network' clicks Quick View in `tabs` parallel tabs and keeps the
+                       JSON payload each click fetches
+        mode='direct'  requests the payloads from inside the page, no clicks
+        """
         logger.info("="*70)
         logger.info("ELEMPLEO.COM - QUICK VIEW SCRAPER")
         logger.info("="*70 + "\n")
@@ -34,105 +106,39 @@ class ElempleoQuickViewScraper:
             context = browser.new_context(
                 user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
                 viewport={'width': 1920, 'height': 1080},
-                locale='es-CR'
+                locale='es-CR',
+                **har_context_options(self.record_har)
             )
+            apply_har_replay(context, self.replay_har)
+            self.debug.attach(context)
             page = context.new_page()
+            self.debug.begin('elempleo_listing')
             
             try:
                 logger.info(f"Navigating to {self.base_url}")
                 page.goto(self.base_url, wait_until='networkidle', timeout=60000)
-                time.sleep(5)
-                
-                page.screenshot(path='elempleo_listing.png')
-                logger.info("Screenshot saved: elempleo_listing.png\n")
+                time.sleep(0 if self.replay_har else 5)
+                self.debug.note('loaded', url=page.url)
                 
-                # Find all Quick View buttons
-                logger.info("Looking for 'Vista rápida' buttons...")
-                
-                # Try different selectors for Quick View buttons
-                quick_view_selectors = [
-                    'button:has-text("Vista rápida")',
-                    'a:has-text("Vista rápida")',
-                    '[class*="quick-view"]',
-                    '[class*="vista-rapida"]',
-                    'button[class*="quick"]',
-                    '.js-quick-view'
-                ]
-                
-                quick_view_buttons = []
-                for selector in quick_view_selectors:
-                    try:
-                        buttons = page.locator(selector).all()
-                        if buttons:
-                            logger.info(f"✓ Found {len(buttons)} buttons with selector: {selector}")
-                            quick_view_buttons = buttons
-                            break
-                    except:
-                        continue
-                
-                if not quick_view_buttons:
-                    logger.error("❌ No 'Vista rápida' buttons found!")
-                    logger.info("Looking for all buttons on page for debugging...")
-                    all_buttons = page.locator('button, a[role="button"]').all()
-                    logger.info(f"Total buttons found: {len(all_buttons)}")
-                    for i, btn in enumerate(all_buttons[:10]):
-                        text = btn.inner_text().strip()
-                        if text:
-                            logger.info(f"  Button {i+1}: '{text}'")
-                    return []
-                
-                logger.info(f"\n✅ Found {len(quick_view_buttons)} Quick View buttons")
-                logger.info(f"Will scrape up to {min(max_jobs, len(quick_view_buttons))} jobs\n")
-                
-                # Click each Quick View button and extract data
-                for idx in range(min(max_jobs, len(quick_view_buttons))):
-                    try:
-                        # Re-locate buttons each time (DOM may refresh)
-                        current_buttons = page.locator(quick_view_selectors[0]).all()
-                        
-                        if idx >= len(current_buttons):
-                            logger.warning(f"Button {idx} no longer available")
-                            break
-                        
-                        button = current_buttons[idx]
-                        
-                        logger.info(f"[{idx+1}/{min(max_jobs, len(quick_view_buttons))}] Clicking Quick View...")
-                        
-                        # Scroll button into view
-                        button.scroll_into_view_if_needed()
-                        time.sleep(0.5)
-                        
-                        # Click the Quick View button
-                        button.click()
-                        
-                        # Wait for modal/popup to appear
-                        time.sleep(2)
-                        
-                        # Take screenshot of modal
-                        page.screenshot(path=f'quick_view_{idx+1}.png')
-                        
-                        # Extract data from the Quick View modal
-                        job = self._extract_from_quick_view(page)
-                        
-                        if job and job['title']:
-                            self.jobs.append(job)
-                            logger.info(f"  ✓ {job['title'][:60]}")
-                        else:
-                            logger.warning(f"  ✗ No data extracted")
-                        
-                        # Close modal (look for close button)
-                        self._close_modal(page)
-                        time.sleep(1)
-                        
-                    except Exception as e:
-                        logger.error(f"  ✗ Error on job {idx+1}: {e}")
-                        self._close_modal(page)
-                        continue
+                if mode == 'click':
+                    self._scrape_by_clicking(page, max_jobs)
+                elif mode == 'network':
+                    self._scrape_by_network(context, page, max_jobs, tabs)
+                elif mode == 'direct':
+                    self._scrape_direct(page, max_jobs)
+                else:
+                    raise ValueError(f"Unknown quick view mode: {mode}")
                 
             except Exception as e:
                 logger.error(f"Fatal error: {e}")
+                self.debug.fail(e)
             finally:
-                time.sleep(2)
+                self.debug.finish(page, len(self.jobs))
+                self.debug.close()
+                save_selector_stats()
+                time.sleep(0 if self.replay_har else 2)
+                # Closing the context flushes a recorded HAR to disk
+                context.close()
                 browser.close()
         
         logger.info(f"\n{'='*70}")
@@ -140,171 +146,325 @@ class ElempleoQuickViewScraper:
         logger.info(f"{'='*70}")
         return self.jobs
     
+    def _scrape_by_clicking(self, page, max_jobs):
+        """Legacy mode: open each Quick View modal and read it from the DOM"""
+        # Find all Quick View buttons
+        logger.info("Looking for 'Vista rápida' buttons...")
+        
+        # Try different selectors for Quick View buttons
+        quick_view_selectors = [
+            'button:has-text("Vista rápida")',
+            'a:has-text("Vista rápida")',
+            '[class*="quick-view"]',
+            '[class*="vista-rapida"]',
+            'button[class*="quick"]',
+            '.js-quick-view'
+        ]
+        
+        quick_view_buttons = []
+        for selector in quick_view_selectors:
+            try:
+                buttons = page.locator(selector).all()
+                if buttons:
+                    logger.info(f"✓ Found {len(buttons)} buttons with selector: {selector}")
+                    quick_view_buttons = buttons
+                    break
+            except:
+                continue
+        
+        if not quick_view_buttons:
+            logger.error("❌ No 'Vista rápida' buttons found!")
+            logger.info("Looking for all buttons on page for debugging...")
+            all_buttons = page.locator('button, a[role="button"]').all()
+            logger.info(f"Total buttons found: {len(all_buttons)}")
+            for i, btn in enumerate(all_buttons[:10]):
+                text = btn.inner_text().strip()
+                if text:
+                    logger.info(f"  Button {i+1}: '{text}'")
+            return
+        
+        logger.info(f"\n✅ Found {len(quick_view_buttons)} Quick View buttons")
+        logger.info(f"Will scrape up to {min(max_jobs, len(quick_view_buttons))} jobs\n")
+        
+        # Click each Quick View button and extract data
+        for idx in range(min(max_jobs, len(quick_view_buttons))):
+            try:
+                # Re-locate buttons each time (DOM may refresh)
+                current_buttons = page.locator(quick_view_selectors[0]).all()
+                
+                if idx >= len(current_buttons):
+                    logger.warning(f"Button {idx} no longer available")
+                    break
+                
+                button = current_buttons[idx]
+                
+                logger.info(f"[{idx+1}/{min(max_jobs, len(quick_view_buttons))}] Clicking Quick View...")
+                
+                # Scroll button into view
+                button.scroll_into_view_if_needed()
+                time.sleep(0.5)
+                
+                # Click the Quick View button
+                button.click()
+                
+                # Wait for modal/popup to appear
+                time.sleep(2)
+                
+                # Sampled debug screenshot of the modal (off by default)
+                self._maybe_screenshot(page, idx + 1)
+                
+                # Extract data from the Quick View modal
+                job = self._extract_from_quick_view(page)
+                
+                if job and job['title']:
+                    self.jobs.append(job)
+                    logger.info(f"  ✓ {job['title'][:60]}")
+                else:
+                    logger.warning(f"  ✗ No data extracted")
+                    self.debug.fail(f"job {idx+1}: no data extracted")
+                
+                # Close modal (look for close button)
+                self._close_modal(page)
+                time.sleep(1)
+                
+            except Exception as e:
+                logger.error(f"  ✗ Error on job {idx+1}: {e}")
+                self.debug.fail(f"job {idx+1}: {e}")
+                self._close_modal(page)
+                continue
+    
+    def _listing_job_ids(self, page, max_jobs):
+        """Read the job offer IDs behind the Quick View buttons in one call"""
+        job_ids = page.eval_on_selector_all(
+            'button[data-joboffer]',
+            'els => els.map(el => el.getAttribute("data-joboffer"))'
+        )
+        unique_ids = list(dict.fromkeys(j for j in job_ids if j))
+        logger.info(f"✓ Found {len(unique_ids)} job offers on the listing")
+        return unique_ids[:max_jobs]
+    
+    def _scrape_by_network(self, context, page, max_jobs, tabs):
+        """Click Quick View in several tabs and keep the payloads they fetch"""
+        job_ids = self._listing_job_ids(page, max_jobs)
+        if not job_ids:
+            logger.error("❌ No Quick View buttons found!")
+            return
+        
+        payloads = {}
+        
+        def on_response(response):
+            if QUICK_VIEW_API_PATTERN not in response.url or not response.ok:
+                return
+            try:
+                data = response.json()
+            except Exception as e:
+                logger.debug(f"  ✗ Unreadable payload from {response.url}: {e}")
+                return
+            job_id = str(data.get('id') or response.url.rsplit('=', 1)[-1])
+            payloads[job_id] = data
+        
+        # The listing page is the first tab; open the rest on the same listing
+        pages = [page]
+        for _ in range(max(1, tabs) - 1):
+            tab = context.new_page()
+            tab.goto(self.base_url, wait_until='domcontentloaded', timeout=60000)
+            pages.append(tab)
+        for tab in pages:
+            tab.on('response', on_response)
+        
+        logger.info(f"Opening {len(job_ids)} Quick Views across {len(pages)} tabs\n")
+        for start in range(0, len(job_ids), len(pages)):
+            batch = list(zip(pages, job_ids[start:start + len(pages)]))
+            
+            # Fire one click per tab, then wait for all payloads together
+            for tab, job_id in batch:
+                try:
+                    tab.locator(f'button[data-joboffer="{job_id}"]').first.click(timeout=10000)
+                except Exception as e:
+                    logger.error(f"  ✗ Could not open Quick View for {job_id}: {e}")
+            
+            deadline = time.monotonic() + 10
+            while (time.monotonic() < deadline
+                   and any(job_id not in payloads for _, job_id in batch)):
+                page.wait_for_timeout(100)
+            
+            for n, (tab, job_id) in enumerate(batch, start + 1):
+                self._maybe_screenshot(tab, n)
+                self._close_modal(tab)
+                self._add_payload_job(job_id, payloads.get(job_id))
+        
+        for tab in pages[1:]:
+            tab.close()
+    
+    def _scrape_direct(self, page, max_jobs, concurrency=8):
+        """Fetch Quick View payloads from inside the page without clicking"""
+        job_ids = self._listing_job_ids(page, max_jobs)
+        if not job_ids:
+            logger.error("❌ No Quick View buttons found!")
+            return
+        
+        logger.info(f"Requesting {len(job_ids)} Quick View payloads directly\n")
+        started = time.perf_counter()
+        results = page.evaluate(FETCH_PAYLOADS_JS, {
+            'urls': [API_URL.format(job_id) for job_id in job_ids],
+            'concurrency': concurrency,
+        })
+        logger.info(f"Fetched payloads in {time.perf_counter() - started:.1f}s")
+        
+        for job_id, data in zip(job_ids, results):
+            self._add_payload_job(job_id, data)
+    
+    def _add_payload_job(self, job_id, data):
+        """Convert a Quick View JSON payload into a job row"""
+        if not data:
+            logger.warning(f"  ✗ No Quick View payload for {job_id}")
+            self.debug.fail(f"job {job_id}: no payload")
+            return
+        job = {
+            'title': (data.get('title') or '').strip(),
+            'company': data.get('companyName') or '',
+            'location': data.get('city') or '',
+            'map_location': '',
+            'description': re.sub(r"<[^>]+>", "", data.get('description') or '').strip(),
+            'salary': data.get('salaryInfo') or '',
+            'posting_date': data.get('publishDateInfo') or '',
+            'url': data.get('jobOfferUrl') or ''
+        }
+        self._normalize_location(job)
+        if job['url'] and not job['url'].startswith('http'):
+            job['url'] = f"https://www.elempleo.com{job['url']}"
+        if job['title']:
+            self.jobs.append(job)
+            logger.info(f"  ✓ {job['title'][:60]}")
+        else:
+            logger.warning(f"  ✗ Empty payload for {job_id}")
+            self.debug.fail(f"job {job_id}: empty payload")
+    
+    def _normalize_location(self, job):
+        """Replace the location text with its gazetteer label and add coordinates"""
+        place = locate(job['location'])
+        if place is not None:
+            job['location'] = place.label
+            job['map_location'] = place.map_location
+    
+    def _maybe_screenshot(self, page, n):
+        """Save a debug screenshot for every `screenshot_every`-th job"""
+        if not self.screenshot_every or n % self.screenshot_every:
+            return
+        path = f'quick_view_{n}.png'
+        try:
+            page.screenshot(path=path)
+            logger.debug(f"Screenshot saved: {path}")
+        except Exception as e:
+            logger.debug(f"Screenshot failed for job {n}: {e}")
+    
     def _extract_from_quick_view(self, page):
-        """Extract job details from Quick View modal/popup"""
+        """Extract job details from Quick View modal/popup.
+
+        The modal is captured with a single page.evaluate call (HTML plus
+        rendered text); every field selector and fallback heuristic then runs
+        locally against that snapshot.
+        """
         job = {
             'title': '',
             'company': '',
             'location': '',
+            'map_location': '',
             'description': '',
             'salary': '',
             'posting_date': '',
             'url': ''
         }
         
+        started = time.perf_counter()
         try:
-            # Look for modal/popup container
-            modal_selectors = [
-                '[class*="modal"]',
-                '[class*="popup"]',
-                '[class*="quick-view"]',
-                '[role="dialog"]',
-                '.overlay-content'
-            ]
-            
-            modal = None
-            for selector in modal_selectors:
-                if page.locator(selector).count() > 0:
-                    modal = page.locator(selector).first
-                    break
-            
-            # If no specific modal found, use the whole page
-            if not modal:
-                modal = page.locator('body')
-            
-            # Extract title
-            title_selectors = ['h1', 'h2', '.job-title', '[class*="title"]']
-            for sel in title_selectors:
-                try:
-                    elem = modal.locator(sel).first
-                    if elem.count() > 0:
-                        text = elem.inner_text().strip()
-                        if text and len(text) > 3:
-                            job['title'] = text
-                            break
-                except:
-                    pass
-            
-            # Extract company
-            company_selectors = ['.company', '.company-name', '[class*="empresa"]', '[class*="company"]']
-            for sel in company_selectors:
-                try:
-                    elem = modal.locator(sel).first
-                    if elem.count() > 0:
-                        text = elem.inner_text().strip()
-                        if text and len(text) > 1:
-                            job['company'] = text
-                            break
-                except:
-                    pass
-            
-            # Extract location
-            location_selectors = ['.location', '[class*="ubicacion"]', '[class*="location"]']
-            for sel in location_selectors:
-                try:
-                    elem = modal.locator(sel).first
-                    if elem.count() > 0:
-                        text = elem.inner_text().strip()
-                        if text:
-                            job['location'] = text
-                            break
-                except:
-                    pass
+            snapshot = page.evaluate(MODAL_SNAPSHOT_JS, MODAL_SELECTORS)
+        except Exception as e:
+            logger.error(f"Error capturing Quick View: {e}")
+            self._record_extraction(started)
+            return job
+        
+        modal = BeautifulSoup(snapshot['html'], 'html.parser')
+        
+        def first_text(field, selectors, accept):
+            # Selector chain: the alternative that hit last time is tried first
+            def probe(sel):
+                elem = modal.select_one(sel)
+                if elem is None:
+                    return ''
+                text = elem.get_text('\n', strip=True)
+                return text if accept(text) else ''
+            return first_match(SELECTOR_SITE, field, selectors, probe) or ''
+        
+        job['title'] = first_text(
+            'title', ['h1', 'h2', '.job-title', '[class*="title"]'],
+            lambda t: len(t) > 3)
+        job['company'] = first_text(
+            'company', ['.company', '.company-name', '[class*="empresa"]', '[class*="company"]'],
+            lambda t: len(t) > 1)
+        job['location'] = first_text(
+            'location', ['.location', '[class*="ubicacion"]', '[class*="location"]'],
+            bool)
+        job['description'] = first_text(
+            'description', ['.description', '.job-description', '[class*="descripcion"]', 'article', '.content'],
+            lambda t: len(t) > 100)
+        job['salary'] = first_text(
+            'salary', ['.salary', '[class*="salario"]', '[class*="sueldo"]'],
+            lambda t: '₡' in t or '$' in t or 'confidencial' in t.lower())
+        job['posting_date'] = first_text(
+            'posting_date', ['.date', '.posted-date', 'time', '[class*="fecha"]', '[class*="publicado"]'],
+            lambda t: '2025' in t or '2024' in t or 'Oct' in t or 'hace' in t.lower())
+        
+        # Extract URL
+        link = modal.select_one('a[href*="/empleo/"], a[href*="/oferta/"]')
+        if link is not None and link.get('href'):
+            href = link['href']
+            job['url'] = href if href.startswith('http') else f"https://www.elempleo.com{href}"
+        
+        # If still missing data, parse the rendered text captured with the HTML
+        if not job['company'] or not job['location']:
+            lines = [l.strip() for l in snapshot['text'].split('\n') if l.strip()]
             
-            # Extract description
-            desc_selectors = ['.description', '.job-description', '[class*="descripcion"]', 'article', '.content']
-            for sel in desc_selectors:
-                try:
-                    elem = modal.locator(sel).first
-                    if elem.count() > 0:
-                        text = elem.inner_text().strip()
-                        if len(text) > 100:
-                            job['description'] = text
+            # Company is often near the top
+            if not job['company'] and len(lines) > 1:
+                for line in lines[1:5]:
+                    # Skip if it's the title or other common words
+                    if line != job['title'] and len(line) > 3 and len(line) < 100:
+                        if not any(word in line.lower() for word in ['publicado', 'vista', 'aplicar']):
+                            job['company'] = line
                             break
-                except:
-                    pass
             
-            # Extract salary
-            salary_selectors = ['.salary', '[class*="salario"]', '[class*="sueldo"]']
-            for sel in salary_selectors:
-                try:
-                    elem = modal.locator(sel).first
-                    if elem.count() > 0:
-                        text = elem.inner_text().strip()
-                        if text and ('₡' in text or '$' in text or 'confidencial' in text.lower()):
-                            job['salary'] = text
-                            break
-                except:
-                    pass
+            # Location: first line naming a place in the gazetteer
+            if not job['location']:
+                job['location'], _ = find_location(lines)
             
-            # Extract posting date
-            date_selectors = ['.date', '.posted-date', 'time', '[class*="fecha"]', '[class*="publicado"]']
-            for sel in date_selectors:
-                try:
-                    elem = modal.locator(sel).first
-                    if elem.count() > 0:
-                        text = elem.inner_text().strip()
-                        if text and ('2025' in text or '2024' in text or 'Oct' in text or 'hace' in text.lower()):
-                            job['posting_date'] = text
+            # Salary has money symbols or "confidencial"
+            if not job['salary']:
+                for line in lines:
+                    if '₡' in line or '$' in line or 'confidencial' in line.lower():
+                        if any(c.isdigit() for c in line) or 'confidencial' in line.lower():
+                            job['salary'] = line
                             break
-                except:
-                    pass
             
-            # Extract URL
-            try:
-                link = modal.locator('a[href*="/empleo/"], a[href*="/oferta/"]').first
-                if link.count() > 0:
-                    href = link.get_attribute('href')
-                    if href:
-                        job['url'] = href if href.startswith('http') else f"https://www.elempleo.com{href}"
-            except:
-                pass
-            
-            # If still missing data, try parsing all text
-            if not job['company'] or not job['location']:
-                try:
-                    modal_text = modal.inner_text()
-                    lines = [l.strip() for l in modal_text.split('\n') if l.strip()]
-                    
-                    # Company is often near the top
-                    if not job['company'] and len(lines) > 1:
-                        for line in lines[1:5]:
-                            # Skip if it's the title or other common words
-                            if line != job['title'] and len(line) > 3 and len(line) < 100:
-                                if not any(word in line.lower() for word in ['publicado', 'vista', 'aplicar']):
-                                    job['company'] = line
-                                    break
-                    
-                    # Location usually has city names
-                    if not job['location']:
-                        for line in lines:
-                            if any(city in line for city in ['San José', 'Heredia', 'Cartago', 'Alajuela', 'Limón', 'Guanacaste', 'Puntarenas']):
-                                job['location'] = line
-                                break
-                    
-                    # Salary has money symbols or "confidencial"
-                    if not job['salary']:
-                        for line in lines:
-                            if '₡' in line or '$' in line or 'confidencial' in line.lower():
-                                if any(c.isdigit() for c in line) or 'confidencial' in line.lower():
-                                    job['salary'] = line
-                                    break
-                    
-                    # Date has "Publicado" or dates
-                    if not job['posting_date']:
-                        for line in lines:
-                            if 'publicado' in line.lower() or re.search(r'\d{1,2}\s+(Oct|Nov|Dic|Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep)', line):
-                                job['posting_date'] = line
-                                break
-                    
-                except:
-                    pass
-            
-        except Exception as e:
-            logger.error(f"Error extracting from Quick View: {e}")
+            # Date has "Publicado" or dates
+            if not job['posting_date']:
+                for line in lines:
+                    if 'publicado' in line.lower() or re.search(r'\d{1,2}\s+(Oct|Nov|Dic|Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep)', line):
+                        job['posting_date'] = line
+                        break
         
+        self._normalize_location(job)
+        elapsed_ms = self._record_extraction(started)
+        logger.debug(f"  Quick View extracted in {elapsed_ms:.1f} ms (1 browser call, modal: {snapshot['selector']})")
         return job
     
+    def _record_extraction(self, started):
+        """Track per-job extraction latency; each snapshot is one IPC call"""
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.extract_times_ms.append(elapsed_ms)
+        self.extract_ipc_calls += 1
+        return elapsed_ms
+    
     def _close_modal(self, page):
         """Close the Quick View modal"""
         close_selectors = [
@@ -339,13 +499,13 @@ class ElempleoQuickViewScraper:
             logger.warning("⚠️  No jobs to save")
             return None
         
-        fieldnames = ['title', 'company', 'location', 'description', 'salary', 'posting_date', 'url']
+        fieldnames = ['title', 'company', 'location', 'map_location', 'description', 'salary', 'posting_date', 'url']
         
         try:
             with open(filename, 'w', newline='', encoding='utf-8-sig') as f:
                 writer = csv.DictWriter(f, fieldnames=fieldnames)
                 writer.writeheader()
-                writer.writerows(self.jobs)
+                writer.writerows(as_dicts(self.jobs, fieldnames))
             
             logger.info(f"\n✅ Saved {len(self.jobs)} jobs to {filename}")
             return filename
@@ -362,7 +522,7 @@ class ElempleoQuickViewScraper:
         print("📊 FIELD COVERAGE")
         print("="*70)
         
-        fields = ['title', 'company', 'location', 'description', 'salary', 'posting_date', 'url']
+        fields = ['title', 'company', 'location', 'map_location', 'description', 'salary', 'posting_date', 'url']
         
         for field in fields:
             count = sum(1 for job in self.jobs if job.get(field) and str(job[field]).strip())
@@ -370,6 +530,13 @@ class ElempleoQuickViewScraper:
             bar = '█' * int(pct / 2)
             print(f"  {field:15s} : {count:3d}/{len(self.jobs)} ({pct:5.1f}%) {bar}")
         
+        if self.extract_times_ms:
+            times = sorted(self.extract_times_ms)
+            avg = sum(times) / len(times)
+            p95 = times[min(len(times) - 1, int(len(times) * 0.95))]
+            print(f"\n⏱️  Quick View extraction: avg {avg:.1f} ms, p95 {p95:.1f} ms, "
+                  f"{self.extract_ipc_calls / len(times):.1f} browser calls/job")
+        
         print("="*70)
 
 
@@ -377,11 +544,10 @@ def main():
     scraper = ElempleoQuickViewScraper()
     
     print("\n🚀 Starting Elempleo Quick View Scraper...")
-    print("💡 This will click each 'Vista rápida' button to get full details")
-    print("👀 Watch the browser - you'll see each Quick View popup open\n")
+    print("💡 This will open each 'Vista rápida' in parallel tabs and keep the data it loads\n")
     
     # Scrape jobs (start with 20 for testing)
-    jobs = scraper.scrape(max_jobs=20)
+    jobs = scraper.scrape(max_jobs=20, mode='network')
     
     if jobs:
         # Save to CSV
@@ -393,9 +559,12 @@ def main():
         scraper.print_summary()
         
         print(f"\n✅ Complete! Output: {filename}")
-        print(f"📸 Quick View screenshots saved as: quick_view_1.png, quick_view_2.png, etc.\n")
+        if scraper.screenshot_every:
+            print(f"📸 Sampled Quick View screenshots saved as: quick_view_N.png\n")
     else:
-        print("\n⚠️  No jobs scraped. Check elempleo_listing.png to see the page\n")
+        print("\n⚠️  No jobs scraped. Check the debug artifacts to see the page:")
+        for path in scraper.debug.saved:
+            print(f"  - {path}")
 
 
 if __name__ == "__main__":
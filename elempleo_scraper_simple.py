@@ -11,12 +11,17 @@ from bs4 import BeautifulSoup
 from datetime import datetime
 import logging
 
+from selector_chain import save_selector_stats, select_all, select_one, selector_stats
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
 
+# Site key for the learned selector order (see selector_chain.py)
+SITE = 'elempleo-simple'
+
 
 class SimpleElempleoScraper:
     def __init__(self):
@@ -73,21 +78,19 @@ class SimpleElempleoScraper:
         except Exception as e:
             logger.error(f"Unexpected error: {e}")
         
+        save_selector_stats()
         logger.info(f"Total jobs scraped: {len(self.jobs)}")
+        logger.info("Selector lookups:\n" + selector_stats().report())
         return self.jobs
     
     def _extract_jobs_from_soup(self, soup):
         """
         Extract job listings from BeautifulSoup object
         """
-        # Try different common selectors
-        job_cards = (
-            soup.select('.card-offer') or
-            soup.select('.job-item') or
-            soup.select('article.job') or
-            soup.select('[data-job-id]') or
-            soup.select('.vacancy-card')
-        )
+        # Try different common selectors, last run's winner first
+        job_cards = select_all(soup, SITE, 'cards', [
+            '.card-offer', '.job-item', 'article.job', '[data-job-id]', '.vacancy-card',
+        ])
         
         if not job_cards:
             logger.warning("No job cards found with known selectors")
@@ -120,12 +123,7 @@ class SimpleElempleoScraper:
         }
         
         # Extract title
-        title_elem = (
-            card.select_one('h2 a') or
-            card.select_one('h3 a') or
-            card.select_one('.job-title a') or
-            card.select_one('a.title')
-        )
+        title_elem = select_one(card, SITE, 'title', ['h2 a', 'h3 a', '.job-title a', 'a.title'])
         if title_elem:
             job['title'] = title_elem.get_text(strip=True)
             href = title_elem.get('href', '')
@@ -133,47 +131,27 @@ class SimpleElempleoScraper:
                 job['url'] = href if href.startswith('http') else f"https://www.elempleo.com{href}"
         
         # Extract company
-        company_elem = (
-            card.select_one('.company') or
-            card.select_one('.company-name') or
-            card.select_one('.employer')
-        )
+        company_elem = select_one(card, SITE, 'company', ['.company', '.company-name', '.employer'])
         if company_elem:
             job['company'] = company_elem.get_text(strip=True)
         
         # Extract location
-        location_elem = (
-            card.select_one('.location') or
-            card.select_one('.job-location') or
-            card.select_one('.place')
-        )
+        location_elem = select_one(card, SITE, 'location', ['.location', '.job-location', '.place'])
         if location_elem:
             job['location'] = location_elem.get_text(strip=True)
         
         # Extract salary
-        salary_elem = (
-            card.select_one('.salary') or
-            card.select_one('.wage') or
-            card.select_one('.compensation')
-        )
+        salary_elem = select_one(card, SITE, 'salary', ['.salary', '.wage', '.compensation'])
         if salary_elem:
             job['salary'] = salary_elem.get_text(strip=True)
         
         # Extract date
-        date_elem = (
-            card.select_one('.date') or
-            card.select_one('.posted-date') or
-            card.select_one('time')
-        )
+        date_elem = select_one(card, SITE, 'posting_date', ['.date', '.posted-date', 'time'])
         if date_elem:
             job['posting_date'] = date_elem.get_text(strip=True)
         
         # Extract description
-        desc_elem = (
-            card.select_one('.description') or
-            card.select_one('.job-desc') or
-            card.select_one('.summary')
-        )
+        desc_elem = select_one(card, SITE, 'description', ['.description', '.job-desc', '.summary'])
         if desc_elem:
             job['description'] = desc_elem.get_text(strip=True)[:500]
         
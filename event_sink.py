@@ -0,0 +1,222 @@
+# event_sink.py
+# -----------------------------
+# Streams scraped jobs as newline-delimited JSON events, one per record,
+# as soon as each record is extracted.
+#
+# Event line:
+#   {"event": "new", "id": "1784512", "source_site": "elempleo",
+#    "at": "2025-10-23T16:39:23", "job": {...scraped fields...}}
+#   event is "new" (ID not seen before), "updated" or "removed".
+#
+# Targets (several may be combined):
+#   -  / stdout          standard output (progress output moves to stderr)
+#   unix:/run/jobs.sock  a Unix stream socket someone listens on; the sink
+#                        reconnects when the listener comes back and counts
+#                        the events it had to drop meanwhile
+#   path/events.ndjson   append-only file rotated at max_bytes into
+#                        events.ndjson.1 ... .<backups>
+#
+# Usage:
+#   sink = open_sink(["-", "events.ndjson"], known_ids=store.ids())
+#   sink.publish(job)               # "new" or "updated"
+#   sink.removed(job_id)
+#   python elempleo.py details --ids ids.txt --events unix:/run/jobs.sock
+# -----------------------------
+
+import json
+import os
+import socket
+import sys
+import time
+from datetime import datetime
+
+from discovery import job_id_from_row
+from job_record import JobRecord
+
+# ---------------------------------------------------------------
+# CONFIG
+# ---------------------------------------------------------------
+ROTATE_BYTES = 50 * 1024 * 1024
+ROTATE_BACKUPS = 5
+# Seconds between reconnect attempts to a Unix socket listener
+RECONNECT_EVERY = 5
+# Seconds a send may block on a listener that stopped reading
+SEND_TIMEOUT = 2
+EVENT_TYPES = ("new", "updated", "removed")
+
+
+# ---------------------------------------------------------------
+# 1️⃣  Line writers
+# ---------------------------------------------------------------
+class StreamWriter:
+    """Writes lines to a text stream (stdout by default), flushing each one."""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self.name = getattr(self.stream, "name", "stream")
+
+    def write_line(self, line):
+        self.stream.write(line + "\n")
+        self.stream.flush()
+        return True
+
+    def close(self):
+        self.stream.flush()
+
+
+class UnixSocketWriter:
+    """Writes lines to a Unix stream socket, reconnecting after the listener goes away."""
+
+    def __init__(self, path, reconnect_every=RECONNECT_EVERY, send_timeout=SEND_TIMEOUT):
+        self.path = path
+        self.name = f"unix:{path}"
+        self.reconnect_every = reconnect_every
+        self.send_timeout = send_timeout
+        self.sock = None
+        self.dropped = 0
+        self._next_attempt = 0.0
+        self._connect()
+
+    def _connect(self):
+        self._next_attempt = time.monotonic() + self.reconnect_every
+        try:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.send_timeout)
+            sock.connect(self.path)
+            self.sock = sock
+        except OSError as e:
+            print(f"⚠️ Event socket {self.path} unavailable: {e}")
+            self.sock = None
+
+    def write_line(self, line):
+        if self.sock is None and time.monotonic() >= self._next_attempt:
+            self._connect()
+        if self.sock is None:
+            self.dropped += 1
+            return False
+        try:
+            self.sock.sendall((line + "\n").encode("utf-8"))
+            return True
+        except OSError as e:
+            # Also a timeout: a half-sent line cannot be resumed, so reconnect later
+            print(f"⚠️ Event socket {self.path} closed: {e or 'send timed out'}")
+            self.sock.close()
+            self.sock = None
+            self.dropped += 1
+            return False
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+
+class RotatingFileWriter:
+    """Append-only NDJSON file, rotated to .1 ... .<backups> once it passes max_bytes."""
+
+    def __init__(self, path, max_bytes=ROTATE_BYTES, backups=ROTATE_BACKUPS):
+        self.path = path
+        self.name = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.file = open(path, "a", encoding="utf-8")
+
+    def _rotate(self):
+        self.file.close()
+        for n in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{n}"):
+                os.replace(f"{self.path}.{n}", f"{self.path}.{n + 1}")
+        if self.backups:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self.file = open(self.path, "a", encoding="utf-8")
+
+    def write_line(self, line):
+        if self.max_bytes and self.file.tell() >= self.max_bytes:
+            self._rotate()
+        self.file.write(line + "\n")
+        self.file.flush()
+        return True
+
+    def close(self):
+        self.file.close()
+
+
+def open_writer(spec, **kwargs):
+    """Writer for one target spec: '-'/'stdout', 'unix:PATH' or a file path."""
+    if spec in ("-", "stdout"):
+        return StreamWriter()
+    if spec.startswith("unix:"):
+        return UnixSocketWriter(spec[len("unix:"):])
+    return RotatingFileWriter(spec, **kwargs)
+
+
+# ---------------------------------------------------------------
+# 2️⃣  Event sink
+# ---------------------------------------------------------------
+class EventSink:
+    """Turns scraped records into new/updated/removed events for every writer."""
+
+    def __init__(self, writers, known_ids=None, source_site="elempleo"):
+        self.writers = list(writers)
+        self.known_ids = set(known_ids or ())
+        self.source_site = source_site
+        self.counts = dict.fromkeys(EVENT_TYPES, 0)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def uses_stdout(self):
+        return any(isinstance(w, StreamWriter) for w in self.writers)
+
+    def emit(self, event, job_id, job=None):
+        if event not in EVENT_TYPES:
+            raise ValueError(f"Unknown event {event!r}, expected one of {EVENT_TYPES}")
+        if isinstance(job, JobRecord):
+            job = job.to_dict()
+        line = json.dumps({
+            "event": event,
+            "id": str(job_id),
+            "source_site": (job or {}).get("source_site") or self.source_site,
+            "at": datetime.now().isoformat(timespec="seconds"),
+            "job": job,
+        }, ensure_ascii=False, separators=(",", ":"))
+        for writer in self.writers:
+            writer.write_line(line)
+        self.counts[event] += 1
+
+    def publish(self, job, job_id=None):
+        """Emit "new" for an unseen job ID, else "updated"; returns the event type."""
+        record = job.to_dict() if isinstance(job, JobRecord) else job
+        job_id = str(job_id or job_id_from_row(record) or "")
+        if not job_id:
+            return None
+        event = "updated" if job_id in self.known_ids else "new"
+        self.known_ids.add(job_id)
+        self.emit(event, job_id, record)
+        return event
+
+    def removed(self, job_id, job=None):
+        self.known_ids.discard(str(job_id))
+        self.emit("removed", job_id, job)
+
+    def report(self):
+        dropped = sum(getattr(w, "dropped", 0) for w in self.writers)
+        counts = ", ".join(f"{n} {event}" for event, n in self.counts.items())
+        return (f"📡 Events: {counts} -> {', '.join(w.name for w in self.writers)}"
+                + (f" ({dropped} dropped while the socket was down)" if dropped else ""))
+
+    def close(self):
+        for writer in self.writers:
+            writer.close()
+
+
+def open_sink(specs, known_ids=None, source_site="elempleo", **writer_kwargs):
+    """EventSink writing to every target in specs (see the module header)."""
+    return EventSink([open_writer(spec, **writer_kwargs) for spec in specs],
+                     known_ids=known_ids, source_site=source_site)
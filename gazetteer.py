@@ -0,0 +1,187 @@
+# gazetteer.py
+# -----------------------------
+# Location normalization backed by a bundled Costa Rica gazetteer.
+#  - cr_gazetteer.csv: provinces, all cantons and the main districts and
+#    localities, with coordinates of each place's head town
+#  - every name (and alias) is compiled into a token trie over
+#    accent/case-folded words, so "SAN JOSE", "San José" and "san jose"
+#    match the same entry and one pass over a line finds every name
+#  - ambiguous names ("San Rafael", "San Pedro") are resolved by the other
+#    names on the same line: "San Rafael, Escazú" is the Escazú district
+#  - names that are also surnames or common words (~Mora, ~Flores) only
+#    count when a safe place name appears on the same line
+#
+# Usage:
+#   place = locate("Escazú, San José, Costa Rica")
+#   place.label, place.map_location   # "Escazú, San José", "9.919,-84.139"
+#   line, place = find_location(card_lines)
+#   python gazetteer.py "San Rafael, Escazú" "Heredia"
+# -----------------------------
+
+import csv
+import os
+import re
+import sys
+import unicodedata
+from collections import namedtuple
+from functools import lru_cache
+
+# ---------------------------------------------------------------
+# CONFIG
+# ---------------------------------------------------------------
+# Country site whose locations the bundled gazetteer covers
+GAZETTEER_COUNTRY = "cr"
+GAZETTEER_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cr_gazetteer.csv")
+# More specific places win when nothing else on the line decides
+KIND_RANK = {"country": 0, "province": 1, "canton": 2, "district": 3}
+
+TOKEN_RE = re.compile(r"\w+")
+_END = ""
+
+
+class Place(namedtuple("Place", "name kind district canton province lat lon")):
+    __slots__ = ()
+
+    @property
+    def label(self):
+        """Normalized location: "District, Canton, Province" without repeats."""
+        parts = []
+        for part in (self.district, self.canton, self.province or self.name):
+            if part and part not in parts:
+                parts.append(part)
+        return ", ".join(parts)
+
+    @property
+    def map_location(self):
+        return f"{self.lat},{self.lon}"
+
+
+def fold(text):
+    """Lower-case, accent-free form used for matching ("Limón" -> "limon")."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def _tokens(text):
+    return TOKEN_RE.findall(fold(text))
+
+
+# ---------------------------------------------------------------
+# 1️⃣  Gazetteer
+# ---------------------------------------------------------------
+class Gazetteer:
+    """Token trie of place names with ancestry-aware resolution."""
+
+    def __init__(self, path=GAZETTEER_FILE):
+        self.trie = {}
+        self.places = []
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                names = row["names"].split("|")
+                name = names[0].lstrip("~")
+                kind = row["kind"]
+                place = Place(name, kind, name if kind == "district" else "",
+                              row["canton"], row["province"], float(row["lat"]), float(row["lon"]))
+                self.places.append(place)
+                for alias in names:
+                    self.add(alias.lstrip("~"), place, weak=alias.startswith("~"))
+
+    def add(self, name, place, weak=False):
+        node = self.trie
+        for token in _tokens(name):
+            node = node.setdefault(token, {})
+        node.setdefault(_END, []).append((place, weak))
+
+    def scan(self, text):
+        """Every place name in text as (token index, [(place, weak), ...]), leftmost-longest."""
+        tokens = _tokens(text)
+        hits = []
+        i = 0
+        while i < len(tokens):
+            node, j, end, entries = self.trie, i, None, None
+            while j < len(tokens) and tokens[j] in node:
+                node = node[tokens[j]]
+                j += 1
+                if _END in node:
+                    end, entries = j, node[_END]
+            if end is None:
+                i += 1
+            else:
+                hits.append((i, entries))
+                i = end
+        return hits
+
+    def locate(self, text):
+        """Best Place named in text, or None."""
+        hits = self.scan(text)
+        if not hits:
+            return None
+        strong = [any(not weak for _, weak in entries) for _, entries in hits]
+        best, best_key = None, None
+        for n, (start, entries) in enumerate(hits):
+            others = [hit for m, hit in enumerate(hits) if m != n]
+            # A bare shared name means the larger place ("San Rafael" the canton,
+            # not the Escazú district); across names the most specific one wins
+            candidates = []
+            for place, weak in entries:
+                if weak and not any(s for m, s in enumerate(strong) if m != n):
+                    continue
+                support = sum(1 for _, other in others if any(_contains(p, place) for p, _ in other))
+                candidates.append((support, -KIND_RANK[place.kind], place))
+            if not candidates:
+                continue
+            support, _, place = max(candidates, key=lambda c: c[:2])
+            key = (support, KIND_RANK[place.kind], -start)
+            if best_key is None or key > best_key:
+                best, best_key = place, key
+        return best
+
+
+def _contains(outer, inner):
+    """True when outer is the country, province or canton that inner lies in."""
+    if outer.kind == "country":
+        return inner.kind != "country"
+    if outer.kind == "province":
+        return inner.kind in ("canton", "district") and inner.province == outer.province
+    if outer.kind == "canton":
+        return inner.kind == "district" and inner.canton == outer.canton
+    return False
+
+
+_gazetteer = None
+
+
+def gazetteer():
+    """Process-wide gazetteer, loaded from GAZETTEER_FILE on first use."""
+    global _gazetteer
+    if _gazetteer is None:
+        _gazetteer = Gazetteer()
+    return _gazetteer
+
+
+@lru_cache(maxsize=16384)
+def locate(text):
+    """Memoized Gazetteer.locate(); card lines repeat across pages and runs."""
+    return gazetteer().locate(text) if text else None
+
+
+def find_location(lines):
+    """(line, Place) for the first line that names a place, else ("", None)."""
+    for line in lines:
+        place = locate(line)
+        if place is not None:
+            return line, place
+    return "", None
+
+
+def main():
+    for text in sys.argv[1:]:
+        place = locate(text)
+        if place is None:
+            print(f"{text!r}: no match")
+        else:
+            print(f"{text!r}: {place.label} ({place.kind}) @ {place.map_location}")
+
+
+if __name__ == "__main__":
+    main()
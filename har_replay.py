@@ -0,0 +1,254 @@
+# har_replay.py
+# -----------------------------
+# Record a real run's traffic to a HAR file and serve it back offline.
+#  - Playwright contexts: record_har_path on record, route_from_har on replay
+#  - requests sessions:   HarRecordingAdapter / HarReplayAdapter
+# Replaying lets extraction changes be profiled and compared on identical
+# input without touching the network.
+#
+# Round trip check (records, then replays, a local sitemap):
+#   python har_replay.py check
+# -----------------------------
+
+import base64
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import zipfile
+from datetime import datetime, timezone
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+
+# ---------------------------------------------------------------
+# 1️⃣  Playwright contexts
+# ---------------------------------------------------------------
+def har_context_options(record_har=None):
+    """Extra new_context()/launch_persistent_context() kwargs for recording."""
+    if not record_har:
+        return {}
+    # .har embeds bodies inline (readable by HarReplayAdapter too); .zip attaches them
+    content = "attach" if record_har.endswith(".zip") else "embed"
+    return {"record_har_path": record_har, "record_har_content": content}
+
+
+def har_part_path(path, part):
+    """HAR file for one part of a run: path itself for part 0, else -<part> before its extension.
+
+    Each relaunched browser context records to its own part, since a new
+    context would overwrite the previous one's file.
+    """
+    if not path or not part:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}-{part}{ext}"
+
+
+def apply_har_replay(context, replay_har=None):
+    """Serve every request of a context from a recorded HAR; unknown URLs are aborted."""
+    if replay_har:
+        context.route_from_har(replay_har, not_found="abort")
+        print(f"📼 Replaying browser traffic from {replay_har}")
+
+
+# ---------------------------------------------------------------
+# 2️⃣  HAR file access
+# ---------------------------------------------------------------
+def load_har(path):
+    """Load HAR JSON from a .har file or a Playwright .zip archive."""
+    if path.endswith(".zip"):
+        with zipfile.ZipFile(path) as archive:
+            return json.loads(archive.read("har.har"))
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _entry_body(entry, har_path):
+    content = entry["response"].get("content", {})
+    if "_file" in content:
+        if har_path.endswith(".zip"):
+            with zipfile.ZipFile(har_path) as archive:
+                return archive.read(content["_file"])
+        with open(os.path.join(os.path.dirname(har_path), content["_file"]), "rb") as f:
+            return f.read()
+    text = content.get("text") or ""
+    if content.get("encoding") == "base64":
+        return base64.b64decode(text)
+    return text.encode("utf-8")
+
+
+# ---------------------------------------------------------------
+# 3️⃣  requests adapters
+# ---------------------------------------------------------------
+class HarReplayAdapter(BaseAdapter):
+    """Answers requests from a HAR file; URLs that were not recorded get a 404."""
+
+    def __init__(self, har_path):
+        super().__init__()
+        self.har_path = har_path
+        self.entries = {}
+        for entry in load_har(har_path)["log"]["entries"]:
+            key = (entry["request"]["method"].upper(), entry["request"]["url"])
+            # Keep the last response recorded for a URL
+            self.entries[key] = entry
+        self.hits = 0
+        self.misses = 0
+
+    def send(self, request, **kwargs):
+        entry = self.entries.get((request.method.upper(), request.url))
+        response = requests.Response()
+        response.request = request
+        response.url = request.url
+        if entry is None:
+            self.misses += 1
+            response.status_code = 404
+            response.reason = "Not in HAR"
+            response._content = b""
+            response.raw = io.BytesIO(b"")
+            return response
+        self.hits += 1
+        recorded = entry["response"]
+        response.status_code = recorded["status"]
+        response.reason = recorded.get("statusText", "")
+        response.headers = CaseInsensitiveDict({
+            h["name"]: h["value"] for h in recorded.get("headers", [])
+            if h["name"].lower() not in ("content-encoding", "content-length")
+        })
+        response._content = _entry_body(entry, self.har_path)
+        # Streaming readers (sitemap discovery) read raw rather than content
+        response.raw = io.BytesIO(response._content)
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        return response
+
+    def close(self):
+        pass
+
+
+class HarRecordingAdapter(HTTPAdapter):
+    """Normal HTTP adapter that also appends every exchange to a HAR file."""
+
+    def __init__(self, har_path, **kwargs):
+        super().__init__(**kwargs)
+        self.har_path = har_path
+        self.entries = []
+        self._lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        started = datetime.now(timezone.utc)
+        response = super().send(request, **kwargs)
+        body = response.content
+        # Reading content drained raw; give streaming readers the body again
+        response.raw = io.BytesIO(body)
+        entry = {
+            "startedDateTime": started.isoformat(),
+            "time": response.elapsed.total_seconds() * 1000,
+            "request": {
+                "method": request.method,
+                "url": request.url,
+                "httpVersion": "HTTP/1.1",
+                "headers": [{"name": k, "value": v} for k, v in request.headers.items()],
+                "queryString": [], "cookies": [], "headersSize": -1, "bodySize": -1,
+            },
+            "response": {
+                "status": response.status_code,
+                "statusText": response.reason or "",
+                "httpVersion": "HTTP/1.1",
+                "headers": [{"name": k, "value": v} for k, v in response.headers.items()],
+                "cookies": [],
+                "content": {
+                    "size": len(body),
+                    "mimeType": response.headers.get("Content-Type", ""),
+                    "text": base64.b64encode(body).decode("ascii"),
+                    "encoding": "base64",
+                },
+                "redirectURL": response.headers.get("Location", ""),
+                "headersSize": -1, "bodySize": len(body),
+            },
+            "cache": {}, "timings": {"send": 0, "wait": 0, "receive": 0},
+        }
+        with self._lock:
+            self.entries.append(entry)
+        return response
+
+    def close(self):
+        self.save()
+        super().close()
+
+    def save(self):
+        har = {"log": {"version": "1.2", "creator": {"name": "elempleo-scraper", "version": "1"},
+                       "entries": self.entries}}
+        with open(self.har_path, "w", encoding="utf-8") as f:
+            json.dump(har, f)
+        print(f"📼 Recorded {len(self.entries)} HTTP exchanges to {self.har_path}")
+
+
+def mount_har(session, record_har=None, replay_har=None):
+    """Attach a recording or replaying adapter to a requests session."""
+    if replay_har:
+        adapter = HarReplayAdapter(replay_har)
+        print(f"📼 Replaying HTTP traffic from {replay_har}")
+    elif record_har:
+        adapter = HarRecordingAdapter(record_har)
+    else:
+        return None
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return adapter
+
+
+# ---------------------------------------------------------------
+# 4️⃣  Round trip check
+# ---------------------------------------------------------------
+CHECK_SITEMAP = b"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <url><loc>https://www.elempleo.com/cr/ofertas-trabajo/analista/1001</loc><lastmod>2025-10-01</lastmod></url>
+  <url><loc>https://www.elempleo.com/cr/ofertas-trabajo/bodeguero/1002</loc><lastmod>2025-10-02</lastmod></url>
+</urlset>"""
+
+
+def check_round_trip():
+    """Record sitemap discovery against a local server, then replay it offline."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    from discovery import iter_sitemap_jobs
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/xml")
+            self.send_header("Content-Length", str(len(CHECK_SITEMAP)))
+            self.end_headers()
+            self.wfile.write(CHECK_SITEMAP)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    roots = [f"http://127.0.0.1:{server.server_port}/sitemap.xml"]
+    with tempfile.TemporaryDirectory() as tmp:
+        har_path = os.path.join(tmp, "sitemaps.har")
+        session = requests.Session()
+        adapter = mount_har(session, record_har=har_path)
+        recorded = [job_id for job_id, _, _ in iter_sitemap_jobs(session, roots)]
+        adapter.close()
+        server.shutdown()
+
+        session = requests.Session()
+        mount_har(session, replay_har=har_path)
+        replayed = [job_id for job_id, _, _ in iter_sitemap_jobs(session, roots)]
+    expected = ["1001", "1002"]
+    ok = recorded == expected and replayed == expected
+    print(f"{'✅' if ok else '❌'} recorded {recorded}, replayed {replayed}, expected {expected}")
+    return ok
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["check"]:
+        sys.exit("usage: python har_replay.py check")
+    sys.exit(0 if check_round_trip() else 1)
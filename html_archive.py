@@ -0,0 +1,175 @@
+# html_archive.py
+# -----------------------------
+# Content-addressed archive of every fetched detail page.
+#  - blobs:  html_archive/blobs/ab/<sha256>.html.zst (or .html.gz without
+#            the optional zstandard package); identical pages stored once
+#  - index:  html_archive/index.db maps (job ID, fetch time) -> sha256
+# `reextract` re-runs the current extractor over the archive on every core,
+# so fixing an extraction bug corrects history without re-crawling.
+#
+# Usage:
+#   archive = HtmlArchive()
+#   archive.put(job_id, url, html)
+#   python elempleo.py reextract --out fixed.csv
+# -----------------------------
+
+import gzip
+import hashlib
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# ---------------------------------------------------------------
+# CONFIG
+# ---------------------------------------------------------------
+ARCHIVE_DIR = "html_archive"
+ZSTD_LEVEL = 10
+
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    job_id     TEXT NOT NULL,
+    fetched_at TEXT NOT NULL,
+    url        TEXT,
+    sha256     TEXT NOT NULL,
+    PRIMARY KEY (job_id, fetched_at)
+);
+CREATE INDEX IF NOT EXISTS pages_sha256 ON pages (sha256);
+"""
+
+
+# ---------------------------------------------------------------
+# 1️⃣  Blob codec
+# ---------------------------------------------------------------
+def _compress(data):
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data), ".html.zst"
+    return gzip.compress(data, compresslevel=6), ".html.gz"
+
+
+def read_blob(path):
+    """Decompress one archived page back to text."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError(f"{path} needs the zstandard package")
+        data = zstandard.ZstdDecompressor().decompress(data)
+    else:
+        data = gzip.decompress(data)
+    return data.decode("utf-8")
+
+
+# ---------------------------------------------------------------
+# 2️⃣  Archive
+# ---------------------------------------------------------------
+class HtmlArchive:
+    """Deduplicated, compressed store of raw detail pages."""
+
+    def __init__(self, root=ARCHIVE_DIR):
+        self.root = root
+        os.makedirs(os.path.join(root, "blobs"), exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(root, "index.db"))
+        self.conn.executescript(INDEX_SCHEMA)
+        self.stored = 0
+        self.deduplicated = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+    def blob_path(self, sha):
+        """Path of an existing blob (either codec), or None."""
+        base = os.path.join(self.root, "blobs", sha[:2], sha)
+        for ext in (".html.zst", ".html.gz"):
+            if os.path.exists(base + ext):
+                return base + ext
+        return None
+
+    def put(self, job_id, url, html, fetched_at=None):
+        """Archive one fetched page and return its sha256 ('' for empty pages)."""
+        if not html:
+            return ""
+        data = html.encode("utf-8")
+        sha = hashlib.sha256(data).hexdigest()
+        if self.blob_path(sha) is None:
+            blob, ext = _compress(data)
+            path = os.path.join(self.root, "blobs", sha[:2], sha + ext)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename so a crash never leaves a truncated blob
+            with open(path + ".tmp", "wb") as f:
+                f.write(blob)
+            os.replace(path + ".tmp", path)
+            self.stored += 1
+        else:
+            self.deduplicated += 1
+        fetched_at = fetched_at or datetime.now().isoformat(timespec="seconds")
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?)",
+                              (str(job_id), fetched_at, url, sha))
+        return sha
+
+    def get(self, sha):
+        path = self.blob_path(sha)
+        return read_blob(path) if path else None
+
+    def latest(self, job_id):
+        """Most recently fetched HTML for a job, or None."""
+        row = self.conn.execute("SELECT sha256 FROM pages WHERE job_id = ? ORDER BY fetched_at DESC LIMIT 1",
+                                (str(job_id),)).fetchone()
+        return self.get(row[0]) if row else None
+
+    def pages(self, latest_only=True, since=None):
+        """(job_id, fetched_at, url, sha256) rows, the newest fetch per job by default."""
+        sql = "SELECT job_id, MAX(fetched_at), url, sha256 FROM pages" if latest_only else \
+              "SELECT job_id, fetched_at, url, sha256 FROM pages"
+        params = []
+        if since:
+            sql += " WHERE fetched_at >= ?"
+            params.append(since)
+        if latest_only:
+            sql += " GROUP BY job_id"
+        sql += " ORDER BY job_id"
+        return self.conn.execute(sql, params).fetchall()
+
+    def report(self):
+        pages, blobs = self.conn.execute("SELECT COUNT(*), COUNT(DISTINCT sha256) FROM pages").fetchone()
+        return (f"🗃️ HTML archive: {self.stored} new pages stored, {self.deduplicated} deduplicated "
+                f"({pages} fetches, {blobs} unique pages in {self.root})")
+
+
+# ---------------------------------------------------------------
+# 3️⃣  Offline re-extraction
+# ---------------------------------------------------------------
+def _reextract_one(task):
+    """Worker: read one blob and run the current detail extractor on it."""
+    from elempleo_detail_scraper import parse_job_details
+
+    path, url = task
+    return parse_job_details(read_blob(path), url)
+
+
+def reextract(archive, latest_only=True, since=None, workers=None):
+    """Re-run the current extractor over archived pages on all cores; returns rows."""
+    tasks = []
+    for job_id, _, url, sha in archive.pages(latest_only=latest_only, since=since):
+        path = archive.blob_path(sha)
+        if path is None:
+            print(f"⚠️ Missing blob {sha} for job {job_id}")
+            continue
+        tasks.append((path, url))
+    if not tasks:
+        return []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_reextract_one, tasks, chunksize=max(1, len(tasks) // 64)))
@@ -0,0 +1,206 @@
+# job_record.py
+# -----------------------------
+# Compact in-memory representation of a scraped job.
+#
+# Every scraper builds a 26-key (HEADERS, "_job_*") or 30-key
+# (JobScraper.FIELDS) dict per job, and most values repeat ("Costa Rica",
+# "1", "0", "external", "Tiempo completo" ...). JobRecord stores the same
+# data in __slots__, interns categorical values so repeats share one string,
+# and keeps long descriptions zlib-compressed until they are read.
+#
+# JobRecord understands both naming schemes, so it can be built from any
+# scraper's dict and written by any CSV sink:
+#   record = JobRecord.from_dict(job)
+#   writer.writerows(as_dicts(records, HEADERS))
+#
+# Usage (memory comparison):
+#   python job_record.py 100000
+# -----------------------------
+
+import sys
+import zlib
+
+WP_PREFIX = "_job_"
+
+# Canonical field names (JobScraper.FIELDS plus the job ID); the WordPress
+# meta keys in HEADERS are these names with the "_job_" prefix.
+FIELDS = (
+    "id", "source_site", "title", "company", "description", "category", "type", "tag",
+    "featured", "featured_image", "filled", "urgent",
+    "expiry_date", "application_deadline_date", "posting_date",
+    "location", "address", "map_location",
+    "salary", "salary_type", "max_salary",
+    "experience", "career_level", "qualification", "gender",
+    "apply_type", "apply_url", "apply_email",
+    "video_url", "photos", "url",
+)
+
+# Low-cardinality values that repeat across most rows
+CATEGORICAL = frozenset({
+    "source_site", "category", "type", "tag", "featured", "filled", "urgent",
+    "expiry_date", "application_deadline_date", "posting_date",
+    "location", "address", "map_location", "salary", "salary_type", "max_salary",
+    "experience", "career_level", "qualification", "gender", "apply_type",
+    "apply_email", "video_url", "photos", "company",
+})
+
+# Descriptions shorter than this are kept as plain strings
+COMPRESS_MIN_CHARS = 256
+
+_STORED = tuple(f for f in FIELDS if f != "description") + ("_description",)
+
+
+def _canonical(key):
+    return key[len(WP_PREFIX):] if key.startswith(WP_PREFIX) else key
+
+
+def _store(value):
+    """Normalize a value for storage; booleans become '1'/'0' like the WP export."""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    return str(value)
+
+
+class JobRecord:
+    """One job, stored compactly. Behaves like a read/write mapping."""
+
+    __slots__ = _STORED
+
+    def __init__(self, **values):
+        for name in _STORED:
+            object.__setattr__(self, name, "")
+        for key, value in values.items():
+            self[key] = value
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a record from a scraper dict (plain or '_job_' keys)."""
+        record = cls()
+        for key, value in data.items():
+            if _canonical(key) in FIELDS:
+                record[key] = value
+        return record
+
+    # -- description is compressed lazily --------------------------------
+    @property
+    def description(self):
+        value = self._description
+        if isinstance(value, bytes):
+            return zlib.decompress(value).decode("utf-8")
+        return value
+
+    @description.setter
+    def description(self, value):
+        value = _store(value)
+        if len(value) >= COMPRESS_MIN_CHARS:
+            value = zlib.compress(value.encode("utf-8"))
+        object.__setattr__(self, "_description", value)
+
+    # -- mapping interface ------------------------------------------------
+    def __getitem__(self, key):
+        name = _canonical(key)
+        if name not in FIELDS:
+            raise KeyError(key)
+        return getattr(self, name)
+
+    def __setitem__(self, key, value):
+        name = _canonical(key)
+        if name not in FIELDS:
+            raise KeyError(key)
+        if name == "description":
+            self.description = value
+            return
+        value = _store(value)
+        if name in CATEGORICAL:
+            value = sys.intern(value)
+        object.__setattr__(self, name, value)
+
+    def __contains__(self, key):
+        return _canonical(key) in FIELDS
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return list(FIELDS)
+
+    def to_dict(self, fieldnames=FIELDS):
+        """Plain dict for the given field names (plain or '_job_' keys)."""
+        return {key: self[key] for key in fieldnames}
+
+    def __eq__(self, other):
+        if not isinstance(other, JobRecord):
+            return NotImplemented
+        return all(self[f] == other[f] for f in FIELDS)
+
+    def __repr__(self):
+        return f"JobRecord(id={self.id!r}, title={self.title!r})"
+
+
+def as_dicts(rows, fieldnames):
+    """Yield plain dicts for a CSV writer from JobRecords or dicts."""
+    for row in rows:
+        yield row.to_dict(fieldnames) if isinstance(row, JobRecord) else row
+
+
+# ---------------------------------------------------------------
+# Memory comparison
+# ---------------------------------------------------------------
+def _sample_job(i):
+    """A realistic detail-scraper row (mirrors HEADERS defaults)."""
+    return {
+        "_job_featured_image": "", "_job_title": f"Ejecutivo de ventas {i}",
+        "_job_featured": "1", "_job_filled": "0", "_job_urgent": "0",
+        "_job_description": ("Atender clientes, dar seguimiento a la cartera y cumplir metas. " * 8) + str(i),
+        "_job_category": "Ventas", "_job_type": "Tiempo completo", "_job_tag": "Costa Rica",
+        "_job_expiry_date": "2025-11-22", "_job_gender": "", "_job_apply_type": "external",
+        "_job_apply_url": f"https://www.elempleo.com/cr/ofertas-trabajo/ejecutivo/{870000 + i}",
+        "_job_apply_email": "info@elempleocr.com", "_job_salary_type": "",
+        "_job_salary": "Salario confidencial", "_job_max_salary": "",
+        "_job_experience": "2 años de experiencia", "_job_career_level": "Profesional",
+        "_job_qualification": "Universitario", "_job_video_url": "", "_job_photos": "",
+        "_job_application_deadline_date": "2025-11-22", "_job_address": "San José",
+        "_job_location": "San José", "_job_map_location": "San José",
+    }
+
+
+def compare_memory(count=100_000):
+    """Measure bytes held by `count` dict rows vs JobRecords."""
+    import tracemalloc
+
+    def measure(build):
+        tracemalloc.start()
+        rows = build()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del rows
+        return size
+
+    def build_dicts():
+        # Values are built per row, as the scrapers do when parsing pages
+        return [{k: "".join(v) for k, v in _sample_job(i).items()} for i in range(count)]
+
+    def build_records():
+        return [JobRecord.from_dict({k: "".join(v) for k, v in _sample_job(i).items()})
+                for i in range(count)]
+
+    return measure(build_dicts), measure(build_records)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    print(f"📏 Measuring {count} records ...")
+    dict_bytes, record_bytes = compare_memory(count)
+    saved = dict_bytes - record_bytes
+    print(f"  dict rows  : {dict_bytes / 1e6:8.1f} MB")
+    print(f"  JobRecord  : {record_bytes / 1e6:8.1f} MB")
+    print(f"  saved      : {saved / 1e6:8.1f} MB ({saved / dict_bytes * 100:.0f}%)")
+
+
+if __name__ == "__main__":
+    main()
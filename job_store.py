@@ -0,0 +1,387 @@
+# job_store.py
+# -----------------------------
+# Local SQLite store of every job we have scraped.
+#  - scrapers upsert rows by job ID; first_seen is kept, last_seen moves
+#  - jobs whose page is gone (or stayed blank EMPTY_FETCHES_REMOVED times in
+#    a row) are marked removed (removed_at) and no longer come up for
+#    refresh; seeing one again clears the mark
+#  - indexed on location, category, company and publish date
+#  - small query API so consumers do not re-read every historical CSV
+#  - FTS5 index over title, description, company and qualification,
+#    accent-insensitive and kept in sync by triggers as jobs are upserted
+#
+# Accepts rows from any scraper (plain, "_job_*" or JobRecord):
+#   with JobStore() as store:
+#       store.upsert(rows, source_site="elempleo")
+#       store.query(location="San José", since="2025-10-01")
+#       store.search("ingeniero electrico", location="Heredia")
+#
+# CLI: python elempleo.py jobs where location="San José" since=2025-10-01
+#      python elempleo.py jobs search ingeniero electrico location=Heredia
+# -----------------------------
+
+import csv
+import json
+import re
+import sqlite3
+from datetime import date, datetime
+
+from discovery import job_id_from_row
+from job_record import JobRecord, _canonical
+from normalize import add_days, parse_date
+
+# ---------------------------------------------------------------
+# CONFIG
+# ---------------------------------------------------------------
+DEFAULT_DB = "jobs.db"
+# Detail scrapers set the expiry date to publish date + this many days
+EXPIRY_DAYS = 30
+# Consecutive blank refreshes after which a job counts as removed
+EMPTY_FETCHES_REMOVED = 3
+# Columns that can be filtered with equality in query()
+FILTER_COLUMNS = ("location", "category", "company", "source_site", "type")
+LIST_COLUMNS = ("id", "publish_date", "title", "company", "location", "category", "url")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id           TEXT PRIMARY KEY,
+    source_site  TEXT COLLATE NOCASE,
+    title        TEXT,
+    company      TEXT COLLATE NOCASE,
+    location     TEXT COLLATE NOCASE,
+    category     TEXT COLLATE NOCASE,
+    type         TEXT COLLATE NOCASE,
+    salary       TEXT,
+    qualification TEXT,
+    publish_date TEXT,
+    expiry_date  TEXT,
+    url          TEXT,
+    description  TEXT,
+    data         TEXT,
+    first_seen   TEXT NOT NULL,
+    last_seen    TEXT NOT NULL,
+    removed_at   TEXT,
+    empty_fetches INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS jobs_location ON jobs (location);
+CREATE INDEX IF NOT EXISTS jobs_category ON jobs (category);
+CREATE INDEX IF NOT EXISTS jobs_company ON jobs (company);
+CREATE INDEX IF NOT EXISTS jobs_publish_date ON jobs (publish_date);
+"""
+
+# Full-text index over the text columns. unicode61 with remove_diacritics 2
+# folds case and accents ("técnico" == "tecnico"); prefix indexes keep
+# "ingenier*" queries fast. External content: text is only stored in jobs.
+FTS_COLUMNS = ("title", "description", "company", "qualification")
+# bm25 weights, in FTS_COLUMNS order: a title hit outranks a description hit
+FTS_WEIGHTS = (10.0, 1.0, 4.0, 2.0)
+
+FTS_SCHEMA = f"""
+CREATE VIRTUAL TABLE jobs_fts USING fts5(
+    {", ".join(FTS_COLUMNS)},
+    content='jobs', content_rowid='rowid',
+    tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+);
+CREATE TRIGGER jobs_fts_insert AFTER INSERT ON jobs BEGIN
+    INSERT INTO jobs_fts (rowid, {", ".join(FTS_COLUMNS)})
+    VALUES (new.rowid, {", ".join(f"new.{c}" for c in FTS_COLUMNS)});
+END;
+CREATE TRIGGER jobs_fts_delete AFTER DELETE ON jobs BEGIN
+    INSERT INTO jobs_fts (jobs_fts, rowid, {", ".join(FTS_COLUMNS)})
+    VALUES ('delete', old.rowid, {", ".join(f"old.{c}" for c in FTS_COLUMNS)});
+END;
+CREATE TRIGGER jobs_fts_update AFTER UPDATE ON jobs
+WHEN {" OR ".join(f"old.{c} IS NOT new.{c}" for c in FTS_COLUMNS)} BEGIN
+    INSERT INTO jobs_fts (jobs_fts, rowid, {", ".join(FTS_COLUMNS)})
+    VALUES ('delete', old.rowid, {", ".join(f"old.{c}" for c in FTS_COLUMNS)});
+    INSERT INTO jobs_fts (rowid, {", ".join(FTS_COLUMNS)})
+    VALUES (new.rowid, {", ".join(f"new.{c}" for c in FTS_COLUMNS)});
+END;
+INSERT INTO jobs_fts (jobs_fts) VALUES ('rebuild');
+"""
+SEARCH_COLUMNS = ("id", "title", "company", "location", "publish_date", "url")
+# Plain words are quoted so punctuation never reaches the FTS query parser
+FTS_SYNTAX_RE = re.compile(r'"|\b(?:AND|OR|NOT|NEAR)\b|[()^]')
+WORD_RE = re.compile(r"\w+\*?")
+
+COLUMNS = ("id", "source_site", "title", "company", "location", "category", "type", "salary",
+           "qualification", "publish_date", "expiry_date", "url", "description", "data", "first_seen", "last_seen")
+
+# Newer data wins; older snapshots imported later only move first_seen back
+UPSERT_SQL = f"""
+INSERT INTO jobs ({", ".join(COLUMNS)}) VALUES ({", ".join("?" for _ in COLUMNS)})
+ON CONFLICT(id) DO UPDATE SET
+    first_seen = MIN(first_seen, excluded.first_seen),
+    removed_at = CASE WHEN excluded.last_seen >= last_seen THEN NULL ELSE removed_at END,
+    empty_fetches = CASE WHEN excluded.last_seen >= last_seen THEN 0 ELSE empty_fetches END,
+    {", ".join(f"{c} = CASE WHEN excluded.last_seen >= last_seen THEN excluded.{c} ELSE {c} END"
+               for c in COLUMNS if c not in ("id", "first_seen"))}
+"""
+
+
+# ---------------------------------------------------------------
+# 1️⃣  Row mapping
+# ---------------------------------------------------------------
+def _publish_date(fields):
+    """ISO publish date from a posting/publish field, else expiry - EXPIRY_DAYS."""
+    published = parse_date(fields.get("posting_date") or fields.get("publish_date") or "")
+    if published:
+        return published
+    expiry = parse_date(fields.get("expiry_date") or "")
+    return add_days(expiry, -EXPIRY_DAYS) if expiry else ""
+
+
+def store_values(row, seen_at, source_site=None):
+    """Tuple of COLUMNS values for a scraped row, or None when it has no usable ID."""
+    if isinstance(row, JobRecord):
+        row = row.to_dict()
+    fields = {_canonical(key): value for key, value in row.items()}
+    url = fields.get("url") or fields.get("apply_url") or ""
+    source_site = fields.get("source_site") or source_site or ""
+    job_id = job_id_from_row(row)
+    if not job_id and url:
+        # Other boards' URLs carry no numeric ID; the URL itself is unique
+        job_id = f"{source_site}:{url}" if source_site else url
+    if not job_id:
+        return None
+    text = {key: "" if value is None else str(value) for key, value in fields.items()}
+    return (
+        job_id, source_site, text.get("title", ""), text.get("company", ""),
+        text.get("location", ""), text.get("category", ""), text.get("type", ""),
+        text.get("salary", ""), text.get("qualification", ""), _publish_date(text), parse_date(text.get("expiry_date", "")),
+        url, text.get("description", ""),
+        json.dumps({key: "" if value is None else str(value) for key, value in row.items()},
+                   ensure_ascii=False),
+        seen_at, seen_at,
+    )
+
+
+# ---------------------------------------------------------------
+# 2️⃣  Store
+# ---------------------------------------------------------------
+class JobStore:
+    """SQLite-backed job table keyed by job ID."""
+
+    def __init__(self, path=DEFAULT_DB):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        """Bring stores created by older versions up to the current schema."""
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(jobs)")}
+        if "qualification" not in columns:
+            self.conn.execute("ALTER TABLE jobs ADD COLUMN qualification TEXT")
+            with self.conn:
+                for job_id, data in self.conn.execute("SELECT id, data FROM jobs").fetchall():
+                    fields = {_canonical(k): v for k, v in json.loads(data or "{}").items()}
+                    self.conn.execute("UPDATE jobs SET qualification = ? WHERE id = ?",
+                                      (fields.get("qualification", ""), job_id))
+        if "removed_at" not in columns:
+            self.conn.execute("ALTER TABLE jobs ADD COLUMN removed_at TEXT")
+        if "empty_fetches" not in columns:
+            self.conn.execute("ALTER TABLE jobs ADD COLUMN empty_fetches INTEGER NOT NULL DEFAULT 0")
+        exists = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'jobs_fts'").fetchone()
+        if not exists:
+            # Creates the index and triggers, then indexes rows already stored
+            with self.conn:
+                self.conn.executescript(FTS_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def upsert(self, rows, source_site=None, seen_at=None):
+        """Insert or update rows in one transaction; returns (inserted, updated)."""
+        seen_at = seen_at or datetime.now().isoformat(timespec="seconds")
+        values = [v for v in (store_values(row, seen_at, source_site) for row in rows) if v]
+        if not values:
+            return 0, 0
+        before = self.count()
+        with self.conn:
+            self.conn.executemany(UPSERT_SQL, values)
+        inserted = self.count() - before
+        return inserted, len(values) - inserted
+
+    def mark_removed(self, job_ids, seen_at=None):
+        """Record that these jobs' pages are gone; their last content is kept."""
+        seen_at = seen_at or datetime.now().isoformat(timespec="seconds")
+        with self.conn:
+            self.conn.executemany("UPDATE jobs SET removed_at = ?, last_seen = ? WHERE id = ?",
+                                  [(seen_at, seen_at, job_id) for job_id in job_ids])
+
+    def record_empty_fetch(self, job_ids, removed_after=EMPTY_FETCHES_REMOVED, seen_at=None):
+        """Count a blank refresh of each job; returns the IDs now marked removed.
+
+        A blank page may be transient (challenge, half render), so a job is
+        only marked removed once removed_after refreshes in a row were blank.
+        """
+        job_ids = list(job_ids)
+        with self.conn:
+            self.conn.executemany("UPDATE jobs SET empty_fetches = empty_fetches + 1 WHERE id = ?",
+                                  [(job_id,) for job_id in job_ids])
+        gone = [job_id for job_id in job_ids if self.conn.execute(
+            "SELECT 1 FROM jobs WHERE id = ? AND removed_at IS NULL AND empty_fetches >= ?",
+            (job_id, removed_after)).fetchone()]
+        self.mark_removed(gone, seen_at)
+        return gone
+
+    def import_csv(self, path, source_site=None):
+        """Upsert a snapshot CSV; rows are marked as seen at the file's timestamp."""
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            return self.upsert(csv.DictReader(f), source_site=source_site, seen_at=_snapshot_time(path))
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+    def ids(self):
+        return {row[0] for row in self.conn.execute("SELECT id FROM jobs")}
+
+    def due_for_refresh(self, limit, seen_before, today=None):
+        """IDs of live jobs last seen before seen_before, nearest expiry first.
+
+        Removed jobs and jobs already past their expiry date are skipped;
+        jobs without one go last.
+        """
+        today = today or date.today().isoformat()
+        rows = self.conn.execute(
+            "SELECT id FROM jobs WHERE last_seen < ? AND removed_at IS NULL "
+            "AND (COALESCE(expiry_date, '') = '' OR expiry_date >= ?) "
+            "ORDER BY COALESCE(expiry_date, '') = '', expiry_date, last_seen LIMIT ?",
+            (seen_before, today, int(limit)),
+        )
+        return [row[0] for row in rows]
+
+    def get(self, job_id):
+        row = self.conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def query(self, since=None, until=None, seen_since=None, limit=None, columns=LIST_COLUMNS, **filters):
+        """Jobs matching equality filters (case-insensitive) and a publish date range.
+
+        filters: any of FILTER_COLUMNS, e.g. location="San José".
+        since/until: ISO publish dates (inclusive); seen_since: last_seen lower bound.
+        """
+        where, params = _filter_clauses(filters, since, until, seen_since)
+        sql = f"SELECT {', '.join(columns)} FROM jobs"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY publish_date DESC, id"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def search(self, text, limit=20, columns=SEARCH_COLUMNS, since=None, until=None, seen_since=None,
+               **filters):
+        """Ranked full-text search over FTS_COLUMNS, best match first.
+
+        text: plain words (accents/case ignored, "word*" for prefixes) or raw
+        FTS5 syntax ("a b" phrases, OR, NOT, NEAR). Filters and dates as in
+        query(). Raises ValueError for a query FTS5 cannot parse.
+        """
+        match = fts_query(text)
+        where, params = _filter_clauses(filters, since, until, seen_since, table="jobs.")
+        join = " JOIN jobs ON jobs.rowid = jobs_fts.rowid" if where else ""
+        where, params = ["jobs_fts MATCH ?"] + where, [match] + params
+        weights = ", ".join(str(w) for w in FTS_WEIGHTS)
+        try:
+            top = self.conn.execute(
+                f"SELECT jobs_fts.rowid, bm25(jobs_fts, {weights}) AS score FROM jobs_fts{join} "
+                f"WHERE {' AND '.join(where)} ORDER BY score LIMIT ?",
+                params + [int(limit)],
+            ).fetchall()
+        except sqlite3.OperationalError as e:
+            raise ValueError(f"Cannot search for {text!r}: {e}") from e
+        # Snippets are only built for the rows returned, not for every match
+        sql = (f"SELECT {', '.join(f'jobs.{c}' for c in columns)}, "
+               f"snippet(jobs_fts, 1, '[', ']', '…', 12) AS snippet "
+               f"FROM jobs_fts JOIN jobs ON jobs.rowid = jobs_fts.rowid "
+               f"WHERE jobs_fts MATCH ? AND jobs_fts.rowid = ?")
+        results = []
+        for rowid, score in top:
+            row = dict(self.conn.execute(sql, (match, rowid)).fetchone())
+            row["score"] = round(score, 3)
+            results.append(row)
+        return results
+
+    def stats(self):
+        """Row counts per source site and the date range held."""
+        return {
+            "jobs": self.count(),
+            "by_site": dict(self.conn.execute(
+                "SELECT source_site, COUNT(*) FROM jobs GROUP BY source_site").fetchall()),
+            "first_seen": self.conn.execute("SELECT MIN(first_seen) FROM jobs").fetchone()[0],
+            "last_seen": self.conn.execute("SELECT MAX(last_seen) FROM jobs").fetchone()[0],
+        }
+
+
+def _snapshot_time(path):
+    """Timestamp embedded in a snapshot name (..._YYYYmmdd_HHMMSS.csv), else now."""
+    stem = path.rsplit(".", 1)[0]
+    try:
+        return datetime.strptime(stem[-15:], "%Y%m%d_%H%M%S").isoformat(timespec="seconds")
+    except ValueError:
+        return datetime.now().isoformat(timespec="seconds")
+
+
+def save_to_store(rows, path=DEFAULT_DB, source_site=None):
+    """Upsert a run's results and print what changed."""
+    with JobStore(path) as store:
+        inserted, updated = store.upsert(rows, source_site=source_site)
+        print(f"🗄️ {path}: {inserted} new, {updated} updated ({store.count()} jobs stored)")
+    return inserted, updated
+
+
+def _filter_clauses(filters, since=None, until=None, seen_since=None, table=""):
+    """WHERE clauses and parameters shared by query() and search()."""
+    where, params = [], []
+    for column, value in filters.items():
+        if column not in FILTER_COLUMNS:
+            raise ValueError(f"Cannot filter on {column!r}, expected one of {FILTER_COLUMNS}")
+        where.append(f"{table}{column} = ?")
+        params.append(value)
+    if since:
+        where.append(f"{table}publish_date >= ?")
+        params.append(since)
+    if until:
+        where.append(f"{table}publish_date <= ?")
+        params.append(until)
+    if seen_since:
+        where.append(f"{table}last_seen >= ?")
+        params.append(seen_since)
+    return where, params
+
+
+def fts_query(text):
+    """FTS5 MATCH expression for user text: words are quoted and ANDed.
+
+    Text with FTS5 syntax is passed through, unless its quotes are
+    unbalanced ('bodega"'); then only its words are searched.
+    """
+    if FTS_SYNTAX_RE.search(text) and text.count('"') % 2 == 0:
+        return text
+    words = WORD_RE.findall(text)
+    if not words:
+        raise ValueError(f"Nothing to search for in {text!r}")
+    return " ".join(f'"{w[:-1]}"*' if w.endswith("*") else f'"{w}"' for w in words)
+
+
+def parse_terms(terms):
+    """Turn ['location=San José', 'since=2025-10-01'] into query() kwargs."""
+    kwargs = {}
+    for term in terms:
+        key, sep, value = term.partition("=")
+        if not sep:
+            raise ValueError(f"Expected key=value, got {term!r}")
+        kwargs[key.strip().replace("-", "_")] = value.strip()
+    return kwargs
@@ -0,0 +1,373 @@
+# multi_country.py
+# -----------------------------
+# Crawls several elempleo country sites in one run instead of one serial
+# run per country.
+#  - details: one browser context serves every country; each country gets
+#    its own detail page (and listing page) in it, and one parse pool
+#    extracts the HTML of all of them
+#  - the scheduler starts a page load on whichever country its rate limit
+#    lets go and reads pages back once they have settled, so one site's
+#    settle and rate-limit waits are spent loading the other sites
+#  - sitemap discovery runs per country in background threads over one
+#    shared requests.Session; the API stage fetches every country in its
+#    own thread through the scrape.SESSION connection pool
+#  - each country writes its own partition: snapshot CSV, job store,
+#    sitemap state and HTML archive (see countries.partition)
+#
+# Usage:
+#   python elempleo.py details --country cr,co,pa --source sitemap --rate 0.5 --rate co=0.2
+#   python elempleo.py details --country cr,co --ids ids.txt    # "co:1784512" lines
+#   python elempleo.py api --country cr,co
+# -----------------------------
+
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from countries import DEFAULT_RATE, RateLimiter, parse_countries, partition
+from detail_engine import MAX_RSS_MB, RECYCLE_PAGE_EVERY, RSS_CHECK_EVERY, process_tree_rss_mb
+from discovery import SITEMAP_STATE_FILE, SitemapState, load_known_ids, sitemap_job_ids
+from html_archive import ARCHIVE_DIR, HtmlArchive
+from job_record import JobRecord
+from pipeline import IdStream
+
+# ---------------------------------------------------------------
+# CONFIG
+# ---------------------------------------------------------------
+# Seconds a rendered detail page is left to settle before it is read
+SETTLE = 3
+LISTING_SCROLLS = 15
+# How often an idle scheduler checks the sitemap streams for new IDs
+IDLE_POLL = 0.2
+SOURCE_SITE = "elempleo"
+
+
+# ---------------------------------------------------------------
+# 1️⃣  Detail pages
+# ---------------------------------------------------------------
+class CountryLane:
+    """One country's share of a crawl: its ID source, page, rate limit and results."""
+
+    def __init__(self, country, rate, known_ids=None, archive=None, sitemap_state=None):
+        self.country = country
+        self.rate = rate
+        self.limiter = RateLimiter(rate)
+        self.known_ids = set(known_ids or ())
+        self.archive = archive
+        self.sitemap_state = sitemap_state
+        self.ids = iter(())
+        self.seen = set()
+        self.page = None
+        self.jobs_on_page = 0
+        # (job_id, job_url, ready_at) while a page is loading
+        self.loading = None
+        self.exhausted = False
+        self.results = []
+        self.fetched = 0
+        self.failed = 0
+
+    @property
+    def done(self):
+        return self.exhausted and self.loading is None
+
+    def next_id(self):
+        """Next unseen job ID, or None when none is ready yet (sets exhausted at the end)."""
+        while True:
+            try:
+                job_id = self.ids.poll() if isinstance(self.ids, IdStream) else next(self.ids)
+            except StopIteration:
+                self.exhausted = True
+                return None
+            except Exception as e:
+                print(f"❌ {self.country.name}: discovery stopped early: {e}")
+                self.exhausted = True
+                return None
+            if job_id is None:
+                return None
+            job_id = str(job_id)
+            if job_id not in self.seen and job_id not in self.known_ids:
+                self.seen.add(job_id)
+                return job_id
+
+    def report(self):
+        return (f"🌎 {self.country.name}: {len(self.results)} jobs, {self.fetched} pages, "
+                f"{self.failed} failed (limit {self.rate:g} req/s)")
+
+
+class MultiCountryCrawl:
+    """Scrapes the detail pages of several countries in one interleaved run.
+
+    Usage:
+        crawl = MultiCountryCrawl(["cr", "co"], discovery="sitemap", rates={"co": 0.2})
+        crawl.run()
+        crawl.save(db="jobs.db")      # one CSV, store and sitemap state per country
+    """
+
+    def __init__(self, countries, discovery="scroll", rates=None, default_rate=DEFAULT_RATE,
+                 incremental=False, profile="fresh", asset_cache=False, parse_workers=None,
+                 archive_dir=ARCHIVE_DIR, max_scrolls=LISTING_SCROLLS, settle=SETTLE,
+                 recycle_every=RECYCLE_PAGE_EVERY, max_rss_mb=MAX_RSS_MB, compact=False,
+                 record_har=None, replay_har=None, events=None):
+        if discovery not in ("scroll", "sitemap"):
+            raise ValueError(f"Unknown discovery {discovery!r}, expected 'scroll' or 'sitemap'")
+        self.countries = parse_countries(countries)
+        self.discovery = discovery
+        self.rates = dict(rates or {})
+        self.default_rate = default_rate
+        self.incremental = incremental
+        self.profile = profile
+        self.asset_cache = asset_cache
+        self.parse_workers = parse_workers
+        self.archive_dir = archive_dir
+        self.max_scrolls = max_scrolls
+        # Replayed pages are served locally and need no settle time
+        self.settle = 0 if replay_har else settle
+        # Browser traffic goes to record_har; sitemap requests to its "-sitemaps" part
+        self.record_har = record_har
+        self.replay_har = replay_har
+        self.recycle_every = recycle_every
+        # The shared browser is relaunched when browser + Python RSS passes this
+        self.max_rss_mb = max_rss_mb
+        # Hold results as JobRecords instead of dicts (large runs)
+        self.compact = compact
+        self.pages_started = 0
+        # Optional event_sink.EventSink shared by every country
+        self.events = events
+        self.lanes = []
+        self.relaunches = 0
+        # Parsed records come back in submission order
+        self._submitted = deque()
+
+    def run(self, job_ids=None):
+        """Crawl every country; job_ids ({Country: [ids]}) skips discovery. Returns the lanes."""
+        from playwright.sync_api import sync_playwright
+
+        from browser_profile import BrowserSession
+        from elempleo_detail_scraper import parse_job_details
+        from har_replay import har_part_path, mount_har
+        from parse_pool import ParsePool
+
+        http = adapter = None
+        if job_ids is None and self.discovery == "sitemap":
+            import requests
+            http = requests.Session()
+            adapter = mount_har(http, har_part_path(self.record_har, "sitemaps"),
+                                har_part_path(self.replay_har, "sitemaps"))
+        self.lanes = [self._lane(country) for country in self.countries]
+        started = time.perf_counter()
+        print(f"🚀 Crawling {', '.join(c.name for c in self.countries)} in one browser")
+        try:
+            with ParsePool(parse_job_details, workers=self.parse_workers) as pool, \
+                    sync_playwright() as p, \
+                    BrowserSession(p, profile=self.profile, asset_cache=self.asset_cache,
+                                   record_har=self.record_har, replay_har=self.replay_har) as session:
+                for lane in self.lanes:
+                    lane.ids = self._ids(lane, session, http, job_ids)
+                self._schedule(session, pool)
+                self._collect(pool.drain())
+                if pool.waits:
+                    print(f"⏳ Fetching waited on the parse pool {pool.waits} times; consider more --parse-workers")
+        finally:
+            for lane in self.lanes:
+                if isinstance(lane.ids, IdStream):
+                    lane.ids.close()
+                if lane.archive is not None:
+                    lane.archive.close()
+            if adapter is not None:
+                adapter.close()
+        elapsed = time.perf_counter() - started
+        for lane in self.lanes:
+            print(lane.report())
+        fetched = sum(lane.fetched for lane in self.lanes)
+        print(f"⏱️ {fetched} pages in {elapsed:.1f}s ({fetched / elapsed if elapsed else 0:.2f} pages/s), "
+              f"{self.relaunches} browser relaunches")
+        return self.lanes
+
+    def save(self, db=None):
+        """Write each country's snapshot CSV (and job store partition); saves sitemap state."""
+        from elempleo_detail_scraper import save_to_csv
+
+        for lane in self.lanes:
+            if lane.results:
+                save_to_csv(lane.results, country=lane.country)
+                if db:
+                    from job_store import save_to_store
+                    save_to_store(lane.results, partition(db, lane.country), source_site=SOURCE_SITE)
+            if lane.sitemap_state is not None:
+                lane.sitemap_state.save()
+
+    # -- setup -----------------------------------------------------------------
+    def _lane(self, country):
+        known_ids = load_known_ids(country=country) if self.incremental else set()
+        archive = HtmlArchive(partition(self.archive_dir, country)) if self.archive_dir else None
+        state = SitemapState(partition(SITEMAP_STATE_FILE, country))
+        # Other runs still confirm the lastmods a 'discover --source sitemap' run left pending
+        if not state.load_pending() and self.discovery != "sitemap":
+            state = None
+        return CountryLane(country, self.rates.get(country.code, self.default_rate), known_ids, archive, state)
+
+    def _ids(self, lane, session, http, job_ids):
+        if job_ids is not None:
+            return iter(job_ids.get(lane.country, ()))
+        if self.discovery == "sitemap":
+            return IdStream(lambda: sitemap_job_ids(lane.sitemap_state, lane.known_ids, session=http,
+                                                    country=lane.country),
+                            known_ids=lane.known_ids).start()
+        # The listing needs the browser, so it scrolls on its own page in the
+        # scheduler's thread; each scroll is pulled only when the lane needs IDs
+        from elempleo_detail_scraper import iter_listing_ids
+        return iter_listing_ids(session.new_page(), lane.known_ids or None, self.max_scrolls,
+                                scroll_delay=0 if self.replay_har else 1.5, settle=0 if self.replay_har else 4,
+                                accept_consent=session.accept_consent, country=lane.country)
+
+    # -- scheduling ------------------------------------------------------------
+    def _schedule(self, session, pool):
+        while not all(lane.done for lane in self.lanes):
+            progressed = False
+            waits = []
+            for lane in self.lanes:
+                if lane.loading is not None:
+                    wait = lane.loading[2] - time.monotonic()
+                    if wait > 0:
+                        waits.append(wait)
+                        continue
+                    self._finish(lane, pool)
+                    progressed = True
+                if lane.exhausted:
+                    continue
+                delay = lane.limiter.delay()
+                if delay:
+                    waits.append(delay)
+                    continue
+                job_id = lane.next_id()
+                if job_id is None:
+                    waits.append(IDLE_POLL)
+                    continue
+                self._start(session, lane, job_id)
+                progressed = True
+            if not progressed and waits:
+                time.sleep(min(waits))
+
+    def _start(self, session, lane, job_id):
+        self._check_memory(session)
+        self.pages_started += 1
+        lane.limiter.acquire()
+        job_url = f"{lane.country.detail_url}{job_id}"
+        print(f"[{lane.country.code} {lane.fetched + lane.failed + 1}] Scraping {job_url} ...")
+        try:
+            page = self._page(session, lane)
+            page.goto(job_url, wait_until="load", timeout=60000)
+            lane.loading = (job_id, job_url, time.monotonic() + self.settle)
+        except Exception as e:
+            print(f"❌ Error loading {job_url}: {e}")
+            lane.failed += 1
+            self._drop_page(lane)
+
+    def _finish(self, lane, pool):
+        job_id, job_url, _ = lane.loading
+        lane.loading = None
+        try:
+            html = lane.page.content()
+        except Exception as e:
+            print(f"❌ Error reading {job_url}: {e}")
+            lane.failed += 1
+            self._drop_page(lane)
+            return
+        lane.fetched += 1
+        if lane.archive is not None:
+            lane.archive.put(job_id, job_url, html)
+        self._submitted.append((lane, job_id))
+        self._collect(pool.submit(html, job_url))
+
+    def _collect(self, records):
+        from elempleo_detail_scraper import has_content
+
+        for job in records:
+            lane, job_id = self._submitted.popleft()
+            if lane.sitemap_state is not None and has_content(job):
+                lane.sitemap_state.confirm(job_id)
+            if self.events is not None and has_content(job):
+                self.events.publish(job, job_id)
+            lane.results.append(JobRecord.from_dict(job) if self.compact else job)
+
+    # -- pages -----------------------------------------------------------------
+    def _page(self, session, lane):
+        """The lane's detail page, replaced every recycle_every jobs or after an error."""
+        if lane.page is not None and (lane.page.is_closed() or
+                                      (self.recycle_every and lane.jobs_on_page >= self.recycle_every)):
+            self._drop_page(lane)
+        if lane.page is None:
+            try:
+                lane.page = session.new_page()
+            except Exception as e:
+                self._relaunch(session, f"cannot open a page: {e}")
+                lane.page = session.new_page()
+            lane.jobs_on_page = 0
+        lane.jobs_on_page += 1
+        return lane.page
+
+    def _drop_page(self, lane):
+        if lane.page is not None:
+            try:
+                lane.page.close()
+            except Exception:
+                pass
+        lane.page = None
+
+    def _check_memory(self, session):
+        if not self.max_rss_mb or not self.pages_started or self.pages_started % RSS_CHECK_EVERY:
+            return
+        rss = process_tree_rss_mb()
+        if rss > self.max_rss_mb:
+            self._relaunch(session, f"RSS {rss:.0f} MB > {self.max_rss_mb} MB")
+
+    def _relaunch(self, session, reason):
+        """Restart the shared browser; pages still loading on it count as failed."""
+        print(f"♻️ Relaunching browser ({reason})")
+        try:
+            session.close()
+        except Exception as e:
+            print(f"⚠️ Error while closing crashed browser: {e}")
+        session.open()
+        self.relaunches += 1
+        for lane in self.lanes:
+            lane.page = None
+            if lane.loading is not None:
+                lane.loading = None
+                lane.failed += 1
+
+
+# ---------------------------------------------------------------
+# 2️⃣  JSON API
+# ---------------------------------------------------------------
+def fetch_api(ids_by_country=None, rates=None, default_rate=DEFAULT_RATE, countries=None):
+    """Fetch API records for several countries at once, one thread per country.
+
+    ids_by_country maps Country -> job IDs; without it each country's IDs
+    come from its sitemaps. All threads share scrape.SESSION (and its
+    connection pool). Returns {Country: [jobs]}.
+    """
+    import scrape
+
+    if ids_by_country is None:
+        ids_by_country = {country: None for country in parse_countries(countries)}
+    rates = dict(rates or {})
+
+    def work(country, job_ids):
+        limiter = RateLimiter(rates.get(country.code, default_rate))
+        total = "?" if job_ids is None else len(job_ids)
+        if job_ids is None:
+            # API calls start while the remaining sitemaps are still being read
+            job_ids = IdStream(lambda: sitemap_job_ids(session=scrape.SESSION, country=country))
+        jobs = []
+        for idx, job_id in enumerate(job_ids, 1):
+            limiter.acquire()
+            job = scrape.get_job_details(job_id, country)
+            if job:
+                jobs.append(job)
+                print(f"[{country.code} {idx}/{total}] ✓ {(job['title'] or '')[:60]}")
+        return jobs
+
+    with ThreadPoolExecutor(max_workers=max(1, len(ids_by_country)), thread_name_prefix="api") as executor:
+        futures = {country: executor.submit(work, country, job_ids) for country, job_ids in ids_by_country.items()}
+    return {country: future.result() for country, future in futures.items()}
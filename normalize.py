@@ -0,0 +1,296 @@
+# normalize.py
+# -----------------------------
+# Salary and date normalization for scraped job rows.
+# Turns raw strings like "₡850.000 - ₡1.200.000 mensuales", "Salario confidencial",
+# "Publicado hace 3 días" or "22 de octubre de 2025" into typed values.
+#
+# The parsers are LRU-memoized: the same strings repeat across thousands of
+# rows, so most calls are cache hits.
+#
+# Usage:
+#   python normalize.py elempleo_job_details_20251023_163923.csv
+# -----------------------------
+
+import csv
+import re
+import sys
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+Salary = namedtuple("Salary", "min max currency period confidential")
+EMPTY_SALARY = Salary(None, None, "", "", False)
+
+# ---------------------------------------------------------------
+# CONFIG
+# ---------------------------------------------------------------
+CURRENCY_MARKERS = [
+    ("CRC", ("₡", "¢", "colones", "crc")),
+    ("USD", ("$", "usd", "dólares", "dolares")),
+]
+PERIOD_MARKERS = [
+    ("Por hora", ("por hora", "/hora", "x hora")),
+    ("Semanal", ("semanal", "por semana")),
+    ("Quincenal", ("quincenal",)),
+    ("Anual", ("anual", "por año", "al año")),
+    ("Mensual", ("mensual", "por mes", "al mes", "/mes")),
+]
+CONFIDENTIAL_MARKERS = ("confidencial", "a convenir", "negociable", "según experiencia")
+# Amounts below this are counts ("2 años", "40 horas") unless a currency marker touches them
+SALARY_FLOOR = 100
+
+MONTHS = {
+    "enero": 1, "ene": 1, "jan": 1, "january": 1,
+    "febrero": 2, "feb": 2, "february": 2,
+    "marzo": 3, "mar": 3, "march": 3,
+    "abril": 4, "abr": 4, "apr": 4, "april": 4,
+    "mayo": 5, "may": 5,
+    "junio": 6, "jun": 6, "june": 6,
+    "julio": 7, "jul": 7, "july": 7,
+    "agosto": 8, "ago": 8, "aug": 8, "august": 8,
+    "septiembre": 9, "setiembre": 9, "sep": 9, "set": 9, "sept": 9, "september": 9,
+    "octubre": 10, "oct": 10, "october": 10,
+    "noviembre": 11, "nov": 11, "november": 11,
+    "diciembre": 12, "dic": 12, "dec": 12, "december": 12,
+}
+RELATIVE_UNITS = {
+    "minuto": 0, "minutos": 0, "hora": 0, "horas": 0,
+    "día": 1, "días": 1, "dia": 1, "dias": 1,
+    "semana": 7, "semanas": 7,
+    "mes": 30, "meses": 30,
+    "año": 365, "años": 365,
+}
+NUMBER_WORDS = {"un": 1, "una": 1, "uno": 1, "dos": 2, "tres": 3, "cuatro": 4, "cinco": 5}
+
+# The number must not continue (a digit, or a separator and a digit); a word may
+# follow directly ("1.200.000mensual"). Only the multiplier needs a word boundary.
+AMOUNT_RE = re.compile(
+    r"(\d{1,3}(?:[.,\s]\d{3})+(?:[.,]\d{1,2})?|\d+(?:[.,]\d+)?)(?:\s*(millones|millón|millon|mil|k)\b)?(?!\d|[.,]\d)",
+    re.IGNORECASE,
+)
+RELATIVE_RE = re.compile(r"hace\s+(\d+|un|una|uno|dos|tres|cuatro|cinco)\s+(\w+)", re.IGNORECASE)
+NUMERIC_DATE_RE = re.compile(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b|\b(\d{1,2})[/.-](\d{1,2})[/.-](\d{2,4})\b")
+DAY_MONTH_RE = re.compile(r"\b(\d{1,2})\s+(?:de\s+)?([a-záéíóú]+)\.?(?:\s+(?:de\s+|del\s+)?(\d{4}))?")
+MONTH_DAY_RE = re.compile(r"\b([a-záéíóú]+)\.?\s+(\d{1,2})(?!\d),?(?:\s+(\d{4}))?")
+
+
+# ---------------------------------------------------------------
+# 1️⃣  Salary
+# ---------------------------------------------------------------
+def _to_number(raw):
+    """Parse '1.200.000', '1,200,000.50', '850 000' or '1,5' into a float."""
+    raw = raw.replace(" ", "")
+    if "," in raw and "." in raw:
+        # Whichever separator comes last is the decimal mark
+        decimal = "," if raw.rfind(",") > raw.rfind(".") else "."
+        thousands = "." if decimal == "," else ","
+        raw = raw.replace(thousands, "").replace(decimal, ".")
+    elif "," in raw or "." in raw:
+        sep = "," if "," in raw else "."
+        groups = raw.split(sep)
+        if len(groups) > 2 or len(groups[-1]) == 3:
+            raw = raw.replace(sep, "")
+        else:
+            raw = raw.replace(sep, ".")
+    try:
+        return float(raw)
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=8192)
+def parse_salary(text):
+    """Parse a salary string into Salary(min, max, currency, period, confidential).
+
+    >>> parse_salary("₡1.200.000mensual")
+    Salary(min=1200000.0, max=1200000.0, currency='CRC', period='Mensual', confidential=False)
+    >>> parse_salary("Entre ₡850.000 y ₡1.200.000.")[:2]
+    (850000.0, 1200000.0)
+    >>> parse_salary("Más de 2 años de experiencia, ₡900.000")[:2]
+    (900000.0, 900000.0)
+    """
+    if not text:
+        return EMPTY_SALARY
+    lowered = text.lower()
+
+    currency = ""
+    for code, markers in CURRENCY_MARKERS:
+        if any(m in lowered for m in markers):
+            currency = code
+            break
+    period = ""
+    for name, markers in PERIOD_MARKERS:
+        if any(m in lowered for m in markers):
+            period = name
+            break
+
+    amounts = []
+    multipliers = []
+    marked = []
+    for match in AMOUNT_RE.finditer(text):
+        value = _to_number(match.group(1))
+        if value is None:
+            continue
+        suffix = (match.group(2) or "").lower()
+        amounts.append(value)
+        multipliers.append(1_000_000 if suffix.startswith("mill") else 1_000 if suffix in ("mil", "k") else 1)
+        around = lowered[max(0, match.start() - 5):match.start()] + " " + lowered[match.end():match.end() + 9]
+        marked.append(any(m in around for _, markers in CURRENCY_MARKERS for m in markers))
+    if len(amounts) > 1 and multipliers[-1] > 1 and all(m == 1 for m in multipliers[:-1]):
+        # "entre 500 y 700 mil": the unit on the last amount applies to the whole range
+        multipliers = [multipliers[-1]] * len(amounts)
+    amounts = [value * m for value, m, money in zip(amounts, multipliers, marked)
+               if money or value * m >= SALARY_FLOOR]
+
+    confidential = not amounts and any(m in lowered for m in CONFIDENTIAL_MARKERS)
+    if not amounts:
+        return Salary(None, None, currency, period, confidential)
+    return Salary(min(amounts), max(amounts), currency, period, False)
+
+
+def format_amount(value):
+    """Render a parsed amount without a trailing .0 for whole numbers."""
+    if value is None:
+        return ""
+    return str(int(value)) if value == int(value) else f"{value:.2f}"
+
+
+# ---------------------------------------------------------------
+# 2️⃣  Dates
+# ---------------------------------------------------------------
+def _safe_date(year, month, day):
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=8192)
+def _parse_date(text, today):
+    lowered = text.lower().strip()
+    if not lowered:
+        return None
+
+    if "hoy" in lowered or "justo ahora" in lowered:
+        return today
+    if "anteayer" in lowered:
+        return today - timedelta(days=2)
+    if "ayer" in lowered:
+        return today - timedelta(days=1)
+
+    match = RELATIVE_RE.search(lowered)
+    if match:
+        amount, unit = match.groups()
+        count = int(amount) if amount.isdigit() else NUMBER_WORDS[amount]
+        if unit in RELATIVE_UNITS:
+            return today - timedelta(days=count * RELATIVE_UNITS[unit])
+
+    match = NUMERIC_DATE_RE.search(lowered)
+    if match:
+        if match.group(1):
+            return _safe_date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+        day, month, year = int(match.group(4)), int(match.group(5)), int(match.group(6))
+        if year < 100:
+            year += 2000
+        # Day-first as used on the Spanish-language sites, month-first as a fallback
+        return _safe_date(year, month, day) or _safe_date(year, day, month)
+
+    for match in DAY_MONTH_RE.finditer(lowered):
+        day, month_name, year = match.groups()
+        if month_name in MONTHS:
+            return _safe_date(int(year) if year else today.year, MONTHS[month_name], int(day))
+    for match in MONTH_DAY_RE.finditer(lowered):
+        month_name, day, year = match.groups()
+        if month_name in MONTHS:
+            return _safe_date(int(year) if year else today.year, MONTHS[month_name], int(day))
+    return None
+
+
+def parse_date(text, today=None):
+    """Parse absolute, month-name or Spanish relative dates into 'YYYY-MM-DD' ('' if unknown).
+
+    >>> parse_date("marzo 15, 2025"), parse_date("marzo 2025")
+    ('2025-03-15', '')
+    """
+    if not text:
+        return ""
+    parsed = _parse_date(text, today or date.today())
+    return parsed.isoformat() if parsed else ""
+
+
+def add_days(iso_date, days):
+    """Shift an ISO date by a number of days."""
+    return (date.fromisoformat(iso_date) + timedelta(days=days)).isoformat()
+
+
+# ---------------------------------------------------------------
+# 3️⃣  Batch API
+# ---------------------------------------------------------------
+NORMALIZED_FIELDS = [
+    "salary_min", "salary_max", "salary_currency", "salary_period",
+    "salary_confidential", "posting_date_iso", "expiry_date_iso",
+]
+
+
+def normalize_row(row, salary_field="_job_salary", posting_field=None,
+                  expiry_field="_job_expiry_date", today=None):
+    """Return a copy of row with typed salary/date columns appended."""
+    salary = parse_salary(row.get(salary_field) or "")
+    out = dict(row)
+    out["salary_min"] = format_amount(salary.min)
+    out["salary_max"] = format_amount(salary.max)
+    out["salary_currency"] = salary.currency
+    out["salary_period"] = salary.period
+    out["salary_confidential"] = "1" if salary.confidential else "0"
+    out["posting_date_iso"] = parse_date(row.get(posting_field) or "", today) if posting_field else ""
+    out["expiry_date_iso"] = parse_date(row.get(expiry_field) or "", today)
+    return out
+
+
+def normalize_rows(rows, **kwargs):
+    """Normalize an iterable of rows lazily (works for whole snapshots)."""
+    for row in rows:
+        yield normalize_row(row, **kwargs)
+
+
+def normalize_snapshot(in_path, out_path=None, **kwargs):
+    """Stream a snapshot CSV into a copy with the normalized columns added."""
+    out_path = out_path or in_path.replace(".csv", "_normalized.csv")
+    with open(in_path, newline="", encoding="utf-8-sig") as src:
+        reader = csv.DictReader(src)
+        fieldnames = list(reader.fieldnames or []) + NORMALIZED_FIELDS
+        with open(out_path, "w", newline="", encoding="utf-8-sig") as dst:
+            writer = csv.DictWriter(dst, fieldnames=fieldnames)
+            writer.writeheader()
+            count = 0
+            for row in normalize_rows(reader, **kwargs):
+                writer.writerow(row)
+                count += 1
+    return out_path, count
+
+
+def cache_stats():
+    """Hit/miss counters for the memoized parsers."""
+    return {"salary": parse_salary.cache_info(), "date": _parse_date.cache_info()}
+
+
+# ---------------------------------------------------------------
+# MAIN
+# ---------------------------------------------------------------
+def main():
+    if len(sys.argv) < 2:
+        print("usage: python normalize.py SNAPSHOT.csv [...]")
+        return
+    for path in sys.argv[1:]:
+        started = datetime.now()
+        out_path, count = normalize_snapshot(path)
+        elapsed = (datetime.now() - started).total_seconds()
+        print(f"✅ Normalized {count} rows from {path} -> {out_path} in {elapsed:.2f}s")
+    for name, info in cache_stats().items():
+        total = info.hits + info.misses
+        rate = (info.hits / total * 100) if total else 0
+        print(f"  {name:6s} cache: {info.hits} hits / {info.misses} misses ({rate:.0f}% hit rate)")
+
+
+if __name__ == "__main__":
+    main()
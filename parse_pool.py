@@ -0,0 +1,88 @@
+# parse_pool.py
+# -----------------------------
+# Runs CPU-bound HTML parsing/extraction in worker processes.
+#  - the fetch loop hands raw HTML to the pool and keeps navigating
+#  - at most max_pending pages wait in the pool; submit() blocks on the
+#    oldest one beyond that (backpressure), so memory stays bounded
+#  - finished records come back in submission order
+# Fetch and parse scale independently: browser pages/tabs on one side,
+# worker processes on the other.
+# Workers are started from a fork server, never forked from this process:
+# forking after Playwright has started its threads can deadlock the child.
+# Open the pool before the browser all the same.
+#
+# Usage:
+#   with ParsePool(parse_job_details, workers=2) as pool, sync_playwright() as p:
+#       for url in urls:
+#           results.extend(pool.submit(fetch_html(page, url), url))
+#       results.extend(pool.drain())
+# -----------------------------
+
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# ---------------------------------------------------------------
+# CONFIG
+# ---------------------------------------------------------------
+# Leave one core for the browser and the fetch loop
+PARSE_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+# Pages allowed to wait per worker before submit() blocks
+PENDING_PER_WORKER = 4
+# fork copies the parent's threads' locks mid-state; spawn where there is no fork server
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+class ParsePool:
+    """Bounded pool of extraction workers fed with raw HTML.
+
+    parse must be a module-level function (it is pickled to the workers).
+    workers=None uses PARSE_WORKERS; workers=0 parses inline in this process,
+    which is handy for debugging.
+    """
+
+    def __init__(self, parse, workers=None, max_pending=None):
+        workers = PARSE_WORKERS if workers is None else workers
+        self.parse = parse
+        self.workers = workers
+        self.max_pending = max_pending or max(1, workers) * PENDING_PER_WORKER
+        self.executor = None
+        if workers:
+            self.executor = ProcessPoolExecutor(max_workers=workers,
+                                                mp_context=multiprocessing.get_context(START_METHOD))
+            # Start the fork server and a first worker now, before any browser threads exist
+            self.executor.submit(os.getpid).result()
+        self.pending = deque()
+        self.waits = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def submit(self, *args):
+        """Queue one page for parsing; returns records that finished meanwhile."""
+        if self.executor is None:
+            return [self.parse(*args)]
+        done = []
+        while len(self.pending) >= self.max_pending:
+            # Pool is full: wait for the oldest page before fetching more
+            self.waits += 1
+            done.append(self.pending.popleft().result())
+        self.pending.append(self.executor.submit(self.parse, *args))
+        while self.pending and self.pending[0].done():
+            done.append(self.pending.popleft().result())
+        return done
+
+    def drain(self):
+        """Wait for every queued page and return the remaining records."""
+        done = [future.result() for future in self.pending]
+        self.pending.clear()
+        return done
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
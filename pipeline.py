@@ -0,0 +1,121 @@
+# pipeline.py
+# -----------------------------
+# Streams discovered job IDs straight into the detail loop.
+#  - discovery runs in its own thread (with its own Playwright instance)
+#    and yields IDs as each scroll/page reveals them
+#  - IDs pass through a bounded queue; duplicates and known IDs are
+#    dropped at the queue boundary
+#  - the detail loop consumes the queue right away instead of waiting
+#    for discovery to finish and close its browser
+#
+# Usage:
+#   ids = IdStream(lambda: iter_job_ids_with_playwright(...), known_ids=known)
+#   results = scrape_job_details(ids)
+#   print(ids.report())
+# -----------------------------
+
+import queue
+import threading
+import time
+
+# ---------------------------------------------------------------
+# CONFIG
+# ---------------------------------------------------------------
+# Discovery pauses once this many IDs wait for the detail workers
+QUEUE_SIZE = 200
+
+_DONE = object()
+
+
+class IdStream:
+    """Iterable of unique job IDs fed by a discovery generator in a background thread."""
+
+    def __init__(self, produce, known_ids=None, maxsize=QUEUE_SIZE):
+        self.produce = produce
+        self.known_ids = set(known_ids or ())
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.seen = set()
+        self.duplicates = 0
+        self.started = None
+        self.first_id_after = None
+        self.error = None
+        self._closed = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self.started = time.perf_counter()
+            self._thread = threading.Thread(target=self._run, name="discovery", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        ids = self.produce()
+        try:
+            for job_id in ids:
+                job_id = str(job_id)
+                if job_id in self.seen or job_id in self.known_ids:
+                    self.duplicates += 1
+                    continue
+                self.seen.add(job_id)
+                if not self._put(job_id):
+                    break
+        except Exception as e:
+            self.error = e
+        finally:
+            # Let the discovery generator close its browser
+            if hasattr(ids, "close"):
+                ids.close()
+            self._put(_DONE)
+
+    def _put(self, item):
+        """Blocking put that gives up once the consumer has stopped."""
+        while not self._closed.is_set():
+            try:
+                self.queue.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def __iter__(self):
+        self.start()
+        try:
+            while True:
+                job_id = self.queue.get()
+                if job_id is _DONE:
+                    break
+                if self.first_id_after is None:
+                    self.first_id_after = time.perf_counter() - self.started
+                yield job_id
+        finally:
+            self.close()
+        if self.error is not None:
+            print(f"❌ Discovery stopped early: {self.error}")
+
+    def poll(self):
+        """Next ID if one is waiting, else None; raises StopIteration once discovery is done.
+
+        Lets a scheduler serving several streams check this one without blocking.
+        """
+        self.start()
+        try:
+            job_id = self.queue.get_nowait()
+        except queue.Empty:
+            return None
+        if job_id is _DONE:
+            self.close()
+            if self.error is not None:
+                print(f"❌ Discovery stopped early: {self.error}")
+            raise StopIteration
+        if self.first_id_after is None:
+            self.first_id_after = time.perf_counter() - self.started
+        return job_id
+
+    def close(self):
+        self._closed.set()
+
+    def report(self):
+        first = f"{self.first_id_after:.1f}s" if self.first_id_after is not None else "never"
+        return (f"🔀 Streamed {len(self.seen)} job IDs ({self.duplicates} duplicate/known dropped), "
+                f"first ID after {first}")
@@ -2,12 +2,15 @@ import time
 import csv
 import re
 import requests
-from bs4 import BeautifulSoup
 from datetime import datetime
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeout
 
-BASE_URL = "https://www.elempleo.com/cr/ofertas-empleo/"
-API_URL = "https://www.elempleo.com/cr/api/joboffers/getjoboffer?jobOfferId={}"
+from countries import get_country
+from discovery import KnownIdStop, NEWEST_FIRST_QUERY
+from pipeline import IdStream
+
+# Default country; pass country= for the other elempleo sites (see countries.py)
+BASE_URL = get_country().listing_url
+API_URL = get_country().api_url
 HEADERS = {
     "User-Agent": (
         "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
@@ -15,15 +18,34 @@ HEADERS = {
         "Chrome/119.0 Safari/537.36"
     )
 }
+# Shared session so API calls reuse connections (and can be HAR-recorded/replayed)
+SESSION = requests.Session()
+SESSION.headers.update(HEADERS)
 
 
 # ---------------------------------------------------------------
 # STEP 1: Collect all jobOffer IDs (data-joboffer)
 # ---------------------------------------------------------------
-def get_job_ids_with_playwright(max_scrolls=12, scroll_delay=1.5):
-    """Scroll through the Elempleo listings and extract all data-joboffer IDs."""
+def get_job_ids_with_playwright(max_scrolls=12, scroll_delay=1.5, known_ids=None, country=None):
+    """Scroll through one country's Elempleo listings and extract all data-joboffer IDs.
+
+    With known_ids the listing is sorted newest first and scrolling stops as
+    soon as a scroll reveals only IDs we already hold.
+    """
+    return list(iter_job_ids_with_playwright(max_scrolls, scroll_delay, known_ids, country))
+
+
+def iter_job_ids_with_playwright(max_scrolls=12, scroll_delay=1.5, known_ids=None, country=None):
+    """Yield job IDs as each scroll reveals them (see get_job_ids_with_playwright)."""
+    # Browser-only dependencies: the API stage runs without them
+    from bs4 import BeautifulSoup
+    from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeout
+
     print("🚀 Launching browser to collect job IDs...")
     job_ids = set()
+    stop = KnownIdStop(known_ids)
+    base_url = get_country(country).listing_url
+    listing_url = base_url + NEWEST_FIRST_QUERY if known_ids else base_url
 
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=True)
@@ -31,7 +53,7 @@ def get_job_ids_with_playwright(max_scrolls=12, scroll_delay=1.5):
         page = context.new_page()
 
         try:
-            page.goto(BASE_URL, wait_until="load", timeout=90000)
+            page.goto(listing_url, wait_until="load", timeout=90000)
             time.sleep(5)
 
             for scroll in range(1, max_scrolls + 1):
@@ -42,10 +64,17 @@ def get_job_ids_with_playwright(max_scrolls=12, scroll_delay=1.5):
                 soup = BeautifulSoup(html, "html.parser")
 
                 for btn in soup.find_all("button", attrs={"data-joboffer": True}):
-                    job_ids.add(btn["data-joboffer"])
+                    job_id = btn["data-joboffer"]
+                    if job_id not in job_ids:
+                        job_ids.add(job_id)
+                        yield job_id
 
                 print(f"  ✓ Scroll {scroll}: {len(job_ids)} unique IDs")
 
+                if stop.update(job_ids):
+                    print("🛑 Reached already-known jobs, stopping early.")
+                    break
+
             print(f"\n✅ Total job IDs found: {len(job_ids)}")
 
         except PlaywrightTimeout:
@@ -55,17 +84,15 @@ def get_job_ids_with_playwright(max_scrolls=12, scroll_delay=1.5):
         finally:
             browser.close()
 
-    return list(job_ids)
-
 
 # ---------------------------------------------------------------
 # STEP 2: Fetch job details via JSON API
 # ---------------------------------------------------------------
-def get_job_details(job_id):
-    """Fetch one job's details using Elempleo API."""
+def get_job_details(job_id, country=None):
+    """Fetch one job's details using the Elempleo API of its country site."""
     try:
-        url = API_URL.format(job_id)
-        r = requests.get(url, headers=HEADERS, timeout=15)
+        url = get_country(country).api_url.format(job_id)
+        r = SESSION.get(url, timeout=15)
         if r.status_code == 200:
             data = r.json()
             return {
@@ -93,12 +120,14 @@ def clean_html(raw_html):
 # ---------------------------------------------------------------
 # STEP 3: Save all jobs to CSV
 # ---------------------------------------------------------------
-def save_to_csv(jobs):
+def save_to_csv(jobs, country=None):
     if not jobs:
         print("⚠️ No jobs to save.")
         return
 
-    filename = f"elempleo_jobs_api_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    country = get_country(country)
+    prefix = "elempleo_jobs_api" if country.is_default else f"elempleo_{country.code}_jobs_api"
+    filename = f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
     with open(filename, "w", newline="", encoding="utf-8-sig") as f:
         writer = csv.DictWriter(f, fieldnames=jobs[0].keys())
         writer.writeheader()
@@ -113,20 +142,19 @@ def save_to_csv(jobs):
 def main():
     print("\n🚀 Starting Elempleo JSON API Scraper (Final Version)...")
 
-    # Step 1: Collect job IDs
-    job_ids = get_job_ids_with_playwright(max_scrolls=15, scroll_delay=1.5)
-    if not job_ids:
-        print("⚠️ No job IDs found. Please check site structure.")
-        return
-
-    # Step 2: Fetch details via API
+    # Step 1+2: API calls start as soon as the first scroll reveals IDs
+    job_ids = IdStream(lambda: iter_job_ids_with_playwright(max_scrolls=15, scroll_delay=1.5))
     jobs = []
     for idx, job_id in enumerate(job_ids, 1):
         job = get_job_details(job_id)
         if job:
             jobs.append(job)
-            print(f"[{idx}/{len(job_ids)}] ✓ {job['title'][:60]}")
+            print(f"[{idx}/?] ✓ {(job['title'] or '')[:60]}")
         time.sleep(0.3)
+    print(job_ids.report())
+    if not job_ids.seen:
+        print("⚠️ No job IDs found. Please check site structure.")
+        return
 
     print(f"\n✅ Total jobs collected: {len(jobs)}")
 
@@ -0,0 +1,124 @@
+# selector_chain.py
+# -----------------------------
+# Self-ordering selector fallback chains.
+#
+# The scrapers try several selectors per field ('.company', '.company-name',
+# '.employer' ...) and usually fail a few times before the one that works.
+# A chain remembers which alternative hit for each site and field and tries
+# the winner first next time; the stats persist in selector_stats.json.
+#
+# Scores decay each time a selector is tried, and a hit adds one. A winner
+# that stops matching after a site redesign loses its lead within a few
+# lookups, and the chain reorders itself around the new winner.
+#
+# Usage:
+#   elem = select_one(card, "elempleo", "company", [".company", ".company-name"])
+#   cards = first_match("elempleo", "cards", sets, lambda sel: fetch(sel))
+#   save_selector_stats()          # once, at the end of a run
+# -----------------------------
+
+import json
+import os
+import threading
+
+# ---------------------------------------------------------------
+# CONFIG
+# ---------------------------------------------------------------
+SELECTOR_STATS_FILE = "selector_stats.json"
+# Score kept by a selector each time it is tried (1 is added on a hit)
+DECAY = 0.9
+
+
+class SelectorStats:
+    """Per site/field scores for each selector, plus lookup counts for this run."""
+
+    def __init__(self, path=SELECTOR_STATS_FILE):
+        self.path = path
+        self.scores = {}
+        # "site|field" -> [lookups, selectors tried] for the current run
+        self.calls = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.scores = json.load(f)
+
+    def ordered(self, site, field, selectors):
+        """Selectors best-first; ties (and unseen selectors) keep the written order."""
+        scores = self.scores.get(f"{site}|{field}", {})
+        return sorted(selectors, key=lambda sel: -scores.get(sel, 0.0))
+
+    def record(self, site, field, tried, hit):
+        """Record one lookup: the selectors tried in order and the one that hit (or None)."""
+        key = f"{site}|{field}"
+        with self._lock:
+            scores = self.scores.setdefault(key, {})
+            for sel in tried:
+                scores[sel] = round(scores.get(sel, 0.0) * DECAY, 4)
+            if hit is not None:
+                scores[hit] += 1
+            calls = self.calls.setdefault(key, [0, 0])
+            calls[0] += 1
+            calls[1] += len(tried)
+
+    def save(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(self.scores, f, ensure_ascii=False, indent=1)
+
+    def report(self):
+        """One line per site/field: current winner and average selectors tried this run."""
+        lines = []
+        for key, (lookups, tried) in sorted(self.calls.items()):
+            scores = self.scores.get(key, {})
+            winner = max(scores, key=scores.get) if scores else "-"
+            lines.append(f"  {key:32s} {tried / lookups:4.2f} lookups/field  winner: {winner}")
+        return "\n".join(lines)
+
+
+_stats = None
+
+
+def selector_stats():
+    """Process-wide stats, loaded from SELECTOR_STATS_FILE on first use."""
+    global _stats
+    if _stats is None:
+        _stats = SelectorStats()
+    return _stats
+
+
+def save_selector_stats():
+    if _stats is not None:
+        _stats.save()
+
+
+# ---------------------------------------------------------------
+# Lookups
+# ---------------------------------------------------------------
+def first_match(site, field, selectors, probe, stats=None):
+    """Return probe(selector) for the first selector where it is truthy, best-first.
+
+    Selectors may be strings or lists (joined with ', ' as the stats key).
+    """
+    stats = stats or selector_stats()
+    by_key = {(", ".join(sel) if isinstance(sel, list) else sel): sel for sel in selectors}
+    tried = []
+    for key in stats.ordered(site, field, list(by_key)):
+        tried.append(key)
+        result = probe(by_key[key])
+        if result:
+            stats.record(site, field, tried, key)
+            return result
+    stats.record(site, field, tried, None)
+    return None
+
+
+def select_one(root, site, field, selectors, accept=None, stats=None):
+    """First element under a BeautifulSoup root matching the chain (and accept, if given)."""
+    def probe(sel):
+        elem = root.select_one(sel)
+        return elem if elem is not None and (accept is None or accept(elem)) else None
+    return first_match(site, field, selectors, probe, stats)
+
+
+def select_all(root, site, field, selectors, stats=None):
+    """First non-empty list of elements matching one of the selectors."""
+    return first_match(site, field, selectors, root.select, stats) or []
@@ -0,0 +1,314 @@
+# watch.py
+# -----------------------------
+# Long-running watch mode: keeps the job store current between full crawls.
+#  - every cycle re-polls the newest-first listing (or the sitemaps) and
+#    fetches details only for IDs the store does not hold yet
+#  - then refreshes up to refresh_per_cycle stored jobs that have not been
+#    seen for refresh_after_hours, nearest expiry first
+#  - one browser (DetailEngine), one parse pool, one HTTP session and one
+#    store stay open across cycles; cycles start interval seconds apart
+#    with +/- jitter so polls do not land on a fixed beat
+#  - with an event sink, each record is published as it is parsed and
+#    refreshed jobs whose page is gone (404/410, "oferta no disponible", or
+#    blank several refreshes in a row) become "removed"; other blank pages
+#    count as failed and are retried next cycle
+#  - the last cycle's metrics go to watch_metrics.json and, with
+#    metrics_port, to GET http://127.0.0.1:<port>/metrics
+#
+# Usage:
+#   python elempleo.py watch --db jobs.db --interval 600 --metrics-port 8090
+#   python elempleo.py watch --cycles 1          # one cycle, then exit
+# -----------------------------
+
+import json
+import os
+import random
+import re
+import signal
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from playwright.sync_api import sync_playwright
+
+from countries import get_country, partition
+from detail_engine import DetailEngine, process_tree_rss_mb
+from discovery import SITEMAP_STATE_FILE, SitemapState, sitemap_job_ids
+from elempleo_detail_scraper import fetch_job_page, has_content, iter_listing_ids, parse_job_details
+from html_archive import ARCHIVE_DIR, HtmlArchive
+from job_store import DEFAULT_DB, JobStore
+from parse_pool import ParsePool
+
+# ---------------------------------------------------------------
+# CONFIG
+# ---------------------------------------------------------------
+WATCH_INTERVAL = 600
+# Each wait is interval * (1 +/- JITTER)
+JITTER = 0.2
+# Newest-first listing scrolls per poll; new postings sit at the top
+LISTING_SCROLLS = 3
+REFRESH_PER_CYCLE = 20
+REFRESH_AFTER_HOURS = 24
+METRICS_FILE = "watch_metrics.json"
+SOURCE_SITE = "elempleo"
+# Definite signs that an offer was taken down (a blank page alone may be transient)
+GONE_STATUSES = (404, 410)
+GONE_PAGE_RE = re.compile(r"(?:oferta|vacante)\s+(?:ya\s+)?no\s+(?:est[aá]\s+)?disponible", re.IGNORECASE)
+
+
+def _parse_with_id(html, job_url, job_id):
+    """Parse worker that also records the job ID (the page does not always carry og:url)."""
+    job = parse_job_details(html, job_url)
+    job["_job_id"] = job_id
+    return job
+
+
+class Watcher:
+    """Polls for new jobs and refreshes stale ones on a schedule, keeping sessions warm."""
+
+    def __init__(self, store_path=DEFAULT_DB, interval=WATCH_INTERVAL, jitter=JITTER, discovery="listing",
+                 max_scrolls=LISTING_SCROLLS, refresh_per_cycle=REFRESH_PER_CYCLE,
+                 refresh_after_hours=REFRESH_AFTER_HOURS, profile="storage", asset_cache=True,
+                 parse_workers=None, archive_dir=ARCHIVE_DIR, metrics_path=METRICS_FILE, metrics_port=None,
+                 settle=3, events=None, country=None):
+        if discovery not in ("listing", "sitemap"):
+            raise ValueError(f"Unknown discovery {discovery!r}, expected 'listing' or 'sitemap'")
+        self.store_path = store_path
+        self.interval = interval
+        self.jitter = jitter
+        self.discovery = discovery
+        self.max_scrolls = max_scrolls
+        self.refresh_per_cycle = refresh_per_cycle
+        self.refresh_after = timedelta(hours=refresh_after_hours)
+        self.profile = profile
+        self.asset_cache = asset_cache
+        self.parse_workers = parse_workers
+        self.archive_dir = archive_dir
+        self.metrics_path = metrics_path
+        self.metrics_port = metrics_port
+        self.settle = settle
+        # Optional event_sink.EventSink; records are published as they are parsed
+        self.events = events
+        self.country = get_country(country)
+        self.cycles = 0
+        self.last_metrics = {}
+        self.totals = {"cycles": 0, "new": 0, "refreshed": 0, "failed": 0}
+        self._stop = threading.Event()
+
+    def stop(self, *_):
+        self._stop.set()
+
+    def next_delay(self):
+        return max(0.0, self.interval * (1 + random.uniform(-self.jitter, self.jitter)))
+
+    # -- main loop -------------------------------------------------------------
+    def run(self, max_cycles=None):
+        """Run cycles until stop() (SIGINT/SIGTERM) or max_cycles; returns the last metrics."""
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, self.stop)
+        server = MetricsServer(self, self.metrics_port).start() if self.metrics_port else None
+        archive = HtmlArchive(self.archive_dir) if self.archive_dir else None
+        sitemap_state = SitemapState(partition(SITEMAP_STATE_FILE, self.country)) if self.discovery == "sitemap" else None
+        http = None
+        if self.discovery == "sitemap":
+            import requests
+            http = requests.Session()
+        print(f"👀 Watching {self.country.name} every {self.interval:.0f}s (±{self.jitter:.0%}), store {self.store_path}")
+        try:
+            with ParsePool(_parse_with_id, workers=self.parse_workers) as pool, \
+                    sync_playwright() as p, \
+                    DetailEngine(p, profile=self.profile, asset_cache=self.asset_cache,
+                                 memory_log_every=0) as engine, \
+                    JobStore(self.store_path) as store:
+                while not self._stop.is_set():
+                    metrics = self.cycle(engine, pool, store, archive, http, sitemap_state)
+                    if max_cycles and self.cycles >= max_cycles:
+                        self._publish(metrics)
+                        break
+                    delay = self.next_delay()
+                    metrics["next_cycle_at"] = (datetime.now() + timedelta(seconds=delay)).isoformat(timespec="seconds")
+                    self._publish(metrics)
+                    print(f"💤 Next cycle in {delay:.0f}s")
+                    self._stop.wait(delay)
+        except KeyboardInterrupt:
+            print("\n🛑 Stopping watch")
+        finally:
+            if archive is not None:
+                archive.close()
+            if server is not None:
+                server.shutdown()
+        return self.last_metrics
+
+    def cycle(self, engine, pool, store, archive=None, http=None, sitemap_state=None):
+        """Discover new IDs, refresh due jobs, upsert; returns this cycle's metrics."""
+        self.cycles += 1
+        started = time.perf_counter()
+        now = datetime.now()
+        errors = []
+        print(f"\n🔁 Cycle {self.cycles} at {now.isoformat(timespec='seconds')}")
+
+        known = store.ids()
+        discovered = []
+        try:
+            discovered = self.discover(engine, known, http, sitemap_state)
+        except Exception as e:
+            errors.append(f"discovery: {e}")
+            print(f"❌ Discovery failed: {e}")
+        discover_s = time.perf_counter() - started
+        new_ids = [job_id for job_id in discovered if job_id not in known]
+        # Known IDs from the sitemaps have a new lastmod; on the listing they are just still there
+        changed_ids = [job_id for job_id in discovered if job_id in known] if self.discovery == "sitemap" else []
+
+        seen_before = (now - self.refresh_after).isoformat(timespec="seconds")
+        listed = set(discovered)
+        due = [job_id for job_id in store.due_for_refresh(self.refresh_per_cycle, seen_before)
+               if job_id not in listed]
+        refresh_ids = changed_ids + due
+
+        rows, failed, removed, blank = self.fetch(engine, pool, archive, new_ids + refresh_ids, refresh_ids,
+                                                  sitemap_state)
+        inserted, updated = store.upsert(rows, source_site=SOURCE_SITE)
+        store.mark_removed(removed)
+        for job_id in store.record_empty_fetch(blank):
+            removed.append(job_id)
+            if self.events is not None:
+                self.events.removed(job_id)
+        if sitemap_state is not None:
+            sitemap_state.save()
+
+        metrics = {
+            "cycle": self.cycles,
+            "started_at": now.isoformat(timespec="seconds"),
+            "duration_s": round(time.perf_counter() - started, 2),
+            "discover_s": round(discover_s, 2),
+            "discovery": self.discovery,
+            "discovered": len(discovered),
+            "new": len(new_ids),
+            "refreshed": len(refresh_ids),
+            "fetched": len(rows),
+            "failed": failed,
+            "removed": len(removed),
+            "inserted": inserted,
+            "updated": updated,
+            "store_jobs": store.count(),
+            "browser_relaunches": engine.relaunches,
+            "parse_waits": pool.waits,
+            "rss_mb": round(process_tree_rss_mb(), 1),
+            "errors": errors,
+        }
+        self.totals["cycles"] += 1
+        self.totals["new"] += len(new_ids)
+        self.totals["refreshed"] += len(refresh_ids)
+        self.totals["failed"] += failed
+        print(f"✅ Cycle {self.cycles}: {len(new_ids)} new, {len(refresh_ids)} refreshed, "
+              f"{failed} failed in {metrics['duration_s']:.1f}s")
+        return metrics
+
+    def discover(self, engine, known, http=None, sitemap_state=None):
+        """IDs the listing or sitemaps show as new (or, for sitemaps, changed)."""
+        if self.discovery == "sitemap":
+            return list(sitemap_job_ids(sitemap_state, known, session=http, country=self.country))
+        # The listing page runs on the engine's warm page, so it shares its
+        # cookies, consent and cache with the detail fetches
+        return engine.run(lambda page: list(iter_listing_ids(
+            page, known or None, self.max_scrolls, settle=self.settle,
+            accept_consent=engine.session.accept_consent, country=self.country)))
+
+    def fetch(self, engine, pool, archive, job_ids, refresh_ids=(), sitemap_state=None):
+        """Fetch and parse detail pages; returns (rows, failed count, removed IDs, blank refresh IDs).
+
+        A refreshed job is removed only on a definite signal: a 404/410 or
+        the site's "oferta no disponible" page. It is not upserted, so the
+        stored copy keeps its last content; the caller marks it removed.
+        Any other page without content counts as failed and is not stored;
+        blank refreshes are returned for the caller to count.
+        Parsed and removed jobs are confirmed in sitemap_state; failed fetches
+        are not, so they come back next cycle.
+        """
+        rows, failed, removed, blank = [], 0, [], []
+        refresh_ids = set(refresh_ids)
+        gone_pages = set()
+
+        def collect(records):
+            nonlocal failed
+            for job in records:
+                job_id = job["_job_id"]
+                if has_content(job):
+                    if sitemap_state is not None:
+                        sitemap_state.confirm(job_id)
+                    if self.events is not None:
+                        self.events.publish(job, job_id)
+                    rows.append(job)
+                elif job_id in gone_pages:
+                    removed.append(job_id)
+                    if sitemap_state is not None:
+                        sitemap_state.confirm(job_id)
+                    if self.events is not None:
+                        self.events.removed(job_id)
+                else:
+                    # Challenge or half-rendered page: try again next cycle
+                    failed += 1
+                    if job_id in refresh_ids:
+                        blank.append(job_id)
+
+        for idx, job_id in enumerate(job_ids, 1):
+            if self._stop.is_set():
+                break
+            job_url = f"{self.country.detail_url}{job_id}"
+            print(f"[{idx}/{len(job_ids)}] Scraping {job_url} ...")
+            html, status = engine.run(lambda page: fetch_job_page(page, job_url, self.settle))
+            if job_id in refresh_ids and (status in GONE_STATUSES or GONE_PAGE_RE.search(html)):
+                gone_pages.add(job_id)
+            elif not html:
+                failed += 1
+                continue
+            if archive is not None and html:
+                archive.put(job_id, job_url, html)
+            collect(pool.submit(html, job_url, job_id))
+        collect(pool.drain())
+        return rows, failed, removed, blank
+
+    # -- metrics ---------------------------------------------------------------
+    def _publish(self, metrics):
+        self.last_metrics = metrics
+        if self.metrics_path:
+            tmp = self.metrics_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.snapshot(), f, indent=1)
+            os.replace(tmp, self.metrics_path)
+
+    def snapshot(self):
+        return {"last_cycle": self.last_metrics, "totals": dict(self.totals)}
+
+
+# ---------------------------------------------------------------
+# Metrics endpoint
+# ---------------------------------------------------------------
+class MetricsServer(ThreadingHTTPServer):
+    """Serves the watcher's last-cycle metrics as JSON on 127.0.0.1."""
+
+    def __init__(self, watcher, port):
+        super().__init__(("127.0.0.1", port), _MetricsHandler)
+        self.watcher = watcher
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        print(f"📈 Metrics on http://127.0.0.1:{self.server_port}/metrics")
+        return self
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") not in ("", "/metrics"):
+            self.send_error(404)
+            return
+        data = json.dumps(self.server.watcher.snapshot()).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
@@ -0,0 +1,243 @@
+# wp_sync.py
+# -----------------------------
+# Push scraped jobs to a WordPress (WP Job Manager) site over REST.
+#  - rows become job_listing posts; the _job_* columns become post meta
+#  - a local job ID -> post ID mapping decides create vs update
+#  - only records whose payload changed since the last sync are sent
+#  - jobs marked filled, or missing from a full snapshot, are closed
+#    (_job_filled = 1)
+#  - writes go through the WordPress batch endpoint (/batch/v1, 25
+#    requests per call) with several batches in flight at once
+#
+# A stand-in server with the same endpoints is included for local tests:
+#   python elempleo.py wp stand-in --port 8089
+#   python elempleo.py wp sync elempleo_job_details_*.csv --url http://127.0.0.1:8089
+# -----------------------------
+
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from discovery import job_id_from_row
+from job_record import WP_PREFIX, JobRecord, _canonical
+
+# ---------------------------------------------------------------
+# CONFIG
+# ---------------------------------------------------------------
+WP_STATE_FILE = "wp_sync_state.json"
+LISTINGS_PATH = "/wp/v2/job-listings"
+BATCH_PATH = "/wp-json/batch/v1"
+# WordPress rejects batches larger than 25 requests by default
+BATCH_SIZE = 25
+WORKERS = 4
+# Post meta written for every job (WP Job Manager keys, without the prefix)
+META_FIELDS = (
+    "featured_image", "featured", "filled", "urgent", "category", "type", "tag",
+    "expiry_date", "gender", "apply_type", "apply_url", "apply_email",
+    "salary_type", "salary", "max_salary", "experience", "career_level",
+    "qualification", "video_url", "photos", "application_deadline_date",
+    "address", "location", "map_location",
+)
+
+
+# ---------------------------------------------------------------
+# 1️⃣  Payloads and local mapping
+# ---------------------------------------------------------------
+def wp_payload(row):
+    """REST body for a job_listing post built from any scraper row."""
+    if isinstance(row, JobRecord):
+        row = row.to_dict()
+    fields = {_canonical(key): "" if value is None else str(value) for key, value in row.items()}
+    meta = {WP_PREFIX + name: fields.get(name, "") for name in META_FIELDS}
+    if not meta[WP_PREFIX + "apply_url"]:
+        meta[WP_PREFIX + "apply_url"] = fields.get("url", "")
+    return {
+        "title": fields.get("title", ""),
+        "content": fields.get("description", ""),
+        "status": "publish",
+        "meta": meta,
+    }
+
+
+def payload_hash(payload):
+    return hashlib.sha1(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class WpSyncState:
+    """Job ID -> {"post_id", "hash", "filled"} for everything synced so far."""
+
+    def __init__(self, path=WP_STATE_FILE):
+        self.path = path
+        self.posts = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.posts = json.load(f)
+
+    def save(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(self.posts, f)
+
+
+# ---------------------------------------------------------------
+# 2️⃣  Sync
+# ---------------------------------------------------------------
+class WordPressSync:
+    """Sends create/update/close operations to WordPress in concurrent batches."""
+
+    def __init__(self, base_url, user=None, password=None, state=None,
+                 batch_size=BATCH_SIZE, workers=WORKERS, session=None):
+        self.base_url = base_url.rstrip("/")
+        self.state = state if state is not None else WpSyncState()
+        self.batch_size = batch_size
+        self.workers = workers
+        self.session = session or requests.Session()
+        user = user or os.environ.get("WP_USER")
+        password = password or os.environ.get("WP_APP_PASSWORD")
+        if user and password:
+            # WordPress application password
+            self.session.auth = (user, password)
+
+    def plan(self, rows, close_missing=False):
+        """List of (job_id, action, request, hash) for rows that need sending.
+
+        close_missing=True treats rows as the complete current listing and
+        closes every synced job that is not in it.
+        """
+        # Snapshots are appended over time: the last row for a job is its newest state
+        latest = {}
+        for row in rows:
+            job_id = job_id_from_row(row)
+            if job_id:
+                latest[job_id] = row
+
+        ops = []
+        for job_id, row in latest.items():
+            payload = wp_payload(row)
+            digest = payload_hash(payload)
+            synced = self.state.posts.get(job_id)
+            if synced and synced["hash"] == digest:
+                continue
+            if synced:
+                request = {"method": "POST", "path": f"{LISTINGS_PATH}/{synced['post_id']}", "body": payload}
+                action = "closed" if payload["meta"][WP_PREFIX + "filled"] == "1" else "updated"
+            else:
+                request = {"method": "POST", "path": LISTINGS_PATH, "body": payload}
+                action = "created"
+            ops.append((job_id, action, request, digest))
+
+        if close_missing:
+            for job_id, synced in self.state.posts.items():
+                if job_id in latest or synced.get("filled"):
+                    continue
+                request = {"method": "POST", "path": f"{LISTINGS_PATH}/{synced['post_id']}",
+                           "body": {"meta": {WP_PREFIX + "filled": "1"}}}
+                # Blank hash: if the job comes back it is re-sent and reopened
+                ops.append((job_id, "closed", request, ""))
+        return ops
+
+    def _send_batch(self, batch):
+        body = {"validation": "normal", "requests": [request for _, _, request, _ in batch]}
+        r = self.session.post(f"{self.base_url}{BATCH_PATH}", json=body, timeout=60)
+        r.raise_for_status()
+        return r.json()["responses"]
+
+    def sync(self, rows, close_missing=False, dry_run=False):
+        """Send every changed row; returns counts per action."""
+        ops = self.plan(rows, close_missing=close_missing)
+        counts = {"created": 0, "updated": 0, "closed": 0, "failed": 0, "batches": 0}
+        if dry_run:
+            for _, action, _, _ in ops:
+                counts[action] += 1
+            return counts
+
+        batches = [ops[i:i + self.batch_size] for i in range(0, len(ops), self.batch_size)]
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = [(batch, pool.submit(self._send_batch, batch)) for batch in batches]
+            for batch, future in futures:
+                counts["batches"] += 1
+                try:
+                    responses = future.result()
+                except Exception as e:
+                    print(f"❌ Batch of {len(batch)} failed: {e}")
+                    counts["failed"] += len(batch)
+                    continue
+                for (job_id, action, request, digest), response in zip(batch, responses):
+                    if response.get("status", 500) >= 300:
+                        message = (response.get("body") or {}).get("message", "")
+                        print(f"⚠️ {action} {job_id} failed ({response.get('status')}): {message}")
+                        counts["failed"] += 1
+                        continue
+                    synced = self.state.posts.setdefault(job_id, {})
+                    synced["post_id"] = response["body"].get("id", synced.get("post_id"))
+                    synced["hash"] = digest
+                    synced["filled"] = request["body"].get("meta", {}).get(WP_PREFIX + "filled") == "1"
+                    counts[action] += 1
+        self.state.save()
+        return counts
+
+
+# ---------------------------------------------------------------
+# 3️⃣  Local stand-in server
+# ---------------------------------------------------------------
+class StandInWordPress(ThreadingHTTPServer):
+    """Minimal WordPress stand-in: batch endpoint plus job_listing create/update."""
+
+    def __init__(self, port=8089):
+        super().__init__(("127.0.0.1", port), _StandInHandler)
+        self.posts = {}
+        self.requests_seen = 0
+        self.lock = threading.Lock()
+
+    def apply(self, method, path, body):
+        """Run one REST request against the in-memory posts; returns (status, body)."""
+        if method != "POST" or not path.startswith(LISTINGS_PATH):
+            return 404, {"code": "rest_no_route", "message": "No route was found"}
+        with self.lock:
+            post_id = path[len(LISTINGS_PATH):].strip("/")
+            if post_id:
+                post = self.posts.get(int(post_id))
+                if post is None:
+                    return 404, {"code": "rest_post_invalid_id", "message": "Invalid post ID."}
+                meta = dict(post.get("meta", {}), **body.get("meta", {}))
+                post.update(body)
+                post["meta"] = meta
+                return 200, post
+            post = dict(body, id=len(self.posts) + 1)
+            self.posts[post["id"]] = post
+            return 201, post
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        self.server.requests_seen += 1
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if self.path == BATCH_PATH:
+            responses = []
+            for request in body.get("requests", []):
+                status, payload = self.server.apply(request["method"], request["path"], request.get("body", {}))
+                responses.append({"status": status, "body": payload})
+            self._reply(207, {"responses": responses})
+        elif self.path.startswith("/wp-json"):
+            self._reply(*self.server.apply("POST", self.path[len("/wp-json"):], body))
+        else:
+            self._reply(404, {"code": "rest_no_route"})
+
+    def _reply(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass